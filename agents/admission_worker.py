@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Admission Worker - admission control in front of the coordinator.
+
+Project notifications and mid-trip re-plans arrive here first. While fewer
+than ADMISSION_MAX_ACTIVE projects are being planned (default: network.yaml
+max_concurrent_projects) they are forwarded at once:
+  - project.notification.started          -> coordinator admission.started
+  - project.notification.message_received -> coordinator admission.message_received
+  - constraint_violation / mood_update / voting_request -> dynamic-adjuster-agent
+Beyond that they wait in a bounded priority queue (re-plans first, then
+follow-up messages, then new plans) and users get their queue position as
+progress messages. Agent producers get admission.status events with
+queue depth and retry_after_s; a full queue rejects new plans.
+Every admitted request holds its own lease, and a project keeps its slot until
+all of its leases are gone. admission.release names the lease kind: "plan"
+(sent by the orchestrator after the join, the default) or "replan" (sent by
+the dynamic adjuster after a repair). Leases that are never released expire.
+As the one long-lived singleton worker it also prunes the shared blob store:
+every BLOB_PRUNE_INTERVAL seconds (default 3600) blobs that were not written
+or reused for BLOB_MAX_AGE_DAYS (default 7) are deleted.
+
+Usage:
+    ADMISSION_MAX_ACTIVE=10 ADMISSION_QUEUE_SIZE=50 python agents/admission_worker.py
+"""
+
+import asyncio
+import os
+from pathlib import Path
+
+import yaml
+
+from pipeline_worker import PipelineWorker, run_worker
+from tools.admission import AdmissionController
+from tools.blob_store import blob_store
+
+REPLAN_EVENTS = ("constraint_violation", "mood_update", "voting_request")
+FORWARD = {
+    "project.notification.message_received": ("admission.message_received", "coordinator"),
+    **{event_name: (event_name, "dynamic-adjuster-agent") for event_name in REPLAN_EVENTS},
+}
+
+
+def configured_max_projects() -> int:
+    with open(Path(__file__).parent.parent / "network.yaml", encoding="utf-8") as f:
+        network = yaml.safe_load(f)
+    for mod in network["network"]["mods"]:
+        if mod["name"].endswith(".project"):
+            return int(mod.get("config", {}).get("max_concurrent_projects", 10))
+    return 10
+
+
+class AdmissionWorker(PipelineWorker):
+    """Queues projects beyond capacity without any model calls."""
+
+    default_agent_id = "admission-controller"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.controller = AdmissionController(
+            max_active=int(os.getenv("ADMISSION_MAX_ACTIVE") or configured_max_projects()),
+            queue_size=int(os.getenv("ADMISSION_QUEUE_SIZE", "50")),
+            target_seconds=float(os.getenv("ADMISSION_TARGET_SECONDS", "120")),
+        )
+        self.planned = set()
+        self.notified_positions = {}
+        self.blob_max_age_days = float(os.getenv("BLOB_MAX_AGE_DAYS", "7"))
+        self.blob_prune_interval = float(os.getenv("BLOB_PRUNE_INTERVAL", "3600"))
+        self.lease_task = None
+        self.prune_task = None
+        self.handlers["project.notification.started"] = self.on_project_started
+        self.handlers["project.notification.message_received"] = self.on_request
+        self.handlers["admission.release"] = self.on_release
+        for event_name in REPLAN_EVENTS:
+            self.handlers[event_name] = self.on_request
+
+    async def on_startup(self):
+        self.lease_task = asyncio.create_task(self.expire_leases())
+        self.prune_task = asyncio.create_task(self.prune_blobs())
+        await super().on_startup()
+
+    async def on_shutdown(self):
+        for task in (self.lease_task, self.prune_task):
+            if task is not None:
+                task.cancel()
+        await super().on_shutdown()
+
+    async def on_project_started(self, event):
+        # The welcome message is cheap and gives immediate feedback, it never waits
+        await self.send("admission.started", "coordinator", dict(event.payload or {}))
+
+    async def on_request(self, event):
+        payload = event.payload or {}
+        project_id = payload.get("project_id")
+        if not project_id:
+            # Nothing to hold a slot for (e.g. votes keyed by session), pass it through
+            target_event, target = FORWARD[event.event_name]
+            await self.send(target_event, target, dict(payload))
+            return
+        if event.event_name in REPLAN_EVENTS:
+            priority_class = "replan"
+        else:
+            priority_class = "follow_up" if project_id in self.planned else "new_plan"
+        source_id = self.source_of(event)
+        result = self.controller.submit(project_id, priority_class,
+                                        {"event_name": event.event_name, "payload": payload, "source_id": source_id})
+
+        if result["status"] == "admitted":
+            await self.forward(project_id, event.event_name, payload)
+        elif result["status"] == "queued":
+            await self.notify_position(project_id, result["position"], result["retry_after_s"])
+        else:
+            await self.report_progress(project_id, "failed",
+                                       f"TripMind is at capacity, please try again in about {result['retry_after_s']:.0f}s")
+        if result.get("displaced"):
+            displaced = result["displaced"]
+            await self.report_progress(displaced["project_id"], "failed",
+                                       "Your request was bumped by urgent trip changes, please send it again shortly")
+            await self.backpressure(displaced["item"]["source_id"], displaced["project_id"], dict(result, status="rejected"))
+        await self.backpressure(source_id, project_id, result)
+        if result["status"] != "admitted":
+            print(f"Admission {result['status']}: {project_id} ({priority_class}) {self.controller.snapshot()}")
+
+    async def on_release(self, event):
+        payload = event.payload or {}
+        project_id = payload.get("project_id")
+        if project_id:
+            await self.dispatch(self.controller.release(project_id, payload.get("lease") or "plan"))
+
+    async def expire_leases(self):
+        while True:
+            await asyncio.sleep(5)
+            try:
+                await self.dispatch(self.controller.expire())
+            except Exception as e:
+                print(f"Lease expiry failed: {e}")
+
+    async def prune_blobs(self):
+        """Delete expired blobs; compact analyses write one on every call."""
+        while True:
+            try:
+                removed = await asyncio.to_thread(blob_store.prune, self.blob_max_age_days)
+                if removed:
+                    print(f"Pruned {removed} blobs older than {self.blob_max_age_days:g} days")
+            except Exception as e:
+                print(f"Blob pruning failed: {e}")
+            await asyncio.sleep(self.blob_prune_interval)
+
+    async def dispatch(self, admitted):
+        """Forward newly admitted requests and refresh the positions of everyone still waiting."""
+        for entry in admitted:
+            item = entry["item"]
+            self.notified_positions.pop(entry["project_id"], None)
+            await self.report_progress(entry["project_id"], "working",
+                                       f"Your turn! Planning starts now (waited {entry['waited_s']:.0f}s)")
+            await self.forward(entry["project_id"], item["event_name"], item["payload"])
+        if admitted:
+            for project_id, position in self.controller.positions().items():
+                await self.notify_position(project_id, position, self.controller.estimate_wait(position))
+
+    async def forward(self, project_id, event_name, payload):
+        target_event, target = FORWARD[event_name]
+        if target_event == "admission.message_received":
+            self.planned.add(project_id)
+        await self.send(target_event, target, dict(payload))
+
+    async def notify_position(self, project_id, position, retry_after_s):
+        # Only tell users when their position actually changed
+        if self.notified_positions.get(project_id) == position:
+            return
+        self.notified_positions[project_id] = position
+        await self.report_progress(project_id, "queued",
+                                   f"Queued at position {position}, planning should start in about {retry_after_s:.0f}s")
+
+    async def backpressure(self, source_id, project_id, result):
+        """Tell agent producers how loaded we are; users hear about it through progress messages."""
+        if not source_id or source_id.startswith("mod:") or source_id == self.agent_id:
+            return
+        snapshot = self.controller.snapshot()
+        await self.send("admission.status", source_id, {
+            "project_id": project_id,
+            "status": result["status"],
+            "position": result.get("position"),
+            "queue_depth": snapshot["queue_depth"],
+            "active": snapshot["active"],
+            "limit": snapshot["limit"],
+            "retry_after_s": result.get("retry_after_s"),
+            "accepting": snapshot["queue_depth"] < self.controller.queue_size,
+        })
+
+
+if __name__ == "__main__":
+    run_worker(AdmissionWorker, "TripMind Admission Worker")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Info Pipeline Worker - fused scrape-and-analyze stage.
+
+Registers as web-scraper-agent, so route planning needs no changes. It scrapes
+and analyzes in one process and sends info.analysis.completed straight back to
+the requester. The raw data stays an in-memory list and never goes into an
+event payload. Failures and timeouts go back as info.scraping.failed. Run it
+instead of web_scraper_worker.py and information_analyzer_worker.py.
+
+Usage:
+    python agents/info_pipeline_worker.py
+"""
+
+import asyncio
+
+from information_analyzer_worker import blob_fields, output_options
+from pipeline_worker import PipelineWorker, run_worker
+from tools.info_pipeline import info_pipeline
+from tools.information_analyzer import ANALYSIS_TIMEOUT_SECONDS
+from tools.tool_executor import tool_executor
+from tools.web_scraper import SCRAPE_TIMEOUT_SECONDS
+
+
+class InfoPipelineWorker(PipelineWorker):
+    """Scrapes and analyzes travel information in a single hop."""
+
+    default_agent_id = "web-scraper-agent"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.handlers["info.scraping.requested"] = self.on_scraping_requested
+
+    async def on_scraping_requested(self, event):
+        payload = event.payload or {}
+        project_id = payload.get("project_id")
+        info_type = payload.get("info_type") or "attractions"
+        requester_id = payload.get("requester_id") or self.source_of(event)
+
+        await self.report_progress(project_id, "started", "Scraping and analyzing travel information...")
+        # One thread for both stages keeps the raw data in memory; the pool bounds concurrent projects
+        try:
+            result = await tool_executor.run_blocking(info_pipeline.scrape_and_analyze, info_type,
+                                                      payload.get("query") or {},
+                                                      payload.get("analysis_type") or "comprehensive",
+                                                      *output_options(payload),
+                                                      timeout=SCRAPE_TIMEOUT_SECONDS + ANALYSIS_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            result = {"success": False, "error": "Info pipeline timed out"}
+        if not result.get("success"):
+            await self.report_failure(payload, "info.scraping.failed", requester_id,
+                                      result.get("error", "Info pipeline failed"))
+            return
+
+        processed_data = self.offload_fields(result["processed_data"], blob_fields(result))
+        version = await self.save_state(project_id, "analysis", {"processed_data": processed_data,
+                                                                 "quality_metrics": result["quality_metrics"]})
+        timings = result["timings_ms"]
+        await self.report_progress(project_id, "completed",
+                                   f"Scraped and analyzed {result['scrape_metadata'].get('total_items', 0)} items "
+                                   f"in {timings['scrape'] + timings['analyze']:.0f} ms -> {requester_id}")
+        await self.send("info.analysis.completed", requester_id, {
+            "project_id": project_id,
+            "info_type": info_type,
+            "processed_data": processed_data,
+            "quality_metrics": result["quality_metrics"],
+            "state_versions": {"analysis": version},
+            "reply_to": payload.get("reply_to"),
+        })
+
+
+if __name__ == "__main__":
+    run_worker(InfoPipelineWorker, "TripMind Info Pipeline Worker (fused scrape + analyze)")
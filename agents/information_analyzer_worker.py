@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Information Analyzer Worker - LLM-free replacement for information_analyzer_agent.yaml.
+
+Handles info.scraping.completed by calling InformationAnalyzer directly and
+sends info.analysis.completed back to the route planning agent.
+
+The result goes into the route planner's prompt, so by default it is a compact
+digest sized to ANALYSIS_TOKEN_BUDGET estimated tokens; the full recommendation
+list travels as a blob reference for optimize_route. Requests can override
+this with output_mode / token_budget in the payload.
+
+Analysis runs in the shared process pool (TRIPMIND_TOOL_PROCESSES) with an
+ANALYSIS_TIMEOUT_SECONDS limit, so the event loop keeps serving other projects.
+Failures and timeouts go to the requester as info.scraping.failed, whose
+trigger plans the route without scraped data.
+
+Usage:
+    ANALYSIS_OUTPUT_MODE=compact ANALYSIS_TOKEN_BUDGET=800 python agents/information_analyzer_worker.py
+"""
+
+import os
+
+from pipeline_worker import PipelineWorker, run_worker
+from tools.information_analyzer import analyzer
+
+
+# Large analysis fields travel as blob references; summary and insights stay inline for the LLM
+ANALYSIS_BLOB_FIELDS = ("top_recommendations", "categories")
+OUTPUT_MODE = os.getenv("ANALYSIS_OUTPUT_MODE", "compact")
+TOKEN_BUDGET = int(os.getenv("ANALYSIS_TOKEN_BUDGET", "800"))
+
+
+def output_options(payload):
+    """(output_mode, token_budget) requested in the payload, falling back to the worker defaults."""
+    return payload.get("output_mode") or OUTPUT_MODE, int(payload.get("token_budget") or TOKEN_BUDGET)
+
+
+def blob_fields(result):
+    """Compact digests are already sized for the prompt and carry the full list as a reference."""
+    return () if result["analysis_metadata"].get("output_mode") == "compact" else ANALYSIS_BLOB_FIELDS
+
+
+class InformationAnalyzerWorker(PipelineWorker):
+    """Analyzes scraped data without any model calls."""
+
+    default_agent_id = "information-analyzer-agent"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.handlers["info.scraping.completed"] = self.on_scraping_completed
+
+    async def on_scraping_completed(self, event):
+        payload = event.payload or {}
+        project_id = payload.get("project_id")
+        analysis_type = payload.get("analysis_type") or "comprehensive"
+
+        await self.report_progress(project_id, "started", "Analyzing scraped data...")
+        # Runs in the process pool; blob references are resolved in the child process
+        result = await analyzer.analyze_information_async(payload.get("raw_data") or [], analysis_type,
+                                                          *output_options(payload))
+        requester_id = payload.get("requester_id") or "route-planning-agent"
+        if not result.get("success"):
+            # The requester's info.scraping.failed trigger plans without scraped data
+            await self.report_failure(payload, "info.scraping.failed", requester_id,
+                                      result.get("error", "Analysis failed"))
+            return
+
+        processed_data = self.offload_fields(result["processed_data"], blob_fields(result))
+        version = await self.save_state(project_id, "analysis", {"processed_data": processed_data,
+                                                                 "quality_metrics": result["quality_metrics"]})
+        await self.report_progress(project_id, "completed", f"Analysis complete! -> {requester_id}")
+        await self.send("info.analysis.completed", requester_id, {
+            "project_id": project_id,
+            "info_type": payload.get("info_type"),
+            "processed_data": processed_data,
+            "quality_metrics": result["quality_metrics"],
+            "state_versions": {"analysis": version},
+            "reply_to": payload.get("reply_to"),
+        })
+
+
+if __name__ == "__main__":
+    run_worker(InformationAnalyzerWorker, "TripMind Information Analyzer Worker")
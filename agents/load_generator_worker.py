@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Load Generator Worker - ramps concurrent planning projects against a local network.
+
+Replays the user_input scenarios in events/*.json as new projects, keeping a
+fixed number of projects in flight per stage (closed loop). A project is done
+when the orchestrator's plan.join span shows up in its trace. Recorded
+message_history.json traffic and the follow-up scenarios (mood updates,
+constraint violations, votes) run alongside as background load.
+
+Run the agents against the LLM stub so results measure the system, not the
+model provider:
+    python tools/llm_stub.py --latency-ms 800 --jitter-ms 200
+    python agents/load_generator_worker.py --levels 1,2,4,8,16 --stage-seconds 120
+
+The report (throughput, end-to-end and per-hop percentiles, saturation point)
+is printed and written as JSON to data/load_reports/.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from pathlib import Path
+
+import yaml
+
+from pipeline_worker import PipelineWorker
+from tools.load_generator import (StageRecorder, find_saturation, format_report, hop_latencies, instantiate,
+                                  load_history, load_scenarios)
+from tools.tracing import tracer
+
+
+class LoadGeneratorWorker(PipelineWorker):
+    """Sends scenario events and measures completions from the project traces."""
+
+    default_agent_id = "load-generator"
+
+    def __init__(self, options, **kwargs):
+        super().__init__(**kwargs)
+        self.options = options
+        self.scenarios = load_scenarios(options.events_dir)
+        self.history = load_history(options.history) if options.history_rate > 0 else []
+        self.run_id = time.strftime("%m%d%H%M%S")
+        self.counter = itertools.count(1)
+
+    async def run(self):
+        if not self.scenarios["planning"]:
+            raise SystemExit("No user_input scenarios found in the events directory")
+        background = [asyncio.create_task(self.replay_history())] if self.history else []
+        stages = []
+        try:
+            for level in self.options.levels:
+                print(f"Stage: {level} concurrent projects for {self.options.stage_seconds}s...")
+                recorder = await self.run_stage(level)
+                spans = {project_id: tracer.load(project_id) for project_id in recorder.project_ids}
+                stages.append(recorder.summary(hop_latencies(spans)))
+                print(f"  completed {recorder.summary()['completed']}, timeouts {recorder.timeouts}")
+        finally:
+            for task in background:
+                task.cancel()
+
+        with open(Path(__file__).parent.parent / "network.yaml", encoding="utf-8") as f:
+            network = yaml.safe_load(f)
+        project_mod = next((mod for mod in network["network"]["mods"] if mod["name"].endswith(".project")), {})
+        report = {
+            "run_id": self.run_id,
+            "config": {
+                "levels": self.options.levels,
+                "stage_seconds": self.options.stage_seconds,
+                "project_timeout": self.options.project_timeout,
+                "history_rate": self.options.history_rate,
+                "follow_up": self.options.follow_up,
+                "max_concurrent_projects": project_mod.get("config", {}).get("max_concurrent_projects"),
+            },
+            "stages": stages,
+            "saturation": find_saturation(stages),
+        }
+        report_path = Path(self.options.report or Path(__file__).parent.parent / "data" / "load_reports"
+                           / f"load-{self.run_id}.json")
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(format_report(report))
+        print(f"\nReport written to {report_path}")
+
+    async def run_stage(self, level: int) -> StageRecorder:
+        """Keep `level` projects in flight until the stage time is up, then wait for the stragglers."""
+        recorder = StageRecorder(level)
+        deadline = time.monotonic() + self.options.stage_seconds
+        scenarios = itertools.cycle(self.scenarios["planning"])
+
+        async def slot():
+            while time.monotonic() < deadline:
+                await self.run_project(next(scenarios), recorder)
+
+        await asyncio.gather(*(slot() for _ in range(level)))
+        recorder.finish()
+        return recorder
+
+    async def run_project(self, scenario, recorder: StageRecorder):
+        project_id = f"load-{self.run_id}-{next(self.counter)}"
+        event = instantiate(scenario, project_id)
+        sent_ns = time.time_ns()
+        try:
+            await self.send(event["event_name"], event["destination_id"], event["payload"])
+        except Exception as e:
+            print(f"Failed to start {project_id}: {e}")
+            recorder.errors += 1
+            return
+        joined_ns = await self.wait_for_plan(project_id)
+        if joined_ns is None:
+            recorder.timeouts += 1
+            return
+        recorder.completed(project_id, (joined_ns - sent_ns) / 1e6)
+        if self.options.follow_up:
+            for follow_up in self.scenarios["follow_up"]:
+                event = instantiate(follow_up, project_id)
+                await self.send(event["event_name"], event["destination_id"], event["payload"])
+
+    async def wait_for_plan(self, project_id: str):
+        """Poll the project trace for the orchestrator's plan.join span; returns its end time or None."""
+        deadline = time.monotonic() + self.options.project_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.options.poll_interval)
+            spans = await asyncio.to_thread(tracer.load, project_id)
+            joined = [span["end_ns"] for span in spans if span["name"] == "plan.join"]
+            if joined:
+                return joined[0]
+        return None
+
+    async def replay_history(self):
+        """Replay recorded messaging traffic at a constant rate."""
+        for event in itertools.cycle(self.history):
+            await self.send(event["event_name"], event["destination_id"], event["payload"] or {})
+            await asyncio.sleep(1 / self.options.history_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TripMind Load Generator")
+    parser.add_argument("--host", default="localhost", help="Network host")
+    parser.add_argument("--port", type=int, default=8700, help="Network port")
+    parser.add_argument("--url", default=None, help="Connection URL (e.g., grpc://localhost:8600 for direct gRPC)")
+    parser.add_argument("--levels", default="1,2,4,8,16",
+                        type=lambda value: [int(level) for level in value.split(",")],
+                        help="Concurrent project levels, one stage each")
+    parser.add_argument("--stage-seconds", type=float, default=120, help="Duration of each stage")
+    parser.add_argument("--project-timeout", type=float, default=300, help="Seconds before a project counts as timed out")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Trace polling interval in seconds")
+    parser.add_argument("--history-rate", type=float, default=2.0,
+                        help="Recorded message_history events per second (0 disables)")
+    parser.add_argument("--follow-up", action="store_true",
+                        help="Send the adjustment scenarios to each project once its plan is compiled")
+    parser.add_argument("--events-dir", default=None, help="Scenario directory (default: events/)")
+    parser.add_argument("--history", default=None, help="Recorded message history (default: messaging mod history)")
+    parser.add_argument("--report", default=None, help="Report path (default: data/load_reports/load-<run>.json)")
+    args = parser.parse_args()
+
+    async def run():
+        agent = LoadGeneratorWorker(args)
+        try:
+            if args.url:
+                await agent.async_start(url=args.url)
+            else:
+                await agent.async_start(network_host=args.host, network_port=args.port)
+            await agent.run()
+        except KeyboardInterrupt:
+            print("\nStopping load test...")
+        finally:
+            await agent.async_stop()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
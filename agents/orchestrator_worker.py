@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Orchestrator Worker - scatter-gather fan-out after intent parsing.
+
+The coordinator forwards intent.parsed here. The orchestrator dispatches the
+independent branches concurrently:
+  - route planning
+  - group preferences
+  - health check
+  - budget
+Each request carries reply_to="orchestrator". Results are collected per
+project behind a join barrier. Once every branch has answered, or
+ORCHESTRATOR_JOIN_TIMEOUT seconds have passed, a single plan.compiled event
+goes to the coordinator with whatever arrived. End-to-end latency is the
+slowest branch instead of the sum of all branches. A branch that answers after
+a timed-out join reaches the coordinator as plan.updated, carrying the same
+fields that branch contributes to plan.compiled.
+
+Usage:
+    python agents/orchestrator_worker.py
+"""
+
+import os
+import re
+import time
+
+from pipeline_worker import PipelineWorker, run_worker
+from tools.join_barrier import JoinBarrier
+from tools.tracing import tracer
+
+# Assumed trip length when the intent names no duration
+DEFAULT_BUDGET_DAYS = 3
+
+# branch -> (request event, target agent, result event)
+BRANCHES = {
+    "route": ("intent.parsed", "route-planning-agent", "route.planned"),
+    "preferences": ("group.members.added", "group-preference-agent", "preference.analysis.complete"),
+    "health": ("task.health_check", "health-care-agent", "health.checked"),
+    "budget": ("task.analyze_budget", "budget-balancer-agent", "budget.analyzed"),
+}
+
+
+def plan_fields(branch, result):
+    """The plan.compiled / plan.updated fields contributed by one branch result."""
+    if branch == "route":
+        result = result or {}
+        return {"itinerary": result.get("itinerary"), "route_version": result.get("route_version")}
+    return {{"preferences": "preference_analysis"}.get(branch, branch): result}
+
+
+def _number(value):
+    """First number in an int, float or string like "5 days" / "4 people" / "8000 CNY"."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = re.search(r"\d+(?:\.\d+)?", str(value or "").replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def budget_request(intent, members):
+    """
+    Budget branch payload built from parsed_intent alone.
+
+    The route is planned in parallel, so there are no activities yet. The
+    itinerary is a structured stub with one empty day per trip day, which
+    calculate_budget accepts and prices with its daily food and transport
+    defaults. Without explicit members, travelers sharing the intent's
+    per-person budget are synthesized so member_plans and alerts work.
+    """
+    intent = intent if isinstance(intent, dict) else {}
+    days = int(_number(intent.get("days")) or _number(intent.get("duration")) or DEFAULT_BUDGET_DAYS)
+    travelers = int(_number(intent.get("travelers")) or len(members) or 1)
+    per_person = _number(intent.get("budget_per_person"))
+    if per_person is None and _number(intent.get("budget_total")):
+        per_person = _number(intent.get("budget_total")) / travelers
+    if per_person is None:
+        per_person = _number(intent.get("budget_amount") or intent.get("budget"))
+    if not members and per_person:
+        members = [{"name": f"Traveler {index}", "budget": per_person, "preferences": intent.get("preferences") or []}
+                   for index in range(1, travelers + 1)]
+    return {
+        "itinerary": {"days": [{"day": day, "items": []} for day in range(1, days + 1)],
+                      "estimated_from": "parsed_intent"},
+        "members": members,
+        "options": {"days": days, "travelers": travelers, "currency": intent.get("budget_currency") or "CNY"},
+    }
+
+
+class OrchestratorWorker(PipelineWorker):
+    """Fans out intent.parsed and joins the branch results without any model calls."""
+
+    default_agent_id = "orchestrator"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        timeout = float(os.getenv("ORCHESTRATOR_JOIN_TIMEOUT", "90"))
+        self.barrier = JoinBarrier(self.on_joined, timeout_seconds=timeout)
+        self.branch_by_result = {result: branch for branch, (_, _, result) in BRANCHES.items()}
+        self.handlers["intent.parsed"] = self.on_intent_parsed
+        for result_event in self.branch_by_result:
+            self.handlers[result_event] = self.on_branch_result
+
+    async def on_intent_parsed(self, event):
+        payload = event.payload or {}
+        project_id = payload.get("project_id")
+        intent = payload.get("parsed_intent") or {}
+        if not project_id:
+            return
+
+        self.barrier.open(project_id, BRANCHES, context={"parsed_intent": intent})
+        await self.save_state(project_id, "intent", intent)
+        await self.report_progress(project_id, "working",
+                                   f"Planning {len(BRANCHES)} branches in parallel: {', '.join(BRANCHES)}")
+        members = payload.get("members") or (intent.get("members") if isinstance(intent, dict) else None) or []
+        requests = {
+            "route": {"parsed_intent": intent},
+            "preferences": {"members": members, "parsed_intent": intent},
+            "health": {"members": members, "destination": intent.get("destination") if isinstance(intent, dict) else None,
+                       "parsed_intent": intent},
+            "budget": dict(budget_request(intent, members), parsed_intent=intent),
+        }
+        for branch, (request_event, target, _) in BRANCHES.items():
+            await self.send(request_event, target, dict(requests[branch], project_id=project_id, reply_to=self.agent_id))
+
+    async def on_branch_result(self, event):
+        payload = event.payload or {}
+        project_id = payload.get("project_id")
+        branch = self.branch_by_result[event.event_name]
+        if branch != "route":
+            # The route itself is stored by optimize_route; keep the other branch results alongside it
+            await self.save_state(project_id, branch, payload)
+        if not await self.barrier.arrive(project_id, branch, payload):
+            # The join already closed, amend the compiled plan with the late branch
+            await self.report_progress(project_id, "working", f"Late {branch} result arrived, updating the plan")
+            await self.send("plan.updated", "coordinator", {
+                "project_id": project_id,
+                "branch": branch,
+                **plan_fields(branch, payload),
+            })
+
+    async def on_joined(self, summary):
+        project_id = summary["project_id"]
+        results = summary["results"]
+        status = "completed" if not summary["missing"] else "partial"
+        await self.report_progress(project_id, status,
+                                   f"Collected {len(results)}/{len(BRANCHES)} branches in {summary['elapsed_ms'] / 1000:.1f}s"
+                                   + (f", missing: {', '.join(summary['missing'])}" if summary["missing"] else ""))
+        # One span covering the whole fan-out, from barrier open to join
+        started_ns = time.time_ns() - int(summary["elapsed_ms"] * 1e6)
+        with tracer.span("plan.join", project_id=project_id, parent={}, service=self.agent_id, kind="hop",
+                         start_ns=started_ns, missing=",".join(summary["missing"]) or None):
+            plan = {"project_id": project_id}
+            for branch in BRANCHES:
+                plan.update(plan_fields(branch, results.get(branch)))
+            plan.update(missing=summary["missing"], timed_out=summary["timed_out"],
+                        branch_latency_ms=summary["latency_ms"])
+            await self.send("plan.compiled", "coordinator", plan)
+        # Free the project's planning slot so the next queued project can start
+        await self.send("admission.release", "admission-controller", {"project_id": project_id, "lease": "plan"})
+
+
+if __name__ == "__main__":
+    run_worker(OrchestratorWorker, "TripMind Orchestrator Worker")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Pipeline Worker - shared base for TripMind's LLM-free Python agents.
+
+Pipeline stages that only call a deterministic tool and forward its result
+do not need an LLM. Subclasses map event names to async handlers and use
+send() / report_progress() to emit follow-up events.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+# Add src to path for development
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent / "src"))
+# Make the TripMind tools package importable when started as a script
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from openagents.agents.worker_agent import WorkerAgent
+from openagents.models.event import Event
+from openagents.models.event_context import EventContext
+from tools.blob_store import blob_store
+from tools.hash_ring import shard_router
+from tools.project_state import project_state
+from tools.tool_executor import tool_executor
+from tools.tracing import tracer
+
+# Progress traffic is not traced per hop; the relay turns it into spans itself
+UNTRACED_EVENTS = {"progress.update"}
+
+
+class PipelineWorker(WorkerAgent):
+    """Dispatches incoming events to handlers by event name without any model calls."""
+
+    default_agent_id = "pipeline-worker"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.handlers: Dict[str, Callable[[Event], Awaitable[None]]] = {}
+
+    async def on_startup(self):
+        print(f"{self.agent_id} is running ({', '.join(self.handlers)}). Press Ctrl+C to stop.")
+
+    async def on_shutdown(self):
+        # Drop queued tool calls; running scrapes and analyses finish in the background
+        tool_executor.shutdown()
+        print(f"{self.agent_id} stopped.")
+
+    async def react(self, context: EventContext):
+        """Route the event to its handler; unknown events are ignored."""
+        event = context.incoming_event
+
+        # Skip our own events
+        if event.source_id == self.agent_id:
+            return
+
+        handler = self.handlers.get(event.event_name)
+        if handler is None:
+            return
+        payload = event.payload or {}
+        owner = shard_router.route(self.agent_id, payload.get("project_id"))
+        if owner != self.agent_id:
+            # Senders that do not route (LLM agents) reach the first replica; hand the project to its owner
+            await self.client.send_event(Event(
+                event_name=event.event_name,
+                source_id=self.agent_id,
+                destination_id=owner,
+                payload=dict(payload, forwarded_from=self.source_of(event)),
+            ))
+            return
+        try:
+            if event.event_name in UNTRACED_EVENTS:
+                await handler(event)
+                return
+            with tracer.span(event.event_name, **self._hop_context(event)):
+                await handler(event)
+        except Exception as e:
+            print(f"{self.agent_id} failed to handle {event.event_name}: {e}")
+            await self.report_progress(payload.get("project_id"), "failed", f"{event.event_name} failed: {e}")
+
+    def _hop_context(self, event: Event) -> Dict[str, Any]:
+        """
+        Span arguments for handling an event.
+
+        The trace context names the last Python worker that sent it. If the
+        event arrived from someone else, an LLM agent copied the context along,
+        so the time between that send and now is recorded as the LLM agent's span.
+        """
+        payload = event.payload or {}
+        source_id = self.source_of(event)
+        context = tracer.extract(payload)
+        received_ns = time.time_ns()
+        hop = {"project_id": payload.get("project_id"), "service": self.agent_id, "kind": "hop",
+               "source": source_id, "parent": context or {}}
+        if context is None:
+            return hop
+        if context.get("service") != source_id:
+            hop["parent"] = tracer.record(source_id, context["sent_at_ns"], received_ns, parent=context,
+                                          service=source_id, kind="llm") or context
+        else:
+            hop["queue_wait_ms"] = round((received_ns - context["sent_at_ns"]) / 1e6, 3)
+        return hop
+
+    def source_of(self, event: Event) -> str:
+        """The original sender, also for events forwarded between replicas."""
+        return (event.payload or {}).get("forwarded_from") or event.source_id
+
+    async def send(self, event_name: str, destination_id: str, payload: Dict[str, Any]):
+        """
+        Send a direct event to another agent.
+
+        Sharded agents get the replica that owns the project, and traced hops
+        pass their trace context along.
+        """
+        destination_id = shard_router.route(destination_id, payload.get("project_id"))
+        if event_name in UNTRACED_EVENTS or tracer.current() is None:
+            await self.client.send_event(Event(
+                event_name=event_name,
+                source_id=self.agent_id,
+                destination_id=destination_id,
+                payload=payload,
+            ))
+            return
+        with tracer.span(f"send {event_name}", kind="send", destination=destination_id) as span:
+            await self.client.send_event(Event(
+                event_name=event_name,
+                source_id=self.agent_id,
+                destination_id=destination_id,
+                payload=tracer.inject(payload, span),
+            ))
+
+    def offload_fields(self, data: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+        """Replace large fields with blob references so the event stays small."""
+        data = dict(data)
+        for field in fields:
+            if field in data:
+                data[field] = blob_store.offload(data[field])
+        return data
+
+    async def save_state(self, project_id: Optional[str], field: str, value: Any) -> Optional[int]:
+        """Store a project state field and return its version; events then carry only the version."""
+        if not project_id:
+            return None
+        return await asyncio.to_thread(project_state.put, project_id, field, value, self.agent_id)
+
+    async def report_progress(self, project_id: Optional[str], status: str, message: str):
+        """Send a progress.update to the progress relay."""
+        await self.send("progress.update", "progress-relay", {
+            "project_id": project_id,
+            "agent_id": self.agent_id,
+            "status": status,
+            "message": message,
+            # Our hops already have spans, the relay only needs to time the LLM agents
+            "traced": tracer.current() is not None,
+        })
+
+    async def report_failure(self, payload: Dict[str, Any], failure_event: str, requester_id: str, error: str):
+        """Report a failed stage to the user and tell the requester, so it can fall back instead of waiting."""
+        project_id = payload.get("project_id")
+        await self.report_progress(project_id, "failed", error)
+        await self.send(failure_event, requester_id, {
+            key: value for key, value in {
+                "project_id": project_id,
+                "reply_to": payload.get("reply_to"),
+                # Replaced by our own context when this hop is traced
+                "trace": payload.get("trace"),
+                "error": error,
+            }.items() if value is not None
+        })
+
+
+def run_worker(agent_class, description: str):
+    """Command-line entry point shared by the pipeline workers."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--host", default="localhost", help="Network host")
+    parser.add_argument("--port", type=int, default=8700, help="Network port")
+    parser.add_argument("--url", default=None, help="Connection URL (e.g., grpc://localhost:8600 for direct gRPC)")
+    parser.add_argument("--agent-id", default=None, help="Override the agent id (used for replicas)")
+    args = parser.parse_args()
+
+    async def main():
+        agent = agent_class(agent_id=args.agent_id) if args.agent_id else agent_class()
+        try:
+            if args.url:
+                await agent.async_start(url=args.url)
+            else:
+                await agent.async_start(network_host=args.host, network_port=args.port)
+
+            # Keep running until interrupted
+            while True:
+                await asyncio.sleep(1)
+
+        except KeyboardInterrupt:
+            print("\nShutting down...")
+        finally:
+            await agent.async_stop()
+
+    asyncio.run(main())
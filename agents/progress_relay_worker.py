@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Progress Relay Worker - deterministic replacement for the coordinator's progress.update trigger.
+
+Formats progress.update events as "[Agent: <agent_id>] <message>". Bursts
+from the same project are merged into one project message, so progress no
+longer costs a coordinator LLM iteration per update.
+
+Usage:
+    PROGRESS_RELAY_WINDOW=1.5 python agents/progress_relay_worker.py
+"""
+
+import os
+
+from pipeline_worker import PipelineWorker, run_worker
+from tools.progress_relay import ProgressCoalescer
+from tools.tracing import ProgressSpans, tracer
+
+
+class ProgressRelayWorker(PipelineWorker):
+    """Relays coalesced progress updates to the project without any model calls."""
+
+    default_agent_id = "progress-relay"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        window = float(os.getenv("PROGRESS_RELAY_WINDOW", "1.5"))
+        self.coalescer = ProgressCoalescer(self.post_project_message, window_seconds=window)
+        self.progress_spans = ProgressSpans(tracer)
+        self.handlers["progress.update"] = self.on_progress_update
+
+    async def on_shutdown(self):
+        await self.coalescer.flush_all()
+        await super().on_shutdown()
+
+    async def on_progress_update(self, event):
+        payload = dict(event.payload or {})
+        payload.setdefault("agent_id", self.source_of(event))
+        if not payload.pop("traced", False):
+            self.progress_spans.observe(payload.get("project_id"), payload["agent_id"],
+                                        payload.get("status"), payload.get("message") or "")
+        await self.coalescer.submit(payload)
+
+    async def post_project_message(self, project_id: str, text: str):
+        project = self.client.mod_adapters.get("openagents.mods.workspace.project")
+        if project is None:
+            print(f"Project mod not available, dropping progress for {project_id}: {text}")
+            return
+        await project.send_project_message(project_id=project_id, content={"text": text})
+
+
+if __name__ == "__main__":
+    run_worker(ProgressRelayWorker, "TripMind Progress Relay Worker")
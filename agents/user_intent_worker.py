@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+User Intent Worker - rule-based fast path in front of user_intent_agent.yaml.
+
+Registers as user-intent-agent, so the coordinator needs no changes. Each
+task.parse_intent is parsed with jieba segmentation, a destination gazetteer
+and regexes for days, budget and headcount. When the confidence reaches
+INTENT_CONFIDENCE_THRESHOLD the structured intent goes straight back to the
+coordinator as intent.parsed, skipping an LLM round trip. Otherwise the task
+is forwarded to the LLM agent (user-intent-llm-agent) together with the
+fields the rules did extract.
+
+Usage:
+    INTENT_CONFIDENCE_THRESHOLD=0.7 python agents/user_intent_worker.py
+"""
+
+import asyncio
+import os
+
+from pipeline_worker import PipelineWorker, run_worker
+from tools.intent_parser import intent_parser
+
+LLM_AGENT_ID = "user-intent-llm-agent"
+
+
+class UserIntentWorker(PipelineWorker):
+    """Parses simple travel requests without any model calls, falls back to the LLM agent."""
+
+    default_agent_id = "user-intent-agent"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        intent_parser.threshold = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", intent_parser.threshold))
+        self.stats = {"rules": 0, "llm": 0}
+        self.handlers["task.parse_intent"] = self.on_parse_intent
+
+    async def on_startup(self):
+        # Load the jieba dictionary now rather than on the first request
+        await asyncio.to_thread(intent_parser.warm_up)
+        await super().on_startup()
+
+    async def on_parse_intent(self, event):
+        payload = event.payload or {}
+        project_id = payload.get("project_id")
+        message = payload.get("user_message") or ""
+
+        await self.report_progress(project_id, "started", "Parsing your travel requirements...")
+        result = await asyncio.to_thread(intent_parser.parse, message)
+        if result["use_llm"]:
+            self.stats["llm"] += 1
+            reasons = result["ambiguities"] or [f"missing {', '.join(result['missing'])}"]
+            print(f"Intent for {project_id}: confidence {result['confidence']}, {'; '.join(reasons)} -> {LLM_AGENT_ID} "
+                  f"{self.stats}")
+            await self.send("task.parse_intent", LLM_AGENT_ID, {
+                **payload,
+                "rule_hints": {key: value for key, value in result["parsed_intent"].items()
+                               if value not in (None, [], "not specified")},
+                "rule_confidence": result["confidence"],
+            })
+            return
+
+        self.stats["rules"] += 1
+        intent = dict(result["parsed_intent"], confidence=result["confidence"])
+        await self.report_progress(project_id, "completed",
+                                   f"Intent parsing complete! {intent['destination']}, {intent['duration']}, "
+                                   f"{intent['travelers']} travelers (confidence {result['confidence']:.2f})")
+        await self.send("intent.parsed", "coordinator", {
+            "project_id": project_id,
+            "parsed_intent": intent,
+        })
+
+
+if __name__ == "__main__":
+    run_worker(UserIntentWorker, "TripMind User Intent Worker (rule-based fast path)")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Web Scraper Worker - LLM-free replacement for web_scraper_agent.yaml.
+
+Handles info.scraping.requested by calling TravelInfoScraper directly and
+forwards the raw data to the information analyzer as info.scraping.completed.
+Scrapes run in the shared bounded thread pool (TRIPMIND_TOOL_THREADS) with a
+SCRAPE_TIMEOUT_SECONDS limit, so many projects can be scraped at once.
+Failures and timeouts go back to the requester as info.scraping.failed.
+
+Usage:
+    python agents/web_scraper_worker.py
+"""
+
+import asyncio
+
+from pipeline_worker import PipelineWorker, run_worker
+from tools.blob_store import blob_store
+from tools.info_pipeline import info_pipeline
+from tools.tool_executor import tool_executor
+from tools.web_scraper import SCRAPE_TIMEOUT_SECONDS
+
+
+class WebScraperWorker(PipelineWorker):
+    """Scrapes travel information without any model calls."""
+
+    default_agent_id = "web-scraper-agent"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.handlers["info.scraping.requested"] = self.on_scraping_requested
+
+    async def on_scraping_requested(self, event):
+        payload = event.payload or {}
+        project_id = payload.get("project_id")
+        info_type = payload.get("info_type") or "attractions"
+
+        await self.report_progress(project_id, "started", "Scraping travel information...")
+        # The scraper uses blocking HTTP calls and delays, keep them off the event loop in the bounded pool
+        try:
+            result = await tool_executor.run_blocking(info_pipeline.scrape, info_type, payload.get("query") or {},
+                                                      timeout=SCRAPE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            result = {"success": False, "error": f"Scraping timed out after {SCRAPE_TIMEOUT_SECONDS:.0f}s"}
+        requester_id = payload.get("requester_id") or self.source_of(event)
+        if not result.get("success"):
+            await self.report_failure(payload, "info.scraping.failed", requester_id,
+                                      result.get("error", "Scraping failed"))
+            return
+
+        raw_data = blob_store.offload(result["raw_data"])
+        version = await self.save_state(project_id, "scraped", {"info_type": info_type, "raw_data": raw_data})
+        await self.report_progress(project_id, "completed", "Scraping complete! -> information-analyzer-agent")
+        await self.send("info.scraping.completed", "information-analyzer-agent", {
+            "project_id": project_id,
+            "requester_id": requester_id,
+            "info_type": info_type,
+            "raw_data": raw_data,
+            "state_versions": {"scraped": version},
+            "metadata": result["metadata"],
+            "output_mode": payload.get("output_mode"),
+            "token_budget": payload.get("token_budget"),
+            "reply_to": payload.get("reply_to"),
+        })
+
+
+if __name__ == "__main__":
+    run_worker(WebScraperWorker, "TripMind Web Scraper Worker")
@@ -1,4 +1,5 @@
 @echo off
+REM Windows launcher; on Linux use "python start_agents.py" (parallel start, readiness probes, restarts)
 REM Set console encoding to UTF-8
 chcp 65001 > nul
 
@@ -24,55 +25,81 @@ echo API Endpoint: https://open.bigmodel.cn/api/paas/v4/
 echo.
 
 echo [Core Coordination Layer]
-echo [1/9] Starting Coordinator Agent...
+echo [1/13] Starting Coordinator Agent...
 start "Coordinator" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& set DEFAULT_LLM_PROVIDER=openai&& set DEFAULT_LLM_MODEL_NAME=glm-4.5&& set DEFAULT_LLM_API_KEY=%ZHIPUAI_API_KEY%&& set DEFAULT_LLM_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& set OPENAI_API_KEY=%ZHIPUAI_API_KEY%&& set OPENAI_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& openagents agent start agents/coordinator.yaml"
 timeout /t 2 /nobreak > nul
 
+echo [2/13] Starting Progress Relay Worker (Python, no LLM)...
+start "Progress Relay" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& python agents/progress_relay_worker.py"
+timeout /t 2 /nobreak > nul
+
+echo [3/13] Starting Admission Controller Worker (Python, no LLM)...
+start "Admission Controller" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& python agents/admission_worker.py"
+timeout /t 2 /nobreak > nul
+
+echo [4/13] Starting Orchestrator Worker (Python, no LLM)...
+start "Orchestrator" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& python agents/orchestrator_worker.py"
+timeout /t 2 /nobreak > nul
+
 echo.
 echo [User Intent Layer]
-echo [2/9] Starting User Intent Agent...
-start "User Intent" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& set DEFAULT_LLM_PROVIDER=openai&& set DEFAULT_LLM_MODEL_NAME=glm-4.5&& set DEFAULT_LLM_API_KEY=%ZHIPUAI_API_KEY%&& set DEFAULT_LLM_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& set OPENAI_API_KEY=%ZHIPUAI_API_KEY%&& set OPENAI_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& openagents agent start agents/user_intent_agent.yaml"
+echo [5/13] Starting User Intent Worker (Python, rule-based fast path)...
+start "User Intent" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& python agents/user_intent_worker.py"
 timeout /t 2 /nobreak > nul
 
-echo [3/9] Starting Group Preference Agent...
+echo [6/13] Starting User Intent LLM Agent (fallback for low-confidence requests)...
+start "User Intent LLM" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& set DEFAULT_LLM_PROVIDER=openai&& set DEFAULT_LLM_MODEL_NAME=glm-4.5&& set DEFAULT_LLM_API_KEY=%ZHIPUAI_API_KEY%&& set DEFAULT_LLM_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& set OPENAI_API_KEY=%ZHIPUAI_API_KEY%&& set OPENAI_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& openagents agent start agents/user_intent_agent.yaml"
+timeout /t 2 /nobreak > nul
+
+echo [7/13] Starting Group Preference Agent...
 start "Group Preference" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& set DEFAULT_LLM_PROVIDER=openai&& set DEFAULT_LLM_MODEL_NAME=glm-4.5&& set DEFAULT_LLM_API_KEY=%ZHIPUAI_API_KEY%&& set DEFAULT_LLM_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& set OPENAI_API_KEY=%ZHIPUAI_API_KEY%&& set OPENAI_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& openagents agent start agents/group_preference_agent.yaml"
 timeout /t 2 /nobreak > nul
 
-echo [4/9] Starting Budget Balancer Agent...
+echo [8/13] Starting Budget Balancer Agent...
 start "Budget Balancer" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& set DEFAULT_LLM_PROVIDER=openai&& set DEFAULT_LLM_MODEL_NAME=glm-4.5&& set DEFAULT_LLM_API_KEY=%ZHIPUAI_API_KEY%&& set DEFAULT_LLM_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& set OPENAI_API_KEY=%ZHIPUAI_API_KEY%&& set OPENAI_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& openagents agent start agents/budget_balancer_agent.yaml"
 timeout /t 2 /nobreak > nul
 
-echo [5/9] Starting Health Care Agent...
+echo [9/13] Starting Health Care Agent...
 start "Health Care" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& set DEFAULT_LLM_PROVIDER=openai&& set DEFAULT_LLM_MODEL_NAME=glm-4.5&& set DEFAULT_LLM_API_KEY=%ZHIPUAI_API_KEY%&& set DEFAULT_LLM_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& set OPENAI_API_KEY=%ZHIPUAI_API_KEY%&& set OPENAI_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& openagents agent start agents/health_care_agent.yaml"
 timeout /t 2 /nobreak > nul
 
 echo.
 echo [Information Layer]
-echo [6/9] Starting Web Scraper Agent...
-start "Web Scraper" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& set DEFAULT_LLM_PROVIDER=openai&& set DEFAULT_LLM_MODEL_NAME=glm-4.5&& set DEFAULT_LLM_API_KEY=%ZHIPUAI_API_KEY%&& set DEFAULT_LLM_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& set OPENAI_API_KEY=%ZHIPUAI_API_KEY%&& set OPENAI_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& openagents agent start agents/web_scraper_agent.yaml"
+REM Set FUSED_INFO_STAGE=1 to scrape and analyze in one process (one event hop less)
+if "%FUSED_INFO_STAGE%"=="1" goto fused_info_stage
+echo [10/13] Starting Web Scraper Worker (Python, no LLM)...
+start "Web Scraper" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& python agents/web_scraper_worker.py"
 timeout /t 2 /nobreak > nul
 
-echo [7/9] Starting Information Analyzer Agent...
-start "Information Analyzer" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& set DEFAULT_LLM_PROVIDER=openai&& set DEFAULT_LLM_MODEL_NAME=glm-4.5&& set DEFAULT_LLM_API_KEY=%ZHIPUAI_API_KEY%&& set DEFAULT_LLM_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& set OPENAI_API_KEY=%ZHIPUAI_API_KEY%&& set OPENAI_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& openagents agent start agents/information_analyzer_agent.yaml"
+echo [11/13] Starting Information Analyzer Worker (Python, no LLM)...
+start "Information Analyzer" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& python agents/information_analyzer_worker.py"
 timeout /t 2 /nobreak > nul
+goto planning_layer
+
+:fused_info_stage
+echo [10-11/13] Starting Info Pipeline Worker (fused scrape + analyze, no LLM)...
+start "Info Pipeline" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& python agents/info_pipeline_worker.py"
+timeout /t 2 /nobreak > nul
+
+:planning_layer
 
 echo.
 echo [Planning Execution Layer]
-echo [8/9] Starting Route Planning Agent...
+echo [12/13] Starting Route Planning Agent...
 start "Route Planning" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& set DEFAULT_LLM_PROVIDER=openai&& set DEFAULT_LLM_MODEL_NAME=glm-4.5&& set DEFAULT_LLM_API_KEY=%ZHIPUAI_API_KEY%&& set DEFAULT_LLM_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& set OPENAI_API_KEY=%ZHIPUAI_API_KEY%&& set OPENAI_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& openagents agent start agents/route_planning_agent.yaml"
 timeout /t 2 /nobreak > nul
 
-echo [9/9] Starting Dynamic Adjuster Agent...
+echo [13/13] Starting Dynamic Adjuster Agent...
 start "Dynamic Adjuster" cmd /k "chcp 65001 > nul && conda activate openagents && set PYTHONIOENCODING=utf-8&& set DEFAULT_LLM_PROVIDER=openai&& set DEFAULT_LLM_MODEL_NAME=glm-4.5&& set DEFAULT_LLM_API_KEY=%ZHIPUAI_API_KEY%&& set DEFAULT_LLM_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& set OPENAI_API_KEY=%ZHIPUAI_API_KEY%&& set OPENAI_BASE_URL=https://open.bigmodel.cn/api/paas/v4/&& openagents agent start agents/dynamic_adjuster_agent.yaml"
 
 echo.
 echo ========================================
-echo   All 9 Agents Started!
+echo   All 13 Agents Started!
 echo ========================================
 echo.
 echo Agent Architecture:
-echo   Core Coordination: Coordinator
-echo   User Intent: User Intent, Group Preference, Budget Balancer, Health Care
+echo   Core Coordination: Coordinator, Progress Relay, Admission Controller, Orchestrator
+echo   User Intent: User Intent (rules + LLM fallback), Group Preference, Budget Balancer, Health Care
 echo   Information: Web Scraper, Information Analyzer
 echo   Planning: Route Planning, Dynamic Adjuster
 echo.
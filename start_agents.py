@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+TripMind Agent Supervisor - cross-platform replacement for start_agents.bat.
+
+Starts every agent in parallel: the LLM agents from agents/*.yaml and the
+Python workers that replace some of them. An agent counts as ready once its
+process holds an established TCP connection to the network (ports 8600/8700),
+not after a fixed sleep, so cold start takes as long as the slowest agent.
+Crashed agents are restarted with exponential backoff, and any agent can run
+several replicas. Replica counts are passed to every agent as TRIPMIND_REPLICAS
+so projects are consistently hashed onto replicas (tools/hash_ring.py).
+
+Usage:
+    ZHIPUAI_API_KEY=... python start_agents.py
+    python start_agents.py --with-network --replicas route-planning-agent=3
+    python start_agents.py --fused-info --llm-base-url http://127.0.0.1:8900/v1   # against tools/llm_stub.py
+
+Logs go to data/logs/<agent>.log; --verbose also echoes them with a prefix.
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from tools.hash_ring import replica_ids
+
+ROOT = Path(__file__).resolve().parent
+AGENTS_DIR = ROOT / "agents"
+DATA_DIR = ROOT / "data"
+
+# Python workers started instead of (or in addition to) YAML agents; a YAML agent with the same id is skipped
+WORKERS = ["progress_relay_worker.py", "admission_worker.py", "orchestrator_worker.py", "user_intent_worker.py",
+           "web_scraper_worker.py", "information_analyzer_worker.py"]
+FUSED_INFO_WORKERS = ["progress_relay_worker.py", "admission_worker.py", "orchestrator_worker.py", "user_intent_worker.py",
+                      "info_pipeline_worker.py"]
+# Demo agents that are not part of TripMind
+SKIP_YAML = {"charlie.yaml"}
+DEFAULT_LLM_BASE_URL = "https://open.bigmodel.cn/api/paas/v4/"
+
+BACKOFF_INITIAL = 1.0
+BACKOFF_MAX = 60.0
+# A replica that stays up this long gets its backoff reset
+STABLE_SECONDS = 60.0
+
+
+class AgentSpec:
+    """One agent to run: the command line and the id it registers with."""
+
+    def __init__(self, agent_id: str, command: List[str], llm: bool, source: Path):
+        self.agent_id = agent_id
+        self.command = command
+        self.llm = llm
+        self.source = source
+
+
+def _read_agent_id(path: Path, pattern: str) -> Optional[str]:
+    match = re.search(pattern, path.read_text(encoding="utf-8"), re.MULTILINE)
+    return match.group(1) if match else None
+
+
+def discover_agents(fused_info: bool = False) -> List[AgentSpec]:
+    """Python workers first, then every YAML agent whose id no worker has taken."""
+    specs = []
+    taken: Set[str] = set()
+    for name in FUSED_INFO_WORKERS if fused_info else WORKERS:
+        path = AGENTS_DIR / name
+        agent_id = _read_agent_id(path, r'^\s*default_agent_id\s*=\s*"([^"]+)"')
+        specs.append(AgentSpec(agent_id, [sys.executable, str(path)], llm=False, source=path))
+        taken.add(agent_id)
+    if fused_info:
+        # The fused worker registers as web-scraper-agent and replies directly, no analyzer needed
+        taken.add("information-analyzer-agent")
+    for path in sorted(AGENTS_DIR.glob("*.yaml")):
+        if path.name in SKIP_YAML or path.stem.endswith("_simple"):
+            continue
+        agent_id = _read_agent_id(path, r'^agent_id:\s*"?([\w-]+)"?')
+        if not agent_id or agent_id in taken:
+            continue
+        specs.append(AgentSpec(agent_id, ["openagents", "agent", "start", str(path)], llm=True, source=path))
+        taken.add(agent_id)
+    return specs
+
+
+def process_children() -> Dict[int, List[int]]:
+    """Parent pid -> child pids for every process (Linux /proc)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parent = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, ValueError, IndexError):
+                continue
+            children.setdefault(parent, []).append(int(entry))
+    return children
+
+
+def socket_inodes(pid: int, children: Dict[int, List[int]]) -> Set[str]:
+    """Socket inodes held by a process and its descendants; the openagents CLI may fork the actual client."""
+    pids, pending = {pid}, [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            if child not in pids:
+                pids.add(child)
+                pending.append(child)
+    inodes = set()
+    for process in pids:
+        try:
+            for fd in os.listdir(f"/proc/{process}/fd"):
+                try:
+                    target = os.readlink(f"/proc/{process}/fd/{fd}")
+                except OSError:
+                    continue
+                if target.startswith("socket:["):
+                    inodes.add(target[8:-1])
+        except OSError:
+            continue
+    return inodes
+
+
+def established_remote_ports() -> Dict[str, int]:
+    """Socket inode -> remote port for every established TCP connection."""
+    connections = {}
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    # st 01 = ESTABLISHED
+                    if fields[3] == "01":
+                        connections[fields[9]] = int(fields[2].rsplit(":", 1)[1], 16)
+        except (OSError, StopIteration):
+            continue
+    return connections
+
+
+def port_open(host: str, port: int) -> bool:
+    try:
+        with socket.create_connection((host, port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+class Replica:
+    """One supervised process with restart backoff."""
+
+    def __init__(self, spec: AgentSpec, name: str, index: int, supervisor: "Supervisor"):
+        self.spec = spec
+        self.index = index
+        self.supervisor = supervisor
+        self.name = name
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.ready = asyncio.Event()
+        self.ready_after: Optional[float] = None
+        self.started_at = 0.0
+        self.restarts = 0
+
+    def command(self) -> List[str]:
+        if self.index == 1:
+            return self.spec.command
+        if self.spec.llm:
+            # YAML agents take their id from the file, so replicas get a renamed copy
+            source = self.spec.source.read_text(encoding="utf-8")
+            copy = DATA_DIR / "replicas" / f"{self.name}.yaml"
+            copy.parent.mkdir(parents=True, exist_ok=True)
+            copy.write_text(re.sub(r'^agent_id:.*$', f'agent_id: "{self.name}"', source, count=1, flags=re.MULTILINE),
+                            encoding="utf-8")
+            return self.spec.command[:-1] + [str(copy)]
+        return self.spec.command + ["--agent-id", self.name]
+
+    async def run(self):
+        backoff = BACKOFF_INITIAL
+        while not self.supervisor.stopping:
+            try:
+                await self.start()
+                code = await self.process.wait()
+            except OSError as e:
+                code = f"error ({e})"
+            if self.supervisor.stopping:
+                return
+            self.ready.clear()
+            if time.monotonic() - self.started_at > STABLE_SECONDS:
+                backoff = BACKOFF_INITIAL
+            self.restarts += 1
+            print(f"[supervisor] {self.name} exited with code {code}, restarting in {backoff:.0f}s (restart {self.restarts})")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, BACKOFF_MAX)
+
+    async def start(self):
+        log_path = DATA_DIR / "logs" / f"{self.name}.log"
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.started_at = time.monotonic()
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command(), cwd=str(ROOT), env=self.supervisor.environment(self.spec),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        )
+        asyncio.create_task(self.pump_output(self.process, log_path))
+
+    async def pump_output(self, process, log_path: Path):
+        with open(log_path, "ab") as log:
+            async for line in process.stdout:
+                log.write(line)
+                log.flush()
+                if self.supervisor.verbose:
+                    print(f"[{self.name}] {line.decode('utf-8', 'replace').rstrip()}")
+
+    async def stop(self, timeout: float = 10.0):
+        if self.process is None or self.process.returncode is not None:
+            return
+        self.process.terminate()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+
+
+class Supervisor:
+    """Starts all replicas at once and keeps them running until interrupted."""
+
+    def __init__(self, specs: List[AgentSpec], replicas: Dict[str, int], host: str, network_ports: Set[int],
+                 llm_base_url: str, verbose: bool = False):
+        self.host = host
+        self.network_ports = network_ports
+        self.llm_base_url = llm_base_url
+        self.verbose = verbose
+        self.stopping = False
+        counts = {spec.agent_id: replicas.get(spec.agent_id, replicas.get("*", 1)) for spec in specs}
+        self.replicas = [Replica(spec, name, index, self) for spec in specs
+                         for index, name in enumerate(replica_ids(spec.agent_id, counts[spec.agent_id]), 1)]
+        # Every agent builds the same hash rings from this, so events for a project reach the same replica
+        self.sharding = ",".join(f"{agent_id}={count}" for agent_id, count in counts.items() if count > 1)
+
+    def environment(self, spec: AgentSpec) -> Dict[str, str]:
+        env = dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONUNBUFFERED="1", TRIPMIND_REPLICAS=self.sharding)
+        if spec.llm:
+            api_key = os.getenv("ZHIPUAI_API_KEY") or os.getenv("OPENAI_API_KEY") or "stub"
+            model = os.getenv("DEFAULT_LLM_MODEL_NAME", "glm-4.5")
+            env.update(DEFAULT_LLM_PROVIDER="openai", DEFAULT_LLM_MODEL_NAME=model, DEFAULT_LLM_API_KEY=api_key,
+                       DEFAULT_LLM_BASE_URL=self.llm_base_url, OPENAI_API_KEY=api_key, OPENAI_BASE_URL=self.llm_base_url)
+        return env
+
+    async def wait_for_network(self, timeout: float):
+        deadline = time.monotonic() + timeout
+        while not all(port_open(self.host, port) for port in self.network_ports):
+            if time.monotonic() > deadline:
+                raise SystemExit(f"Network not reachable on {self.host}:{sorted(self.network_ports)} after {timeout:.0f}s")
+            await asyncio.sleep(0.2)
+
+    async def probe_readiness(self, interval: float = 0.2):
+        """Mark replicas ready once their process holds an established connection to a network port."""
+        while not self.stopping:
+            waiting = [replica for replica in self.replicas if not replica.ready.is_set()
+                       and replica.process is not None and replica.process.returncode is None]
+            if waiting:
+                children, connections = await asyncio.to_thread(lambda: (process_children(), established_remote_ports()))
+                for replica in waiting:
+                    inodes = socket_inodes(replica.process.pid, children)
+                    if any(connections.get(inode) in self.network_ports for inode in inodes):
+                        replica.ready_after = time.monotonic() - replica.started_at
+                        replica.ready.set()
+                        if replica.restarts:
+                            print(f"[supervisor] {replica.name} reconnected after restart {replica.restarts}")
+            await asyncio.sleep(interval)
+
+    async def run(self, ready_timeout: float):
+        started = time.monotonic()
+        tasks = [asyncio.create_task(replica.run()) for replica in self.replicas]
+        tasks.append(asyncio.create_task(self.probe_readiness()))
+        print(f"[supervisor] Starting {len(self.replicas)} agents in parallel...")
+        pending = {asyncio.create_task(replica.ready.wait()): replica for replica in self.replicas}
+        done, not_ready = await asyncio.wait(pending, timeout=ready_timeout)
+        for task in done:
+            replica = pending[task]
+            print(f"[supervisor] {replica.name} ready after {replica.ready_after:.1f}s")
+        for task in not_ready:
+            task.cancel()
+            print(f"[supervisor] {pending[task].name} not connected after {ready_timeout:.0f}s, see data/logs/{pending[task].name}.log")
+        print(f"[supervisor] {len(done)}/{len(self.replicas)} agents ready in {time.monotonic() - started:.1f}s. Press Ctrl+C to stop.")
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def stop(self):
+        self.stopping = True
+        await asyncio.gather(*(replica.stop() for replica in self.replicas))
+
+
+def parse_replicas(values: List[str]) -> Dict[str, int]:
+    """route-planning-agent=3 -> {"route-planning-agent": 3}; a bare number applies to every agent."""
+    replicas = {}
+    for value in values:
+        if "=" in value:
+            agent_id, count = value.split("=", 1)
+            replicas[agent_id] = int(count)
+        else:
+            replicas["*"] = int(value)
+    return replicas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start and supervise all TripMind agents")
+    parser.add_argument("--host", default="localhost", help="Network host")
+    parser.add_argument("--ports", default="8600,8700", help="Network ports an agent may connect to")
+    parser.add_argument("--replicas", nargs="*", default=[], help="agent-id=N, or N for every agent")
+    parser.add_argument("--fused-info", action="store_true", help="Run the fused scrape + analyze worker")
+    parser.add_argument("--with-network", action="store_true", help="Also start the network (openagents network start .)")
+    parser.add_argument("--llm-base-url", default=os.getenv("DEFAULT_LLM_BASE_URL", DEFAULT_LLM_BASE_URL),
+                        help="Model endpoint for the LLM agents (e.g. the stub from tools/llm_stub.py)")
+    parser.add_argument("--ready-timeout", type=float, default=60.0, help="Seconds to wait for each agent to connect")
+    parser.add_argument("--only", nargs="*", default=None, help="Start only these agent ids")
+    parser.add_argument("--verbose", action="store_true", help="Echo agent output with a prefix")
+    args = parser.parse_args()
+
+    if not sys.platform.startswith("linux"):
+        print("Readiness probes read /proc and need Linux; use start_agents.bat on Windows.")
+        sys.exit(1)
+    if not (os.getenv("ZHIPUAI_API_KEY") or os.getenv("OPENAI_API_KEY")) and args.llm_base_url == DEFAULT_LLM_BASE_URL:
+        print("Warning: ZHIPUAI_API_KEY is not set, the LLM agents will fail to call the model.")
+
+    specs = discover_agents(args.fused_info)
+    if args.only:
+        specs = [spec for spec in specs if spec.agent_id in args.only]
+    supervisor = Supervisor(specs, parse_replicas(args.replicas), args.host,
+                            {int(port) for port in args.ports.split(",")}, args.llm_base_url, args.verbose)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        main_task = asyncio.current_task()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, main_task.cancel)
+        network = None
+        try:
+            if args.with_network:
+                network = await asyncio.create_subprocess_exec("openagents", "network", "start", ".", cwd=str(ROOT))
+            await supervisor.wait_for_network(timeout=60 if args.with_network else 5)
+            await supervisor.run(args.ready_timeout)
+        except asyncio.CancelledError:
+            print("\n[supervisor] Shutting down...")
+        finally:
+            await supervisor.stop()
+            if network is not None and network.returncode is None:
+                network.terminate()
+                await network.wait()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
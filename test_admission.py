@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind 准入控制测试脚本
+测试 AdmissionController 的租约计数：重新规划不能提前释放仍在进行的规划
+"""
+
+import sys
+import os
+
+# 添加工具路径
+sys.path.append(os.path.join(os.path.dirname(__file__), 'tools'))
+
+from admission import AdmissionController
+
+
+def test_replan_release_keeps_plan_slot():
+    """规划进行中收到重新规划，修复后释放 replan 租约，规划的槽位仍被占用"""
+    controller = AdmissionController(max_active=1, target_seconds=60)
+    assert controller.submit('p1', 'new_plan', {}, now=0)['status'] == 'admitted'
+    assert controller.submit('p1', 'replan', {}, now=10)['status'] == 'admitted'
+    assert controller.submit('p2', 'new_plan', {}, now=11)['status'] == 'queued'
+
+    assert controller.release('p1', 'replan', now=20) == []
+    assert 'p1' in controller.active
+    # 修复耗时不计入规划耗时
+    assert controller._durations == []
+
+    admitted = controller.release('p1', 'plan', now=50)
+    assert [entry['project_id'] for entry in admitted] == ['p2']
+    assert controller._durations == [50]
+
+
+def test_replan_lease_expiry_keeps_plan_lease():
+    """replan 租约过期只回收自己，plan 租约仍按原来的期限保留"""
+    controller = AdmissionController(max_active=1)
+    controller.submit('p1', 'new_plan', {}, now=0)
+    controller.submit('p1', 'replan', {}, now=10)
+    controller.submit('p2', 'new_plan', {}, now=11)
+
+    assert controller.expire(now=200) == []
+    assert list(controller.active['p1']) == ['plan']
+    assert [entry['project_id'] for entry in controller.expire(now=301)] == ['p2']
+
+
+def test_release_without_lease_is_noop():
+    """没有对应类别租约的释放不影响槽位"""
+    controller = AdmissionController(max_active=1)
+    controller.submit('p1', 'new_plan', {}, now=0)
+    controller.submit('p2', 'new_plan', {}, now=1)
+    assert controller.release('p1', 'replan', now=5) == []
+    assert controller.stats['released'] == 0
+    assert 'p1' in controller.active
+
+
+def main():
+    for test in (test_replan_release_keeps_plan_slot, test_replan_lease_expiry_keeps_plan_lease,
+                 test_release_without_lease_is_noop):
+        test()
+        print(f"✅ {test.__name__}")
+
+
+if __name__ == "__main__":
+    main()
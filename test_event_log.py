@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind 分段日志测试脚本
+测试 SegmentedEventLog 的崩溃恢复：半行截断、压缩后无 manifest 恢复、压缩中途崩溃
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# 添加工具路径
+sys.path.append(os.path.join(os.path.dirname(__file__), 'tools'))
+
+from event_log import SegmentedEventLog
+
+SEGMENT_BYTES = 512
+
+
+def make_event(i):
+    return {'event_name': 'thread.channel_message.post', 'event_id': f'e{i}', 'timestamp': 1000 + i,
+            'payload': {'channel': 'general', 'content': {'text': f'message {i}'}}}
+
+
+def make_query(i):
+    return {'event_name': 'thread.channels.list', 'event_id': f'q{i}', 'timestamp': 1000 + i, 'payload': {}}
+
+
+def open_log(directory, **kwargs):
+    return SegmentedEventLog(directory, segment_max_bytes=SEGMENT_BYTES, **kwargs)
+
+
+def filled_log(count=40):
+    """写入 count 条事件（含重复和只读查询事件），已有多个封存段"""
+    directory = tempfile.mkdtemp()
+    log = open_log(directory)
+    for i in range(count):
+        log.append(make_event(i))
+        if i % 10 == 0:
+            log.append(make_event(i))
+            log.append(make_query(i))
+    return directory, log
+
+
+def event_ids(log):
+    return [event['event_id'] for event in log.scan()]
+
+
+def test_torn_tail_truncated():
+    """当前段末尾写了一半的记录在重新打开时被截断，之后的追加从有效位置继续"""
+    directory = tempfile.mkdtemp()
+    log = SegmentedEventLog(directory)
+    for i in range(3):
+        log.append(make_event(i))
+    active = Path(directory) / log.segments[-1]['name']
+    valid_size = active.stat().st_size
+    log.close()
+    with open(active, 'ab') as f:
+        f.write(b'0000abcd\t{"event_name": "torn wri')
+
+    log = SegmentedEventLog(directory)
+    assert active.stat().st_size == valid_size
+    assert log.total_count == 3
+    name, offset = log.append(make_event(3))
+    assert offset == valid_size
+    assert log.read_at(name, offset)['event_id'] == 'e3'
+    assert event_ids(log) == ['e0', 'e1', 'e2', 'e3']
+    log.close()
+
+
+def test_compaction_then_recovery_without_manifest():
+    """压缩后丢失 manifest，按文件名恢复的顺序仍是时间顺序，保留策略删除的是最旧的数据"""
+    directory, log = filled_log()
+    stats = log.compact()
+    assert stats['dropped'] > 0
+    for i in range(40, 45):
+        log.append(make_event(i))
+    expected = event_ids(log)
+    assert expected == [f'e{i}' for i in range(45)]
+    log.close()
+    (Path(directory) / 'manifest.json').unlink()
+
+    log = open_log(directory, retention_max_bytes=SEGMENT_BYTES * 2)
+    assert event_ids(log) == expected
+    log.append(make_event(45))
+    assert log.apply_retention() > 0
+    remaining = event_ids(log)
+    assert remaining[-1] == 'e45'
+    assert remaining == expected[len(expected) - len(remaining) + 1:] + ['e45']
+    log.close()
+
+
+def test_crash_before_manifest_saved():
+    """压缩输出已改名但 manifest 未保存：有 manifest 时删除输出沿用原段，没有 manifest 时输出替代原段，都没有重复"""
+    for keep_manifest in (True, False):
+        directory, log = filled_log()
+        before = event_ids(log)
+
+        def crash():
+            raise OSError('simulated crash')
+
+        log._save_manifest = crash
+        try:
+            log.compact()
+        except OSError:
+            pass
+        log._active.close()
+        assert list(Path(directory).glob('*.g1.*.log'))
+        if not keep_manifest:
+            (Path(directory) / 'manifest.json').unlink()
+
+        log = open_log(directory)
+        if keep_manifest:
+            assert not list(Path(directory).glob('*.g1.*.log'))
+            assert event_ids(log) == before
+        else:
+            assert event_ids(log) == [f'e{i}' for i in range(40)]
+        log.close()
+
+
+def test_incomplete_compaction_discarded():
+    """只改名了部分压缩输出就崩溃：缺少部分的一代被丢弃，原段保留"""
+    directory, log = filled_log()
+    before = event_ids(log)
+    log.close()
+    first_sealed = log.segments[0]['name'][:8]
+    partial = Path(directory) / f'{first_sealed}-{int(first_sealed) + 1:08d}.g1.0of2.log'
+    partial.write_bytes((Path(directory) / log.segments[0]['name']).read_bytes())
+    (Path(directory) / 'manifest.json').unlink()
+
+    log = open_log(directory)
+    assert not partial.exists()
+    assert event_ids(log) == before
+    log.close()
+
+
+def test_trimmed_compaction_kept():
+    """保留策略删掉一代压缩输出的前几部分后丢失 manifest，剩余部分仍然有效"""
+    directory, log = filled_log(80)
+    log.compact()
+    compacted = [segment['name'] for segment in log.segments if '.g' in segment['name']]
+    assert len(compacted) > 2
+    log.retention_max_bytes = log.total_bytes - log.segments[0]['bytes']
+    assert log.apply_retention() == 1
+    expected = event_ids(log)
+    log.close()
+    (Path(directory) / 'manifest.json').unlink()
+
+    log = open_log(directory)
+    assert event_ids(log) == expected
+    log.close()
+
+
+def main():
+    for test in (test_torn_tail_truncated, test_compaction_then_recovery_without_manifest,
+                 test_crash_before_manifest_saved, test_incomplete_compaction_discarded,
+                 test_trimmed_compaction_kept):
+        test()
+        print(f"✅ {test.__name__}")
+
+
+if __name__ == "__main__":
+    main()
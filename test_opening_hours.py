@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind 开放时间解析测试脚本
+测试 parse_opening_hours 的闭馆写法、英文星期名和结构化输入
+"""
+
+import json
+import sys
+import os
+
+# 添加工具路径
+sys.path.append(os.path.join(os.path.dirname(__file__), 'tools'))
+
+from opening_hours import parse_opening_hours, OpeningHoursIndex
+from route_optimizer import optimize_route
+
+NINE_TO_FIVE = ((540, 1020),)
+
+
+def test_closed_day_in_same_segment():
+    """闭馆说明和时间段写在同一段里，两种顺序都是周一闭馆、其余各天 9-17"""
+    for text in ('9:00-17:00 周一闭馆', '每周一闭馆 9:00-17:00', '9:00-17:00 (周一闭馆)'):
+        schedule = parse_opening_hours(text)
+        assert schedule.known, text
+        assert schedule.day_intervals(0) == (), text
+        assert all(schedule.day_intervals(day) == NINE_TO_FIVE for day in range(1, 7)), text
+
+
+def test_english_day_names():
+    assert parse_opening_hours('Open every month 9:00-17:00').open_days == 7
+    assert parse_opening_hours('Mon-Fri 9:00-17:00').open_days == 5
+    assert parse_opening_hours('Tues 9:00-12:00').open_days == 1
+
+
+def test_structured_opening_hours_are_unknown():
+    """dict / list 不解析，视为未知（全天开放），索引和路线优化都不报错"""
+    for value in ({'mon': '9-17'}, ['9:00-17:00'], None):
+        schedule = parse_opening_hours(value)
+        assert not schedule.known
+    index = OpeningHoursIndex([{'name': 'A', 'opening_hours': {'mon': '9-17'}}])
+    assert len(index) == 1
+    result = json.loads(optimize_route([{'name': 'A', 'lat': 30.66, 'lng': 104.06,
+                                         'opening_hours': {'mon': '9-17'}}], 1))
+    assert result['success'], result
+
+
+def main():
+    for test in (test_closed_day_in_same_segment, test_english_day_names, test_structured_opening_hours_are_unknown):
+        test()
+        print(f"✅ {test.__name__}")
+
+
+if __name__ == "__main__":
+    main()
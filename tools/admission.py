@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Admission Control
+准入控制 - 活跃项目数达到上限时排队，按优先级放行；队列满时拒绝并告知重试时间
+
+优先级: 行程中的重新规划 (replan) > 已有项目的追加消息 (follow_up) > 新规划 (new_plan)
+容量: 上限为 max_active（network.yaml 的 max_concurrent_projects），实际并发按规划耗时自适应调整 (AIMD)，
+规划耗时超过 target_seconds 视为模型服务饱和，并发上限乘性下降，否则加性恢复。
+租约: 同一项目只占一个槽位，但每个放行的请求各持一份租约，按类别 (plan / replan) 分别释放；
+项目的最后一份租约释放或过期后槽位才空出，行程中的重新规划不会提前释放仍在进行的规划。
+"""
+
+import heapq
+import itertools
+import time
+import logging
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {'replan': 0, 'follow_up': 1, 'new_plan': 2}
+# 请求类别 -> 租约类别；plan 由 orchestrator 在汇合后释放，replan 由 dynamic adjuster 在修复后释放
+LEASE_KINDS = {'replan': 'replan', 'follow_up': 'plan', 'new_plan': 'plan'}
+
+
+class AdmissionController:
+    """有界优先队列 + 带租约的并发槽位"""
+
+    def __init__(self, max_active: int = 10, queue_size: int = 50, target_seconds: float = 120.0,
+                 lease_seconds: Optional[Dict[str, float]] = None):
+        self.max_active = max_active
+        self.queue_size = queue_size
+        self.target_seconds = target_seconds
+        self.lease_seconds = {'replan': 120.0, 'follow_up': 300.0, 'new_plan': 300.0, **(lease_seconds or {})}
+        self.limit = float(max_active)
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        # project_id -> 租约类别 -> 按放行顺序排列的租约 [{'class', 'admitted_at', 'expires_at'}]
+        self.active: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self._durations: List[float] = []
+        self.stats = {'admitted': 0, 'queued': 0, 'rejected': 0, 'expired': 0, 'released': 0}
+
+    # ---- 提交与放行 ----
+
+    def submit(self, project_id: str, priority_class: str, item: Any, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        提交一个请求
+
+        Args:
+            project_id: 项目 ID，同一项目同时只占一个槽位
+            priority_class: replan / follow_up / new_plan
+            item: 放行时原样返回的内容（通常是要转发的事件）
+
+        Returns:
+            {'status': 'admitted' | 'queued' | 'rejected', 'position', 'queue_depth', 'retry_after_s'}
+            队列已满时高优先级请求会挤掉最低优先级的请求，被挤掉的请求放在 'displaced' 中
+        """
+        now = time.monotonic() if now is None else now
+        priority = PRIORITIES.get(priority_class, PRIORITIES['new_plan'])
+        displaced = None
+        if project_id in self.active or (not self._queue and self.available() > 0):
+            # 已占槽位的项目不重复占用槽位，但新请求有自己的租约
+            self._admit(project_id, priority_class, now)
+            return {'status': 'admitted', 'position': 0, 'queue_depth': len(self._queue), 'retry_after_s': 0}
+        if len(self._queue) >= self.queue_size:
+            worst = max(self._queue)
+            if worst[0] <= priority:
+                self.stats['rejected'] += 1
+                return {'status': 'rejected', 'position': None, 'queue_depth': len(self._queue),
+                        'retry_after_s': self.estimate_wait(len(self._queue) + 1)}
+            # 高优先级请求挤掉队尾最低优先级的请求
+            self._queue.remove(worst)
+            heapq.heapify(self._queue)
+            self.stats['rejected'] += 1
+            displaced = {'project_id': worst[2], 'class': worst[3], 'item': worst[4]}
+            logger.info(f"Queue full, dropped {worst[2]} ({worst[3]}) for a {priority_class} request")
+        heapq.heappush(self._queue, (priority, next(self._seq), project_id, priority_class, item, now))
+        self.stats['queued'] += 1
+        position = self.position(project_id)
+        return {'status': 'queued', 'position': position, 'queue_depth': len(self._queue),
+                'retry_after_s': self.estimate_wait(position), 'displaced': displaced}
+
+    def release(self, project_id: str, lease_kind: str = 'plan', now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        释放项目最早的一份 lease_kind 租约（plan / replan），规划耗时用于调整并发上限；
+        项目没有其他租约时空出槽位。返回因此放行的请求
+        """
+        now = time.monotonic() if now is None else now
+        leases = self.active.get(project_id, {}).get(lease_kind)
+        if leases:
+            lease = leases.pop(0)
+            self.stats['released'] += 1
+            if lease_kind == 'plan':
+                self._observe(now - lease['admitted_at'])
+            self._prune(project_id)
+        return self.drain(now)
+
+    def expire(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """回收超时未释放的租约（例如结果事件丢失），返回因此放行的请求"""
+        now = time.monotonic() if now is None else now
+        for project_id, kinds in list(self.active.items()):
+            for lease_kind, leases in kinds.items():
+                for lease in [lease for lease in leases if lease['expires_at'] <= now]:
+                    logger.warning(f"Admission {lease['class']} lease for {project_id} expired")
+                    leases.remove(lease)
+                    self.stats['expired'] += 1
+                    # 租约过期说明下游没有按时完成，按超目标处理
+                    self._observe(self.target_seconds * 2)
+            self._prune(project_id)
+        return self.drain(now)
+
+    def drain(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """按优先级放行队首请求直到没有空闲槽位"""
+        now = time.monotonic() if now is None else now
+        admitted = []
+        while self._queue and (self.available() > 0 or self._queue[0][2] in self.active):
+            _, _, project_id, priority_class, item, queued_at = heapq.heappop(self._queue)
+            self._admit(project_id, priority_class, now)
+            admitted.append({'project_id': project_id, 'class': priority_class, 'item': item,
+                             'waited_s': round(now - queued_at, 2)})
+        return admitted
+
+    # ---- 状态 ----
+
+    def available(self) -> int:
+        return max(int(self.limit) - len(self.active), 0)
+
+    def position(self, project_id: str) -> Optional[int]:
+        for index, entry in enumerate(sorted(self._queue), 1):
+            if entry[2] == project_id:
+                return index
+        return None
+
+    def positions(self) -> Dict[str, int]:
+        """排队中的项目 -> 位置（同一项目多条请求取最靠前的位置）"""
+        positions = {}
+        for index, entry in enumerate(sorted(self._queue), 1):
+            positions.setdefault(entry[2], index)
+        return positions
+
+    def estimate_wait(self, position: int) -> float:
+        """按最近的规划耗时和当前并发估计等待秒数"""
+        recent = self._durations[-20:]
+        average = sum(recent) / len(recent) if recent else self.target_seconds / 2
+        return round(average * position / max(int(self.limit), 1), 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'active': len(self.active), 'limit': int(self.limit), 'max_active': self.max_active,
+                'queue_depth': len(self._queue), **self.stats}
+
+    # ---- 内部 ----
+
+    def _admit(self, project_id: str, priority_class: str, now: float):
+        if project_id not in self.active:
+            self.stats['admitted'] += 1
+        kinds = self.active.setdefault(project_id, {})
+        kinds.setdefault(LEASE_KINDS.get(priority_class, 'plan'), []).append(
+            {'class': priority_class, 'admitted_at': now,
+             'expires_at': now + self.lease_seconds.get(priority_class, 300.0)})
+
+    def _prune(self, project_id: str):
+        """去掉空的租约类别；项目没有任何租约时空出槽位"""
+        kinds = self.active.get(project_id)
+        if kinds is None:
+            return
+        for lease_kind in [kind for kind, leases in kinds.items() if not leases]:
+            del kinds[lease_kind]
+        if not kinds:
+            del self.active[project_id]
+
+    def _observe(self, duration: float):
+        """AIMD: 超过目标耗时则上限 x0.7，否则每次 +1/limit"""
+        self._durations.append(duration)
+        del self._durations[:-100]
+        if duration > self.target_seconds:
+            self.limit = max(self.limit * 0.7, 1.0)
+        else:
+            self.limit = min(self.limit + 1 / self.limit, float(self.max_active))
+
+if __name__ == "__main__":
+    controller = AdmissionController(max_active=2, queue_size=3, target_seconds=60)
+    for i in range(4):
+        print(f'p{i}', controller.submit(f'p{i}', 'new_plan', {'n': i}, now=0))
+    print('replan', controller.submit('p9', 'replan', {'n': 9}, now=1))
+    print('overflow', controller.submit('p5', 'new_plan', {'n': 5}, now=1))
+    print(controller.positions())
+    print('release p0 ->', [a['project_id'] for a in controller.release('p0', now=30)])
+    print('replan p1', controller.submit('p1', 'replan', {'n': 1}, now=40)['status'])
+    print('release p1 replan ->', [a['project_id'] for a in controller.release('p1', 'replan', now=50)])
+    print('release p1 (slow) ->', [a['project_id'] for a in controller.release('p1', now=200)], controller.snapshot())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Blob Store
+内容寻址存储 - 大型事件负载（raw_data、processed_data 等）按 SHA-256 存为本地文件，事件中只携带引用
+
+引用格式: {"$blob": "sha256:<hex>", "size": <字节数>, "type": "list", "count": <元素数>}
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+BLOB_KEY = '$blob'
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent / 'data' / 'blobs'
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, dict) and isinstance(value.get(BLOB_KEY), str)
+
+
+class BlobStore:
+    """按内容哈希去重的文件存储，读取结果保存在有上限的 LRU 缓存中"""
+
+    def __init__(self, root: Optional[str] = None, threshold_bytes: int = 2048, cache_bytes: int = 32 * 1024 * 1024):
+        self.root = Path(root or os.getenv('TRIPMIND_BLOB_DIR') or DEFAULT_ROOT)
+        self.threshold_bytes = threshold_bytes
+        self.cache_bytes = cache_bytes
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'puts': 0, 'dedup': 0, 'gets': 0, 'cache_hits': 0}
+
+    def put(self, value: Any) -> Dict[str, Any]:
+        """保存任意可 JSON 序列化的值并返回引用；相同内容只写一次"""
+        return self._store(self._encode(value), value)
+
+    def _store(self, data: bytes, value: Any) -> Dict[str, Any]:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            self.stats['dedup'] += 1
+            # 刷新修改时间，新引用指向的 blob 不会被 prune 当作过期文件删除
+            os.utime(path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再原子替换，读者不会看到写了一半的 blob
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+        self.stats['puts'] += 1
+        ref = {BLOB_KEY: f'sha256:{digest}', 'size': len(data), 'type': type(value).__name__}
+        if isinstance(value, (list, dict)):
+            ref['count'] = len(value)
+        return ref
+
+    def get(self, ref: Dict[str, Any]) -> Any:
+        """按引用读取值，内容哈希不一致时抛出 ValueError"""
+        digest = ref[BLOB_KEY].split(':', 1)[-1]
+        self.stats['gets'] += 1
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                self.stats['cache_hits'] += 1
+                return json.loads(self._cache[digest])
+        data = self._path(digest).read_bytes()
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Blob {digest[:12]} is corrupted")
+        with self._lock:
+            self._cache[digest] = data
+            self._cached_bytes += len(data)
+            while self._cached_bytes > self.cache_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+        return json.loads(data)
+
+    def offload(self, value: Any, threshold_bytes: Optional[int] = None) -> Any:
+        """序列化后超过阈值的值替换为引用，较小的值原样返回"""
+        if value is None or is_blob_ref(value):
+            return value
+        threshold = self.threshold_bytes if threshold_bytes is None else threshold_bytes
+        data = self._encode(value)
+        return self._store(data, value) if len(data) >= threshold else value
+
+    def resolve(self, value: Any) -> Any:
+        """将引用（包括嵌套在 dict / list 中的引用）替换为实际内容，只在调用时读取"""
+        if is_blob_ref(value):
+            return self.resolve(self.get(value))
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        return value
+
+    def prune(self, max_age_days: float = 7.0) -> int:
+        """删除超过保留期（按最后一次写入或去重命中计算）的 blob 文件，返回删除数量；由 admission worker 定期调用"""
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        for path in self.root.glob('*/*'):
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        return removed
+
+    def _encode(self, value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+# 全局 blob 存储实例
+blob_store = BlobStore()
+
+if __name__ == "__main__":
+    store = BlobStore(root=tempfile.mkdtemp())
+    test_data = [{'name': f'景点{i}', 'description': '展示丰富历史文化的综合性博物馆' * 3, 'rating': 4.5} for i in range(200)]
+    payload = {'project_id': 'p1', 'raw_data': store.offload(test_data), 'metadata': store.offload({'total_items': 200})}
+    print(json.dumps(payload, ensure_ascii=False), f"({len(json.dumps(payload))} bytes)")
+    assert store.resolve(payload)['raw_data'] == test_data
+    store.offload(test_data)
+    print(store.stats)
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Budget Engine Tool
+预算引擎 - 根据抓取的价格和行程计算费用明细，并为每位成员求解可负担的活动组合
+"""
+
+import json
+import math
+import time
+import logging
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+from collections import defaultdict
+import re
+
+import numpy as np
+
+try:
+    from openagents import tool
+except ImportError:
+    def tool(func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 餐厅价格档位 -> 人均估算
+PRICE_RANGE_AMOUNTS = {'¥': 50, '¥¥': 100, '¥¥¥': 200, '¥¥¥¥': 400}
+
+
+class BudgetEngine:
+    """预算计算与活动选择引擎"""
+
+    def __init__(self):
+        self.defaults = {
+            'daily_food_per_person': 150,
+            'daily_local_transport_per_person': 40,
+            'transport_per_person': 0,
+            'room_occupancy': 2,
+            'accommodation_share': 0.4,
+            'emergency_rate': 0.05,
+            'tight_margin': 0.1
+        }
+        # 背包求解的容量网格上限，保证求解时间与预算大小无关
+        self.max_capacity_steps = 500
+
+    def calculate_budget(self, itinerary: Any, members: Optional[List[Dict[str, Any]]] = None,
+                         hotels: Optional[List[Dict[str, Any]]] = None,
+                         options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        计算预算明细
+
+        Args:
+            itinerary: 结构化行程（{'days': [{'day': 1, 'items': [...]}]}、天列表或带 day 字段的活动列表）
+            members: 成员列表，包含 name、budget、preferences
+            hotels: 抓取到的酒店列表，price.amount 为每晚价格
+            options: 覆盖默认参数（days、nights、travelers、daily_food_per_person 等）
+
+        Returns:
+            预算结果字典
+        """
+        try:
+            start_time = time.perf_counter()
+            settings = dict(self.defaults)
+            settings.update(options or {})
+
+            days = self._normalize_itinerary(itinerary)
+            if not days:
+                return self._create_error_result("Itinerary must contain structured days or activities")
+
+            members = members or []
+            day_count = int(settings.get('days') or len(days))
+            nights = int(settings.get('nights', max(day_count - 1, 0)))
+            travelers = int(settings.get('travelers') or len(members) or 1)
+
+            hotel = self._select_hotel(hotels or [], members, travelers, nights, settings)
+            rooms = math.ceil(travelers / settings['room_occupancy'])
+            nightly_group = hotel['price'] * rooms if hotel else 0.0
+
+            per_day = []
+            breakdown = defaultdict(float)
+            activities = []
+            for index, day in enumerate(days):
+                day_number = day.get('day', index + 1)
+                activity_cost = 0.0
+                restaurant_cost = 0.0
+                for item in day['items']:
+                    cost = self._item_cost(item)
+                    if self._is_restaurant(item):
+                        restaurant_cost += cost
+                        continue
+                    activity_cost += cost
+                    activities.append({'name': item.get('name', ''), 'day': day_number, 'cost': cost, 'item': item})
+
+                food = max(settings['daily_food_per_person'], restaurant_cost)
+                local_transport = settings['daily_local_transport_per_person']
+                lodging = nightly_group / travelers if index < nights else 0.0
+                per_person = activity_cost + food + local_transport + lodging
+
+                breakdown['attractions'] += activity_cost * travelers
+                breakdown['food'] += food * travelers
+                breakdown['local_transportation'] += local_transport * travelers
+                per_day.append({
+                    'day': day_number,
+                    'per_person': round(per_person, 2),
+                    'total': round(per_person * travelers, 2),
+                    'activities': [item.get('name', '') for item in day['items']]
+                })
+
+            breakdown['accommodation'] = nightly_group * nights
+            breakdown['transportation'] = settings['transport_per_person'] * travelers
+            subtotal = sum(breakdown.values())
+            breakdown['emergency_fund'] = subtotal * settings['emergency_rate']
+
+            group_total = sum(breakdown.values())
+            totals = {
+                'group_total': round(group_total, 2),
+                'per_person': round(group_total / travelers, 2),
+                'per_day_average': round(group_total / day_count, 2) if day_count else 0.0
+            }
+
+            fixed_per_person = (group_total - breakdown['attractions']) / travelers
+            member_plans = [self._plan_member(member, activities, fixed_per_person, settings)
+                            for member in members]
+
+            return {
+                'success': True,
+                'currency': settings.get('currency', 'CNY'),
+                'travelers': travelers,
+                'days': day_count,
+                'nights': nights,
+                'hotel': hotel,
+                'breakdown': {
+                    category: {'total': round(amount, 2), 'per_person': round(amount / travelers, 2)}
+                    for category, amount in breakdown.items()
+                },
+                'totals': totals,
+                'per_day': per_day,
+                'member_plans': member_plans,
+                'alerts': self._generate_alerts(member_plans, totals, settings),
+                'solve_time_ms': round((time.perf_counter() - start_time) * 1000, 2),
+                'calculated_at': datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"Budget calculation error: {str(e)}")
+            return self._create_error_result(f"Budget calculation failed: {str(e)}")
+
+    def _normalize_itinerary(self, itinerary: Any) -> List[Dict[str, Any]]:
+        """将多种行程格式统一为 [{'day': n, 'items': [...]}]"""
+        if isinstance(itinerary, str):
+            try:
+                itinerary = json.loads(itinerary)
+            except ValueError:
+                return []
+        if isinstance(itinerary, dict):
+            itinerary = itinerary.get('days') or itinerary.get('itinerary') or []
+        if not isinstance(itinerary, list) or not itinerary:
+            return []
+
+        if all(isinstance(day, dict) and ('items' in day or 'activities' in day) for day in itinerary):
+            return [{'day': day.get('day', i + 1), 'items': day.get('items') or day.get('activities') or []}
+                    for i, day in enumerate(itinerary)]
+
+        grouped = defaultdict(list)
+        for item in itinerary:
+            if isinstance(item, dict):
+                grouped[item.get('day', 1)].append(item)
+        return [{'day': day, 'items': grouped[day]} for day in sorted(grouped)]
+
+    def _item_cost(self, item: Dict[str, Any]) -> float:
+        price = item.get('price')
+        if isinstance(price, dict):
+            return float(price.get('amount') or 0)
+        if isinstance(price, (int, float)):
+            return float(price)
+        if isinstance(price, str):
+            match = re.search(r'(\d+(?:\.\d+)?)', price)
+            return float(match.group(1)) if match else 0.0
+        if 'cost_per_person' in item:
+            return float(item['cost_per_person'] or 0)
+        if item.get('price_range') in PRICE_RANGE_AMOUNTS:
+            return float(PRICE_RANGE_AMOUNTS[item['price_range']])
+        return 0.0
+
+    def _is_restaurant(self, item: Dict[str, Any]) -> bool:
+        item_type = str(item.get('type', '')).lower()
+        return 'cuisine' in item or 'restaurant' in item_type or '餐' in item_type
+
+    def _select_hotel(self, hotels: List[Dict[str, Any]], members: List[Dict[str, Any]], travelers: int,
+                      nights: int, settings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """选择评分最高且住宿人均不超过最低预算一定比例的酒店，否则选最便宜的"""
+        candidates = [{'name': h.get('name', ''), 'price': self._item_cost(h), 'rating': h.get('rating', 0)}
+                      for h in hotels if self._item_cost(h) > 0]
+        if not candidates:
+            return None
+        rooms = math.ceil(travelers / settings['room_occupancy'])
+        budgets = [self._parse_amount(m.get('budget')) for m in members]
+        budgets = [b for b in budgets if b]
+        if budgets:
+            limit = min(budgets) * settings['accommodation_share']
+            affordable = [h for h in candidates if h['price'] * rooms * nights / travelers <= limit]
+            if affordable:
+                return max(affordable, key=lambda h: (h['rating'], -h['price']))
+        return min(candidates, key=lambda h: h['price'])
+
+    def _plan_member(self, member: Dict[str, Any], activities: List[Dict[str, Any]], fixed_per_person: float,
+                     settings: Dict[str, Any]) -> Dict[str, Any]:
+        name = member.get('name') or member.get('member_id', '')
+        budget = self._parse_amount(member.get('budget'))
+        all_cost = sum(a['cost'] for a in activities)
+        if budget is None:
+            selected = list(range(len(activities)))
+        else:
+            values = [self._activity_value(a['item'], member.get('preferences', [])) for a in activities]
+            selected = self._solve_knapsack([a['cost'] for a in activities], values, budget - fixed_per_person)
+
+        chosen = set(selected)
+        activity_cost = sum(activities[i]['cost'] for i in chosen)
+        total = fixed_per_person + activity_cost
+        plan = {
+            'name': name,
+            'budget': budget,
+            'fixed_cost': round(fixed_per_person, 2),
+            'activity_cost': round(activity_cost, 2),
+            'total_cost': round(total, 2),
+            'selected_activities': [activities[i]['name'] for i in sorted(chosen)],
+            'skipped_activities': [a['name'] for i, a in enumerate(activities) if i not in chosen],
+            'full_plan_cost': round(fixed_per_person + all_cost, 2)
+        }
+        if budget is None:
+            plan['status'] = 'unknown'
+        elif fixed_per_person > budget:
+            plan['status'] = 'over_budget'
+        elif len(chosen) < len(activities):
+            plan['status'] = 'partial'
+        else:
+            plan['status'] = 'tight' if budget - total < budget * settings['tight_margin'] else 'ok'
+        plan['remaining'] = round(budget - total, 2) if budget is not None else None
+        return plan
+
+    def _activity_value(self, item: Dict[str, Any], preferences: List[str]) -> float:
+        rating = item.get('rating', 0)
+        value = (rating / 5.0) if isinstance(rating, (int, float)) and rating > 0 else 0.6
+        text = ' '.join([str(item.get('name', '')), str(item.get('type', ''))] +
+                        [str(t) for t in item.get('tags', [])]).lower()
+        if any(str(p).lower() in text for p in preferences or []):
+            value += 0.5
+        return value
+
+    def _solve_knapsack(self, costs: List[float], values: List[float], capacity: float) -> List[int]:
+        """0/1 背包：在容量内选择价值最大的活动组合，返回被选中的下标"""
+        if capacity < 0:
+            return [i for i, cost in enumerate(costs) if cost <= 0]
+        if sum(costs) <= capacity:
+            return list(range(len(costs)))
+
+        # 费用按网格向上取整，保证选中组合一定不超预算
+        unit = max(1.0, capacity / self.max_capacity_steps)
+        weights = [math.ceil(cost / unit) for cost in costs]
+        slots = int(capacity // unit)
+
+        best = np.zeros(slots + 1)
+        take = np.zeros((len(costs), slots + 1), dtype=bool)
+        for i, (weight, value) in enumerate(zip(weights, values)):
+            if weight > slots:
+                continue
+            candidate = np.full(slots + 1, -1.0)
+            candidate[weight:] = best[:slots + 1 - weight] + value
+            improved = candidate > best
+            take[i] = improved
+            best = np.where(improved, candidate, best)
+
+        selected = []
+        slot = slots
+        for i in range(len(costs) - 1, -1, -1):
+            if take[i, slot]:
+                selected.append(i)
+                slot -= weights[i]
+        return sorted(selected)
+
+    def _parse_amount(self, value: Any) -> Optional[float]:
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, dict):
+            return self._parse_amount(value.get('amount'))
+        if isinstance(value, str):
+            match = re.search(r'(\d+(?:\.\d+)?)', value.replace(',', ''))
+            if match:
+                return float(match.group(1))
+        return None
+
+    def _generate_alerts(self, member_plans: List[Dict[str, Any]], totals: Dict[str, float],
+                         settings: Dict[str, Any]) -> List[str]:
+        alerts = []
+        for plan in member_plans:
+            if plan['status'] == 'over_budget':
+                alerts.append(f"[WARNING] {plan['name']}: fixed costs exceed budget by {plan['fixed_cost'] - plan['budget']:.0f}")
+            elif plan['status'] == 'partial':
+                alerts.append(f"[TIP] {plan['name']}: skip {', '.join(plan['skipped_activities'][:3])} to stay within budget")
+            elif plan['status'] == 'tight':
+                alerts.append(f"[TIP] {plan['name']}: only {plan['remaining']:.0f} left for flexibility")
+        if not alerts and member_plans:
+            alerts.append(f"[OK] All members within budget (per person {totals['per_person']:.0f})")
+        return alerts
+
+    def _create_error_result(self, error_message: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': error_message,
+            'breakdown': {},
+            'totals': {'group_total': 0.0, 'per_person': 0.0, 'per_day_average': 0.0},
+            'per_day': [],
+            'member_plans': [],
+            'alerts': [],
+            'calculated_at': datetime.now().isoformat()
+        }
+
+budget_engine = BudgetEngine()
+
+@tool(name="calculate_budget", description="Compute budget breakdown, per-person/per-day totals and affordable activities per member")
+def calculate_budget(itinerary: Any, members: Optional[List[Dict[str, Any]]] = None,
+                     hotels: Optional[List[Dict[str, Any]]] = None,
+                     options: Optional[Dict[str, Any]] = None) -> str:
+    result = budget_engine.calculate_budget(itinerary, members, hotels, options)
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    test_itinerary = {'days': [
+        {'day': day, 'items': [
+            {'name': f'景点{day}-{slot}', 'type': '景点', 'rating': 4.0 + slot / 10,
+             'price': {'amount': 40 * slot + 20 * day, 'currency': 'CNY'}, 'tags': ['文化']}
+            for slot in range(1, 5)
+        ]} for day in range(1, 8)
+    ]}
+    test_members = [{'name': f'成员{i}', 'budget': 2800 + 300 * i, 'preferences': ['文化']} for i in range(6)]
+    test_hotels = [{'name': '豪华酒店', 'rating': 4.8, 'price': {'amount': 800}},
+                   {'name': '商务酒店', 'rating': 4.2, 'price': {'amount': 400}}]
+    print(calculate_budget(test_itinerary, test_members, test_hotels))
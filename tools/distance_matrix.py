@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Distance Matrix Service
+距离矩阵服务 - 使用 NumPy 向量化计算 POI 两两距离和行程时间，按目的地和 POI 集合缓存
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_matrix(lat_a: np.ndarray, lng_a: np.ndarray, lat_b: np.ndarray, lng_b: np.ndarray) -> np.ndarray:
+    """计算 A 组与 B 组坐标之间的球面距离矩阵（公里），坐标缺失处为 NaN"""
+    lat_a, lng_a = np.radians(lat_a)[:, None], np.radians(lng_a)[:, None]
+    lat_b, lng_b = np.radians(lat_b)[None, :], np.radians(lng_b)[None, :]
+    h = np.sin((lat_b - lat_a) / 2) ** 2 + np.cos(lat_a) * np.cos(lat_b) * np.sin((lng_b - lng_a) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+class DistanceMatrix:
+    """某个目的地下一组 POI 的距离矩阵"""
+
+    def __init__(self, keys: List[str], coordinates: np.ndarray, distances_km: np.ndarray):
+        self.keys = keys
+        self.coordinates = coordinates
+        self.distances_km = distances_km
+        self.index = {key: i for i, key in enumerate(keys)}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def travel_minutes(self, speed_kmh: float = 25.0, fallback_minutes: float = 30.0,
+                       walk_kmh: Optional[float] = None, walk_max_km: float = 0.0,
+                       overhead_minutes: float = 0.0, detour_factor: float = 1.0) -> np.ndarray:
+        """
+        按速度模型换算行程时间（分钟）
+
+        Args:
+            speed_kmh: 交通工具平均速度
+            fallback_minutes: 缺少坐标时使用的默认行程时间
+            walk_kmh: 步行速度，设置后 walk_max_km 以内的距离按步行计算
+            walk_max_km: 步行距离上限
+            overhead_minutes: 乘车的固定等候/换乘时间
+            detour_factor: 实际路程相对直线距离的系数
+
+        Returns:
+            行程时间矩阵
+        """
+        distances = self.distances_km * detour_factor
+        minutes = distances / speed_kmh * 60.0 + overhead_minutes
+        if walk_kmh:
+            minutes = np.where(distances <= walk_max_km, distances / walk_kmh * 60.0, minutes)
+        minutes = np.where(np.isnan(minutes), fallback_minutes, minutes)
+        np.fill_diagonal(minutes, 0.0)
+        return minutes
+
+
+class DistanceMatrixService:
+    """距离矩阵缓存服务（LRU 淘汰，新增 POI 时增量计算）"""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'incremental': 0, 'full': 0, 'evictions': 0}
+
+    def get_matrix(self, destination: str, pois: List[Dict[str, Any]]) -> DistanceMatrix:
+        """
+        获取 POI 列表对应的距离矩阵，矩阵行列顺序与 pois 一致
+
+        Args:
+            destination: 目的地名称，用于隔离缓存
+            pois: POI 列表，坐标取自 location.lat/lng
+
+        Returns:
+            DistanceMatrix 对象
+        """
+        keys = [self.poi_key(poi) for poi in pois]
+        cache_key = (destination or '', self._hash_keys(keys))
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                self.stats['hits'] += 1
+                return cached
+            base = self._find_base(destination or '', keys)
+
+        coordinates = np.array([self._coordinates(poi) for poi in pois], dtype=float).reshape(-1, 2)
+        if base is not None:
+            matrix = self._extend(base, keys, coordinates)
+        else:
+            distances = haversine_matrix(coordinates[:, 0], coordinates[:, 1], coordinates[:, 0], coordinates[:, 1])
+            matrix = DistanceMatrix(keys, coordinates, distances)
+
+        with self._lock:
+            self.stats['incremental' if base is not None else 'full'] += 1
+            self._cache[cache_key] = matrix
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+                self.stats['evictions'] += 1
+        return matrix
+
+    def clear(self, destination: Optional[str] = None):
+        """清空缓存，指定目的地时只清除该目的地"""
+        with self._lock:
+            if destination is None:
+                self._cache.clear()
+                return
+            for key in [key for key in self._cache if key[0] == destination]:
+                del self._cache[key]
+
+    def poi_key(self, poi: Dict[str, Any]) -> str:
+        lat, lng = self._coordinates(poi)
+        return f"{poi.get('name', '')}|{lat:.6f},{lng:.6f}"
+
+    def _coordinates(self, poi: Dict[str, Any]) -> Tuple[float, float]:
+        location = poi.get('location')
+        if isinstance(location, dict) and location.get('lat') is not None and location.get('lng') is not None:
+            return float(location['lat']), float(location['lng'])
+        return float('nan'), float('nan')
+
+    def _hash_keys(self, keys: List[str]) -> str:
+        return hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()
+
+    def _find_base(self, destination: str, keys: List[str]) -> Optional[DistanceMatrix]:
+        """在同一目的地的缓存中找与新 POI 集合重叠最多的矩阵"""
+        wanted = set(keys)
+        best, best_overlap = None, 0
+        for (cached_destination, _), matrix in reversed(self._cache.items()):
+            if cached_destination != destination:
+                continue
+            overlap = len(wanted.intersection(matrix.index))
+            if overlap > best_overlap:
+                best, best_overlap = matrix, overlap
+        return best
+
+    def _extend(self, base: DistanceMatrix, keys: List[str], coordinates: np.ndarray) -> DistanceMatrix:
+        """复用已有矩阵中的距离，只计算涉及新 POI 的行列"""
+        size = len(keys)
+        distances = np.empty((size, size))
+        known = np.array([i for i, key in enumerate(keys) if key in base.index], dtype=int)
+        fresh = np.array([i for i, key in enumerate(keys) if key not in base.index], dtype=int)
+
+        if known.size:
+            source = np.array([base.index[keys[i]] for i in known], dtype=int)
+            distances[np.ix_(known, known)] = base.distances_km[np.ix_(source, source)]
+        if fresh.size:
+            block = haversine_matrix(coordinates[fresh, 0], coordinates[fresh, 1], coordinates[:, 0], coordinates[:, 1])
+            distances[fresh, :] = block
+            distances[:, fresh] = block.T
+        logger.debug(f"Extended distance matrix: {known.size} reused, {fresh.size} new")
+        return DistanceMatrix(keys, coordinates, distances)
+
+# 全局距离矩阵服务实例
+distance_service = DistanceMatrixService()
+
+if __name__ == "__main__":
+    import random
+    import time
+    random.seed(3)
+    test_pois = [{'name': f'景点{i}', 'location': {'lat': 25.04 + random.uniform(-0.1, 0.1),
+                                                  'lng': 102.71 + random.uniform(-0.1, 0.1)}}
+                 for i in range(500)]
+    started = time.perf_counter()
+    matrix = distance_service.get_matrix('昆明', test_pois[:480])
+    print(f"full: {len(matrix)} POIs in {(time.perf_counter() - started) * 1000:.1f} ms")
+    started = time.perf_counter()
+    matrix = distance_service.get_matrix('昆明', test_pois)
+    print(f"incremental: {len(matrix)} POIs in {(time.perf_counter() - started) * 1000:.1f} ms")
+    print(matrix.travel_minutes(walk_kmh=4.5, walk_max_km=1.0, overhead_minutes=5)[:3, :3])
+    print(distance_service.stats)
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Event Log
+分段追加日志 - 替代单个 message_history.json，每条消息 O(1) 追加，支持压缩和按大小/时间保留
+
+记录格式: 每行 "<crc32 十六进制>\\t<紧凑 JSON>\\n"；段文件写满后封存，manifest.json 记录各段的时间范围和条数
+
+段文件名: 写入段为 "<段号>.log"；压缩输出为 "<首段号>-<末段号>.g<代>.<序号>of<总数>.log"，
+记录它替代的原始段号范围和压缩代数。按 (首段号, 序号) 排序即为时间顺序，没有 manifest 时据此恢复：
+完整的一代压缩输出替代范围内更早的文件，不完整的（压缩中途崩溃）丢弃。
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRECTORY = Path(__file__).resolve().parent.parent / 'data' / 'message_history'
+
+# 只读查询类事件不属于会话历史，压缩时丢弃
+TRANSIENT_EVENTS = {'thread.channels.list', 'thread.channel_messages.retrieve', 'thread.direct_messages.retrieve'}
+
+SEGMENT_NAME = re.compile(r'^(\d{8})(?:-(\d{8})\.g(\d+)\.(\d+)of(\d+))?\.log$')
+
+
+def encode_record(event: Dict[str, Any]) -> bytes:
+    body = json.dumps(event, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return b'%08x\t%s\n' % (zlib.crc32(body), body)
+
+
+def parse_segment_name(name: str) -> Optional[Dict[str, int]]:
+    """段文件名 -> {'first', 'last', 'generation', 'part', 'parts'}；写入段的代数为 0"""
+    match = SEGMENT_NAME.match(name)
+    if match is None:
+        return None
+    first = int(match.group(1))
+    if match.group(2) is None:
+        return {'first': first, 'last': first, 'generation': 0, 'part': 0, 'parts': 1}
+    return {'first': first, 'last': int(match.group(2)), 'generation': int(match.group(3)),
+            'part': int(match.group(4)), 'parts': int(match.group(5))}
+
+
+def decode_record(line: bytes) -> Optional[Dict[str, Any]]:
+    """校验并解析一行记录，损坏或不完整时返回 None"""
+    if not line.endswith(b'\n') or len(line) < 10 or line[8:9] != b'\t':
+        return None
+    body = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(body):
+            return None
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+class SegmentedEventLog:
+    """
+    分段追加日志
+
+    写入只追加到当前段；启动时只扫描当前段以修复崩溃留下的半行，不加载历史。
+    """
+
+    def __init__(self, directory: Optional[str] = None, segment_max_bytes: int = 4 * 1024 * 1024,
+                 retention_max_bytes: Optional[int] = None, retention_max_age_days: Optional[float] = None,
+                 fsync: bool = False):
+        self.directory = Path(directory or DEFAULT_DIRECTORY)
+        self.segment_max_bytes = segment_max_bytes
+        self.retention_max_bytes = retention_max_bytes
+        self.retention_max_age_days = retention_max_age_days
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segments = self._load_manifest()
+        self._active = None
+        self._open_active()
+
+    # ---- 写入 ----
+
+    def append(self, event: Dict[str, Any]) -> Tuple[str, int]:
+        """追加一条事件，返回 (段名, 段内偏移)"""
+        record = encode_record(event)
+        with self._lock:
+            segment = self.segments[-1]
+            if segment['bytes'] and segment['bytes'] + len(record) > self.segment_max_bytes:
+                self._roll()
+                segment = self.segments[-1]
+            offset = segment['bytes']
+            self._active.write(record)
+            self._active.flush()
+            if self.fsync:
+                os.fsync(self._active.fileno())
+            timestamp = event.get('timestamp') or 0
+            segment['bytes'] += len(record)
+            segment['count'] += 1
+            segment['first_ts'] = segment['first_ts'] or timestamp
+            segment['last_ts'] = max(segment['last_ts'] or 0, timestamp)
+            return segment['name'], offset
+
+    def append_many(self, events: List[Dict[str, Any]]) -> int:
+        for event in events:
+            self.append(event)
+        return len(events)
+
+    # ---- 读取 ----
+
+    def scan(self, since_ts: Optional[float] = None, until_ts: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """按写入顺序遍历事件，按段的时间范围跳过无关段"""
+        for segment in list(self.segments):
+            if since_ts is not None and segment['last_ts'] and segment['last_ts'] < since_ts:
+                continue
+            if until_ts is not None and segment['first_ts'] and segment['first_ts'] > until_ts:
+                continue
+            for _, event in self.read_segment(segment['name']):
+                timestamp = event.get('timestamp') or 0
+                if (since_ts is None or timestamp >= since_ts) and (until_ts is None or timestamp <= until_ts):
+                    yield event
+
+    def read_segment(self, name: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """遍历某个段，返回 (偏移, 事件)；遇到损坏的记录跳过"""
+        with self._lock:
+            if self._active is not None:
+                self._active.flush()
+        offset = 0
+        with open(self.directory / name, 'rb') as f:
+            for line in f:
+                event = decode_record(line)
+                if event is not None:
+                    yield offset, event
+                offset += len(line)
+
+    def read_at(self, name: str, offset: int) -> Optional[Dict[str, Any]]:
+        """按 (段名, 偏移) 随机读取一条记录"""
+        with open(self.directory / name, 'rb') as f:
+            f.seek(offset)
+            return decode_record(f.readline())
+
+    def tail(self, count: int) -> List[Dict[str, Any]]:
+        """最近 count 条事件，从最新的段开始读取"""
+        if count <= 0:
+            return []
+        collected: List[Dict[str, Any]] = []
+        for segment in reversed(list(self.segments)):
+            collected = [event for _, event in self.read_segment(segment['name'])] + collected
+            if len(collected) >= count:
+                break
+        return collected[-count:]
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(segment['bytes'] for segment in self.segments)
+
+    @property
+    def total_count(self) -> int:
+        return sum(segment['count'] for segment in self.segments)
+
+    # ---- 维护 ----
+
+    def compact(self, drop_event_names=TRANSIENT_EVENTS) -> Dict[str, int]:
+        """
+        重写已封存的段：去掉重复 event_id 和只读查询事件，并把小段合并到接近 segment_max_bytes
+
+        当前段不参与压缩，写入不受影响。
+        """
+        with self._lock:
+            sealed = [segment for segment in self.segments if segment['sealed']]
+        if not sealed:
+            return {'segments_before': 0, 'segments_after': 0, 'dropped': 0}
+
+        seen, dropped, outputs = set(), 0, []
+        buffer, buffer_bytes, stats = [], 0, None
+        covered = [parse_segment_name(segment['name']) for segment in sealed]
+        for segment in sealed:
+            for _, event in self.read_segment(segment['name']):
+                event_id = event.get('event_id')
+                if event.get('event_name') in drop_event_names or (event_id and event_id in seen):
+                    dropped += 1
+                    continue
+                if event_id:
+                    seen.add(event_id)
+                record = encode_record(event)
+                if buffer and buffer_bytes + len(record) > self.segment_max_bytes:
+                    outputs.append(self._write_segment(buffer, stats))
+                    buffer, buffer_bytes = [], 0
+                if not buffer:
+                    stats = {'count': 0, 'first_ts': 0, 'last_ts': 0}
+                buffer.append(record)
+                buffer_bytes += len(record)
+                timestamp = event.get('timestamp') or 0
+                stats['count'] += 1
+                stats['first_ts'] = stats['first_ts'] or timestamp
+                stats['last_ts'] = max(stats['last_ts'], timestamp)
+        if buffer:
+            outputs.append(self._write_segment(buffer, stats))
+        # 全部写完后才按最终名称改名，中途崩溃只会留下临时文件或不完整的一代
+        first, last = min(info['first'] for info in covered), max(info['last'] for info in covered)
+        generation = max(info['generation'] for info in covered) + 1
+        for part, segment in enumerate(outputs):
+            name = self._compacted_name(first, last, generation, part, len(outputs))
+            os.replace(self.directory / segment['name'], self.directory / name)
+            segment['name'] = name
+        self._fsync_directory()
+
+        with self._lock:
+            names = {segment['name'] for segment in sealed}
+            self.segments = outputs + [segment for segment in self.segments if segment['name'] not in names]
+            self._save_manifest()
+        for name in names - {segment['name'] for segment in outputs}:
+            (self.directory / name).unlink(missing_ok=True)
+        logger.info(f"Compacted {len(sealed)} segments into {len(outputs)}, dropped {dropped} events")
+        return {'segments_before': len(sealed), 'segments_after': len(outputs), 'dropped': dropped}
+
+    def apply_retention(self) -> int:
+        """按总大小和最长保留时间删除最旧的已封存段，返回删除的段数"""
+        removed = 0
+        with self._lock:
+            cutoff = time.time() - self.retention_max_age_days * 86400 if self.retention_max_age_days else None
+            while len(self.segments) > 1 and self.segments[0]['sealed']:
+                oldest = self.segments[0]
+                too_big = self.retention_max_bytes is not None and self.total_bytes > self.retention_max_bytes
+                too_old = cutoff is not None and oldest['last_ts'] and oldest['last_ts'] < cutoff
+                if not (too_big or too_old):
+                    break
+                self.segments.pop(0)
+                (self.directory / oldest['name']).unlink(missing_ok=True)
+                removed += 1
+            if removed:
+                self._save_manifest()
+        return removed
+
+    def close(self):
+        with self._lock:
+            if self._active is not None:
+                self._active.close()
+                self._active = None
+            self._save_manifest()
+
+    def import_history(self, path: str) -> int:
+        """导入旧的 message_history.json（以 event_id 为键的 JSON 对象），按时间顺序追加"""
+        with open(path, encoding='utf-8') as f:
+            history = json.load(f)
+        events = list(history.values()) if isinstance(history, dict) else list(history)
+        events.sort(key=lambda event: event.get('timestamp') or 0)
+        return self.append_many(events)
+
+    # ---- 内部 ----
+
+    def _segment_name(self, number: int) -> str:
+        return f'{number:08d}.log'
+
+    def _compacted_name(self, first: int, last: int, generation: int, part: int, parts: int) -> str:
+        return f'{first:08d}-{last:08d}.g{generation}.{part}of{parts}.log'
+
+    def _next_number(self) -> int:
+        return max((parse_segment_name(segment['name'])['last'] for segment in self.segments), default=0) + 1
+
+    def _open_active(self):
+        """打开当前段；截断崩溃时写了一半的尾部记录并重新统计"""
+        if not self.segments or self.segments[-1]['sealed']:
+            self.segments.append(self._new_segment(self._next_number()))
+        segment = self.segments[-1]
+        path = self.directory / segment['name']
+        path.touch(exist_ok=True)
+        valid_bytes, count, first_ts, last_ts = 0, 0, 0, 0
+        with open(path, 'rb') as f:
+            for line in f:
+                event = decode_record(line)
+                if event is None:
+                    break
+                valid_bytes += len(line)
+                count += 1
+                timestamp = event.get('timestamp') or 0
+                first_ts = first_ts or timestamp
+                last_ts = max(last_ts, timestamp)
+        if valid_bytes < path.stat().st_size:
+            logger.warning(f"Truncating {path.stat().st_size - valid_bytes} bytes of partial records in {segment['name']}")
+            os.truncate(path, valid_bytes)
+        segment.update({'bytes': valid_bytes, 'count': count, 'first_ts': first_ts, 'last_ts': last_ts})
+        self._active = open(path, 'ab')
+        self._save_manifest()
+
+    def _roll(self):
+        self._active.close()
+        self.segments[-1]['sealed'] = True
+        self.segments.append(self._new_segment(self._next_number()))
+        self._active = open(self.directory / self.segments[-1]['name'], 'ab')
+        self._save_manifest()
+
+    def _new_segment(self, number: int) -> Dict[str, Any]:
+        return {'name': self._segment_name(number), 'bytes': 0, 'count': 0, 'first_ts': 0, 'last_ts': 0, 'sealed': False}
+
+    def _write_segment(self, records: List[bytes], stats: Dict[str, Any]) -> Dict[str, Any]:
+        """压缩输出先写入临时文件，由 compact 在全部写完后改为最终名称"""
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.compact-')
+        with os.fdopen(fd, 'wb') as f:
+            f.writelines(records)
+            f.flush()
+            os.fsync(f.fileno())
+        return dict(self._new_segment(0), name=Path(tmp).name, bytes=sum(len(r) for r in records), sealed=True,
+                    **stats)
+
+    def _fsync_directory(self):
+        """让改名在 manifest 之前落盘（Windows 不支持打开目录，跳过）"""
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _load_manifest(self) -> List[Dict[str, Any]]:
+        for tmp in self.directory.glob('.compact-*'):
+            tmp.unlink(missing_ok=True)
+        path = self.directory / 'manifest.json'
+        if path.exists():
+            with open(path, encoding='utf-8') as f:
+                segments = json.load(f)['segments']
+            segments = [segment for segment in segments if (self.directory / segment['name']).exists()]
+            self._remove_unlisted(segments)
+            return segments
+        # 没有 manifest 时按文件名恢复，统计信息在需要时重新扫描
+        segments = []
+        for path in self._recoverable_files():
+            segment = dict(self._new_segment(0), name=path.name)
+            segment['sealed'] = True
+            for _, event in self._scan_file(path):
+                segment['count'] += 1
+                timestamp = event.get('timestamp') or 0
+                segment['first_ts'] = segment['first_ts'] or timestamp
+                segment['last_ts'] = max(segment['last_ts'], timestamp)
+            segment['bytes'] = path.stat().st_size
+            segments.append(segment)
+        if segments:
+            # 压缩输出不会再追加，只有最后一个写入段可以继续写
+            segments[-1]['sealed'] = parse_segment_name(segments[-1]['name'])['generation'] > 0
+        return segments
+
+    def _recoverable_files(self) -> List[Path]:
+        """
+        没有 manifest 时的有效段文件（按时间顺序）
+
+        一代压缩输出在以下情况下有效：各部分齐全，或者范围内已没有更早代的文件（部分被保留策略删除）。
+        有效输出替代范围内更早代的文件；缺少部分且原文件仍在的输出来自压缩中途的崩溃，丢弃。
+        被替代和被丢弃的文件直接删除。
+        """
+        files = {path: parse_segment_name(path.name) for path in self.directory.glob('*.log')}
+        files = {path: info for path, info in files.items() if info is not None}
+        groups: Dict[Tuple[int, int, int], Dict[str, Any]] = {}
+        for info in files.values():
+            if info['generation']:
+                group = groups.setdefault((info['first'], info['last'], info['generation']),
+                                          {'parts': info['parts'], 'present': set()})
+                group['present'].add(info['part'])
+
+        def covers(key, info):
+            first, last, generation = key
+            return first <= info['first'] and info['last'] <= last and info['generation'] < generation
+
+        valid_groups = [key for key, group in groups.items()
+                        if len(group['present']) == group['parts']
+                        or not any(covers(key, info) for info in files.values())]
+        valid = []
+        for path, info in files.items():
+            discarded = info['generation'] and (info['first'], info['last'], info['generation']) not in valid_groups
+            superseded = any(covers(key, info) for key in valid_groups)
+            if discarded or superseded:
+                logger.warning(f"Removing {'incomplete' if discarded else 'superseded'} segment {path.name}")
+                path.unlink(missing_ok=True)
+            else:
+                valid.append(path)
+        return sorted(valid, key=lambda path: (files[path]['first'], files[path]['part']))
+
+    def _remove_unlisted(self, segments: List[Dict[str, Any]]):
+        """
+        删除 manifest 之外的段文件：压缩后、保存 manifest 前崩溃留下的输出，
+        以及保存 manifest 后、删除前崩溃留下的已被替代的原始段
+        """
+        listed = {segment['name'] for segment in segments}
+        newest = max((parse_segment_name(name)['last'] for name in listed), default=0)
+        for path in self.directory.glob('*.log'):
+            info = parse_segment_name(path.name)
+            if path.name in listed or info is None:
+                continue
+            if info['generation'] or info['last'] <= newest:
+                logger.warning(f"Removing segment {path.name} not listed in the manifest")
+                path.unlink(missing_ok=True)
+
+    def _scan_file(self, path: Path) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        offset = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                event = decode_record(line)
+                if event is not None:
+                    yield offset, event
+                offset += len(line)
+
+    def _save_manifest(self):
+        path = self.directory / 'manifest.json'
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.manifest-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'segments': self.segments}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) in (3, 4) and sys.argv[1] == 'import':
+        # python tools/event_log.py import <message_history.json> [log directory]
+        log = SegmentedEventLog(sys.argv[3] if len(sys.argv) == 4 else None)
+        print(f"Imported {log.import_history(sys.argv[2])} events into {log.directory}")
+        log.close()
+        sys.exit(0)
+
+    history = Path(__file__).resolve().parent.parent / 'mods' / 'openagents.mods.workspace.messaging' / 'message_history.json'
+    directory = tempfile.mkdtemp()
+    log = SegmentedEventLog(directory, segment_max_bytes=16 * 1024)
+    print('imported', log.import_history(str(history)), 'events into', len(log.segments), 'segments')
+    with open(Path(directory) / log.segments[-1]['name'], 'ab') as f:
+        f.write(b'0000abcd\t{"event_name": "torn wri')
+    log.close()
+    log = SegmentedEventLog(directory, segment_max_bytes=16 * 1024)
+    started = time.perf_counter()
+    for i in range(2000):
+        log.append({'event_name': 'thread.channel_message.post', 'event_id': f'e{i}', 'timestamp': time.time(),
+                    'payload': {'channel': 'general', 'content': {'text': f'message {i}'}}})
+    print(f"2000 appends in {(time.perf_counter() - started) * 1000:.1f} ms, {len(log.segments)} segments")
+    print('compact', log.compact(), 'total', log.total_count)
+    log.retention_max_bytes = 64 * 1024
+    print('retention removed', log.apply_retention(), 'segments; tail:', [e['event_id'] for e in log.tail(3)])
+    log.close()
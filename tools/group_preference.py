@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Group Preference Tool
+群体偏好分析工具 - 确定性地统计成员偏好重叠、少数偏好和冲突
+"""
+
+import json
+import logging
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+from collections import Counter, defaultdict
+import re
+
+try:
+    from openagents import tool
+except ImportError:
+    def tool(func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 偏好关键词 -> 标准类别
+PREFERENCE_CATEGORIES = {
+    'culture': ['culture', 'history', 'temple', 'museum', '文化', '历史', '古镇', '古迹', '寺庙', '博物馆', '传统'],
+    'food': ['food', 'cuisine', 'local food', '美食', '小吃', '餐厅', '火锅'],
+    'shopping': ['shopping', '购物', '商场', '市场'],
+    'nature': ['nature', 'hiking', 'park', '自然', '自然风光', '徒步', '公园', '山', '湖'],
+    'adventure': ['adventure', 'outdoor', 'sports', '探险', '户外', '运动', '极限'],
+    'art': ['art', 'photography', 'gallery', '艺术', '摄影', '拍照', '画廊'],
+    'leisure': ['relax', 'leisure', 'cafe', 'coffee', 'spa', '休闲', '咖啡馆', '咖啡', '温泉'],
+    'nightlife': ['nightlife', 'bar', '夜生活', '酒吧'],
+    'entertainment': ['anime', 'tech', 'theme park', '动漫', '科技', '游乐园', '娱乐']
+}
+
+# 高强度偏好，与需要低强度行程的成员冲突
+HIGH_INTENSITY_CATEGORIES = {'adventure', 'nature'}
+
+# 需要低强度行程的身体状况关键词
+LOW_INTENSITY_MARKERS = ['pregnant', 'elderly', 'low stamina', 'poor stamina', 'disabled', 'wheelchair',
+                         '孕', '老人', '年长', '体力差', '体力一般', '高血压', '心脏', '行动不便', '轮椅']
+
+DIETARY_MARKERS = {
+    'vegetarian': ['vegetarian', 'vegan', '素食', '吃素'],
+    'halal': ['halal', '清真'],
+    'allergy': ['allergy', 'allergic', '过敏']
+}
+
+
+class GroupPreferenceAnalyzer:
+    def __init__(self):
+        self.min_shared = 2
+        self.budget_ratio_threshold = 1.5
+        self.group_time_ratio = 0.7
+        self._keyword_index = {
+            keyword: category
+            for category, keywords in PREFERENCE_CATEGORIES.items()
+            for keyword in keywords
+        }
+
+    def analyze_group_preferences(self, members: List[Dict[str, Any]], min_shared: Optional[int] = None) -> Dict[str, Any]:
+        try:
+            logger.info(f"Analyzing preferences of {len(members)} members")
+            if not members:
+                return self._create_error_result("No members to analyze")
+
+            min_shared = min_shared or self.min_shared
+            profiles = [self._build_profile(member, index) for index, member in enumerate(members)]
+
+            category_members = defaultdict(list)
+            for profile in profiles:
+                for category in profile['categories']:
+                    category_members[category].append(profile['name'])
+            preference_counts = Counter({category: len(names) for category, names in category_members.items()})
+
+            common_interests = [category for category, count in preference_counts.most_common() if count >= min_shared]
+            minority_preferences = [
+                {'preference': category, 'members': category_members[category]}
+                for category, count in sorted(preference_counts.items()) if count < min_shared
+            ]
+
+            conflict_points = self._detect_budget_conflicts(profiles) + self._detect_physical_conflicts(profiles)
+            dietary_restrictions = self._collect_dietary_restrictions(profiles)
+
+            covered = sum(1 for profile in profiles if profile['categories'] & set(common_interests))
+            coverage = covered / len(profiles)
+
+            return {
+                'success': True,
+                'member_count': len(profiles),
+                'preference_counts': dict(preference_counts.most_common()),
+                'common_interests': common_interests,
+                'minority_preferences': minority_preferences,
+                'conflict_points': conflict_points,
+                'dietary_restrictions': dietary_restrictions,
+                'balanced_plan': {
+                    'group_activities': f"{int(self.group_time_ratio * 100)}% time for common interest activities",
+                    'individual_time': f"{100 - int(self.group_time_ratio * 100)}% time for personalized needs",
+                    'common_interest_coverage': round(coverage, 2)
+                },
+                'recommendations': self._generate_recommendations(common_interests, minority_preferences,
+                                                                  conflict_points, dietary_restrictions),
+                'analyzed_at': datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"Group preference analysis error: {str(e)}")
+            return self._create_error_result(f"Analysis failed: {str(e)}")
+
+    def _build_profile(self, member: Dict[str, Any], index: int) -> Dict[str, Any]:
+        name = member.get('name') or member.get('member_id') or f"member_{index + 1}"
+        preferences = member.get('preferences', [])
+        if isinstance(preferences, str):
+            preferences = re.split(r'[,，、/;；]', preferences)
+        categories = set()
+        for preference in preferences:
+            category = self._categorize_preference(preference)
+            if category:
+                categories.add(category)
+
+        notes = ' '.join(self._as_text(member.get(field)) for field in
+                         ('special_needs', 'health', 'health_conditions', 'dietary', 'dietary_restrictions',
+                          'stamina', 'notes')).lower()
+        age = member.get('age')
+        low_intensity = any(marker in notes for marker in LOW_INTENSITY_MARKERS)
+        if isinstance(age, (int, float)) and (age >= 65 or age < 6):
+            low_intensity = True
+
+        return {
+            'name': name,
+            'categories': categories,
+            'budget': self._parse_budget(member.get('budget')),
+            'low_intensity': low_intensity,
+            'dietary': [kind for kind, markers in DIETARY_MARKERS.items() if any(m in notes for m in markers)]
+        }
+
+    def _categorize_preference(self, preference: Any) -> Optional[str]:
+        text = str(preference).strip().lower()
+        if not text:
+            return None
+        if text in self._keyword_index:
+            return self._keyword_index[text]
+        for keyword, category in self._keyword_index.items():
+            if keyword in text:
+                return category
+        return text
+
+    def _as_text(self, value: Any) -> str:
+        if not value:
+            return ''
+        if isinstance(value, (list, tuple, set)):
+            return ' '.join(str(v) for v in value)
+        return str(value)
+
+    def _parse_budget(self, budget: Any) -> Optional[float]:
+        if isinstance(budget, (int, float)):
+            return float(budget)
+        if isinstance(budget, dict):
+            return self._parse_budget(budget.get('amount'))
+        if isinstance(budget, str):
+            match = re.search(r'(\d+(?:\.\d+)?)', budget.replace(',', ''))
+            if match:
+                return float(match.group(1))
+        return None
+
+    def _detect_budget_conflicts(self, profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        budgeted = [p for p in profiles if p['budget']]
+        if len(budgeted) < 2:
+            return []
+        lowest = min(budgeted, key=lambda p: p['budget'])
+        highest = max(budgeted, key=lambda p: p['budget'])
+        ratio = highest['budget'] / lowest['budget']
+        if ratio < self.budget_ratio_threshold:
+            return []
+        return [{
+            'type': 'budget',
+            'members': [lowest['name'], highest['name']],
+            'detail': f"{lowest['name']} budget {lowest['budget']:.0f} vs {highest['name']} budget {highest['budget']:.0f}",
+            'ratio': round(ratio, 2)
+        }]
+
+    def _detect_physical_conflicts(self, profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        conflicts = []
+        restricted = [p for p in profiles if p['low_intensity']]
+        for profile in profiles:
+            intense = sorted(profile['categories'] & HIGH_INTENSITY_CATEGORIES)
+            if not intense:
+                continue
+            for other in restricted:
+                if other['name'] == profile['name']:
+                    continue
+                conflicts.append({
+                    'type': 'physical',
+                    'members': [profile['name'], other['name']],
+                    'detail': f"{profile['name']} likes {'/'.join(intense)} vs {other['name']} needs low intensity"
+                })
+        return conflicts
+
+    def _collect_dietary_restrictions(self, profiles: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        restrictions = defaultdict(list)
+        for profile in profiles:
+            for kind in profile['dietary']:
+                restrictions[kind].append(profile['name'])
+        return dict(restrictions)
+
+    def _generate_recommendations(self, common_interests: List[str], minority_preferences: List[Dict[str, Any]],
+                                  conflict_points: List[Dict[str, Any]], dietary_restrictions: Dict[str, List[str]]) -> List[str]:
+        recommendations = []
+        if common_interests:
+            recommendations.append(f"Build group activities around: {', '.join(common_interests[:3])}")
+        if minority_preferences:
+            names = ', '.join(p['preference'] for p in minority_preferences[:3])
+            recommendations.append(f"Reserve individual or split time for: {names}")
+        if any(c['type'] == 'physical' for c in conflict_points):
+            recommendations.append("Split high-intensity activities into an optional sub-group")
+        if any(c['type'] == 'budget' for c in conflict_points):
+            recommendations.append("Offer tiered options for paid activities and accommodation")
+        if dietary_restrictions:
+            recommendations.append(f"Choose restaurants covering: {', '.join(sorted(dietary_restrictions))}")
+        return recommendations
+
+    def _create_error_result(self, error_message: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': error_message,
+            'member_count': 0,
+            'preference_counts': {},
+            'common_interests': [],
+            'minority_preferences': [],
+            'conflict_points': [],
+            'dietary_restrictions': {},
+            'balanced_plan': {},
+            'recommendations': [],
+            'analyzed_at': datetime.now().isoformat()
+        }
+
+group_analyzer = GroupPreferenceAnalyzer()
+
+@tool(name="analyze_group_preferences", description="Count group member preference overlaps, minority preferences and budget/physical conflicts")
+def analyze_group_preferences(members: List[Dict[str, Any]], min_shared: int = 2) -> str:
+    result = group_analyzer.analyze_group_preferences(members, min_shared)
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    test_members = [
+        {'name': 'Alice', 'age': 25, 'preferences': ['culture', 'food'], 'budget': 12000},
+        {'name': 'Bob', 'age': 28, 'preferences': ['nature', 'adventure'], 'budget': 15000},
+        {'name': 'Carol', 'age': 30, 'preferences': ['shopping', 'food'], 'budget': 10000, 'special_needs': ['pregnant']},
+        {'name': 'David', 'age': 26, 'preferences': ['anime', 'tech'], 'budget': 8000},
+        {'name': 'Eve', 'age': 27, 'preferences': ['art', 'photography'], 'budget': 13000, 'dietary': 'vegetarian'}
+    ]
+    print(analyze_group_preferences(test_members))
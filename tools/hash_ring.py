@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Hash Ring
+一致性哈希 - 把 project_id 映射到同一 agent 的某个副本，同一项目的事件总是到达同一副本
+
+副本命名与 start_agents.py 一致: 第 1 个副本沿用 agent_id，其余为 <agent_id>-r<n>。
+副本数通过环境变量 TRIPMIND_REPLICAS 共享，例如 "web-scraper-agent=3,route-planning-agent=2"，
+所有进程据此构造相同的哈希环，发送方可以直接把事件发给负责的副本。
+"""
+
+import bisect
+import hashlib
+import os
+import re
+import logging
+from typing import Dict, List, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REPLICA_SUFFIX = re.compile(r'^(.+)-r(\d+)$')
+
+
+def replica_ids(agent_id: str, count: int) -> List[str]:
+    return [agent_id] + [f'{agent_id}-r{index}' for index in range(2, count + 1)]
+
+
+def parse_replicas(spec: Optional[str]) -> Dict[str, int]:
+    """"a=3,b=2" -> {'a': 3, 'b': 2}"""
+    replicas = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            agent_id, count = item.split('=', 1)
+            replicas[agent_id.strip()] = int(count)
+    return replicas
+
+
+class HashRing:
+    """
+    带虚拟节点的一致性哈希环
+
+    每个节点在环上放 vnodes 个点；增加或移除一个节点时，只有落在该节点区间内的键会改变归属
+    （约 1/n 的键），其余键的副本不变，缓存保持有效。
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 100):
+        self.vnodes = vnodes
+        self._points: List[Tuple[int, str]] = []
+        self._hashes: List[int] = []
+        self._nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        self._points = sorted(self._points + [(self._hash(f'{node}#{index}'), node) for index in range(self.vnodes)])
+        self._hashes = [point[0] for point in self._points]
+
+    def remove(self, node: str):
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        self._points = [point for point in self._points if point[1] != node]
+        self._hashes = [point[0] for point in self._points]
+
+    def get(self, key: str) -> Optional[str]:
+        """顺时针找到第一个虚拟节点"""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._hashes, self._hash(key))
+        return self._points[index % len(self._points)][1]
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def _hash(self, value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+
+class ShardRouter:
+    """按 agent 维护哈希环，把逻辑 agent_id + project_id 解析为副本 id"""
+
+    def __init__(self, replicas: Optional[Dict[str, int]] = None, vnodes: int = 100):
+        self.rings: Dict[str, HashRing] = {}
+        for agent_id, count in (replicas or {}).items():
+            if count > 1:
+                self.rings[agent_id] = HashRing(replica_ids(agent_id, count), vnodes)
+
+    @classmethod
+    def from_env(cls) -> 'ShardRouter':
+        return cls(parse_replicas(os.getenv('TRIPMIND_REPLICAS')))
+
+    def route(self, agent_id: str, project_id: Optional[str]) -> str:
+        """没有分片或没有 project_id 时返回原 agent_id"""
+        ring = self.rings.get(agent_id)
+        if ring is None or not project_id:
+            return agent_id
+        return ring.get(str(project_id))
+
+    def logical_id(self, replica_id: str) -> str:
+        """副本 id -> 逻辑 agent_id"""
+        match = REPLICA_SUFFIX.match(replica_id)
+        if match and match.group(1) in self.rings:
+            return match.group(1)
+        return replica_id
+
+    def is_sharded(self, agent_id: str) -> bool:
+        return self.logical_id(agent_id) in self.rings
+
+# 全局分片路由实例（由 TRIPMIND_REPLICAS 配置）
+shard_router = ShardRouter.from_env()
+
+if __name__ == "__main__":
+    keys = [f'project-{i}' for i in range(10000)]
+    ring = HashRing(replica_ids('web-scraper-agent', 3))
+    before = {key: ring.get(key) for key in keys}
+    counts = {node: list(before.values()).count(node) for node in ring.nodes}
+    print('3 replicas:', counts)
+
+    ring.add('web-scraper-agent-r4')
+    after = {key: ring.get(key) for key in keys}
+    moved = sum(before[key] != after[key] for key in keys)
+    print(f'join r4: {moved / len(keys):.1%} of projects moved (ideal {1 / 4:.0%}),',
+          'all to r4' if all(after[key] == 'web-scraper-agent-r4' for key in keys if before[key] != after[key]) else '')
+
+    ring.remove('web-scraper-agent-r2')
+    final = {key: ring.get(key) for key in keys}
+    moved = sum(after[key] != final[key] for key in keys)
+    print(f'leave r2: {moved / len(keys):.1%} moved, only r2 projects:',
+          all(after[key] == 'web-scraper-agent-r2' for key in keys if after[key] != final[key]))
+
+    router = ShardRouter(parse_replicas('route-planning-agent=2'))
+    print(router.route('route-planning-agent', 'p1'), router.route('orchestrator', 'p1'),
+          router.logical_id('route-planning-agent-r2'))
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Health Filter Tool
+健康与无障碍过滤工具 - 将成员健康档案编译为规则谓词，一次遍历过滤或标注 POI
+"""
+
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Callable
+from datetime import datetime
+
+try:
+    from openagents import tool
+except ImportError:
+    def tool(func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 健康档案关键词 -> 标准标记
+CONDITION_MARKERS = {
+    'pregnant': ['pregnant', 'pregnancy', '孕', '怀孕'],
+    'elderly': ['elderly', 'senior', '老人', '年长', '高龄'],
+    'child': ['child', 'kid', 'toddler', '孩子', '小孩', '儿童', '幼儿'],
+    'mobility': ['wheelchair', 'disabled', 'mobility', '轮椅', '行动不便', '残障', '腿脚不便'],
+    'cardio': ['hypertension', 'heart', 'blood pressure', '高血压', '心脏', '心血管'],
+    'low_stamina': ['low stamina', 'poor stamina', 'tired', '体力差', '体力一般', '容易累'],
+    'vegetarian': ['vegetarian', 'vegan', '素食', '吃素'],
+    'halal': ['halal', '清真'],
+}
+
+# 参与编译的档案字段
+PROFILE_FIELDS = ['health', 'health_conditions', 'conditions', 'special_needs', 'dietary', 'dietary_restrictions',
+                  'stamina', 'notes', 'role']
+
+CROWD_LEVELS = {'低': 0, '较低': 1, '中等': 2, '一般': 2, '较高': 3, '高': 4, '拥挤': 4,
+                'low': 0, 'medium': 2, 'high': 4}
+
+HIGH_INTENSITY_WORDS = ['徒步', '登山', '探险', '户外', '运动', '极限', '攀岩', '漂流', '潜水', '骑行',
+                        'hiking', 'adventure', 'climbing', 'rafting', 'diving', 'outdoor']
+THRILL_WORDS = ['过山车', '蹦极', '刺激', '高空', '极限', '潜水', '高原', '跳伞', 'roller coaster', 'bungee', 'thrill']
+MEDIUM_INTENSITY_WORDS = ['公园', '古迹', '古城', '城墙', '步行', '山', 'park', 'walking']
+ADULT_ONLY_WORDS = ['酒吧', '夜生活', '夜店', 'bar', 'nightclub']
+REST_FACILITIES = ['休息区', '休息亭', '座椅', '咖啡厅']
+ACCESSIBLE_FACILITIES = ['无障碍通道', '无障碍', '轮椅', 'accessible', 'wheelchair']
+
+
+class PoiFeatures:
+    """POI 预处理特征，每个 POI 每次过滤只计算一次"""
+
+    __slots__ = ('text', 'facilities', 'crowd', 'duration', 'intensity', 'restaurant')
+
+    def __init__(self, poi: Dict[str, Any]):
+        tags = [str(t) for t in poi.get('tags', []) or []]
+        highlights = [str(h) for h in poi.get('highlights', []) or []]
+        self.text = ' '.join([str(poi.get('name', '')), str(poi.get('type', '')), str(poi.get('category', '')),
+                              str(poi.get('cuisine', ''))] + tags + highlights).lower()
+        self.facilities = ' '.join(str(f) for f in poi.get('facilities', []) or []).lower() or None
+        self.crowd = CROWD_LEVELS.get(str(poi.get('crowd_level', '')).strip().lower())
+        self.duration = self._parse_duration(poi.get('duration'))
+        if any(word in self.text for word in HIGH_INTENSITY_WORDS):
+            self.intensity = 2
+        elif any(word in self.text for word in MEDIUM_INTENSITY_WORDS):
+            self.intensity = 1
+        else:
+            self.intensity = 0
+        self.restaurant = 'cuisine' in poi or '餐' in self.text or 'restaurant' in self.text
+
+    def _parse_duration(self, duration: Any) -> Optional[int]:
+        """取时长范围的上限（分钟）"""
+        if isinstance(duration, (int, float)):
+            return int(duration)
+        numbers = [float(n) for n in re.findall(r'\d+(?:\.\d+)?', str(duration or ''))]
+        if not numbers:
+            return None
+        if '分' in str(duration) or 'min' in str(duration).lower():
+            return int(max(numbers))
+        return int(max(numbers) * 60)
+
+    def has_facility(self, words: List[str]) -> Optional[bool]:
+        if self.facilities is None:
+            return None
+        return any(word in self.facilities for word in words)
+
+    def mentions(self, words: List[str]) -> bool:
+        return any(word in self.text for word in words)
+
+
+# 规则: (规则名, 处理方式 exclude|warn, 谓词, 原因)
+Rule = Tuple[str, str, Callable[[PoiFeatures], bool], str]
+
+
+def _rules_for(flags: frozenset, age: Optional[int]) -> List[Rule]:
+    rules = []
+    if 'pregnant' in flags:
+        rules += [
+            ('pregnant_intensity', 'exclude', lambda f: f.intensity >= 2, 'high-intensity activity during pregnancy'),
+            ('pregnant_thrill', 'exclude', lambda f: f.mentions(THRILL_WORDS), 'thrill or altitude activity during pregnancy'),
+            ('pregnant_crowd', 'warn', lambda f: f.crowd is not None and f.crowd >= 3, 'crowded venue'),
+            ('pregnant_duration', 'warn', lambda f: f.duration is not None and f.duration > 180, 'visit longer than 3 hours'),
+        ]
+    if 'elderly' in flags:
+        rules += [
+            ('elderly_intensity', 'exclude', lambda f: f.intensity >= 2, 'high-intensity activity for elderly member'),
+            ('elderly_rest', 'warn',
+             lambda f: f.duration is not None and f.duration > 180 and f.has_facility(REST_FACILITIES) is False,
+             'long visit without rest areas'),
+            ('elderly_crowd', 'warn', lambda f: f.crowd is not None and f.crowd >= 4, 'very crowded venue'),
+        ]
+    if 'mobility' in flags:
+        rules += [
+            ('mobility_access', 'exclude', lambda f: f.has_facility(ACCESSIBLE_FACILITIES) is False,
+             'no accessible entrance listed'),
+            ('mobility_unknown', 'warn', lambda f: f.has_facility(ACCESSIBLE_FACILITIES) is None,
+             'accessibility unknown'),
+            ('mobility_intensity', 'exclude', lambda f: f.intensity >= 2, 'requires strenuous walking'),
+        ]
+    if 'cardio' in flags:
+        rules += [
+            ('cardio_thrill', 'exclude', lambda f: f.mentions(THRILL_WORDS), 'thrill or altitude activity with heart condition'),
+            ('cardio_intensity', 'warn', lambda f: f.intensity >= 2, 'strenuous activity with heart condition'),
+        ]
+    if 'low_stamina' in flags:
+        rules.append(('stamina_intensity', 'warn', lambda f: f.intensity >= 2, 'strenuous activity for low stamina'))
+    if 'child' in flags or (age is not None and age < 12):
+        rules += [
+            ('child_adult_only', 'exclude', lambda f: f.mentions(ADULT_ONLY_WORDS), 'adult-only venue'),
+            ('child_duration', 'warn', lambda f: f.duration is not None and f.duration > 240, 'visit longer than 4 hours'),
+        ]
+    if 'vegetarian' in flags:
+        rules.append(('vegetarian_menu', 'warn', lambda f: f.restaurant and not f.mentions(['素', 'vegetarian', 'vegan']),
+                      'no vegetarian options listed'))
+    if 'halal' in flags:
+        rules.append(('halal_menu', 'warn', lambda f: f.restaurant and not f.mentions(['清真', 'halal']),
+                      'no halal options listed'))
+    return rules
+
+
+@lru_cache(maxsize=1024)
+def _compile_profile(profile_key: str) -> Tuple[str, Tuple[Rule, ...]]:
+    """按规范化后的档案字符串编译规则集，同一档案只编译一次"""
+    profile = json.loads(profile_key)
+    text = ' '.join(str(profile.get(field, '')) for field in PROFILE_FIELDS).lower()
+    flags = frozenset(flag for flag, markers in CONDITION_MARKERS.items() if any(m in text for m in markers))
+    age = profile.get('age') if isinstance(profile.get('age'), (int, float)) else None
+    if age is not None and age >= 65:
+        flags |= {'elderly'}
+    name = profile.get('name') or profile.get('member_id') or 'member'
+    return name, tuple(_rules_for(flags, age))
+
+
+class HealthFilterEngine:
+    def compile_profile(self, member: Dict[str, Any]) -> Tuple[str, Tuple[Rule, ...]]:
+        return _compile_profile(json.dumps(member, ensure_ascii=False, sort_keys=True, default=str))
+
+    def filter_activities(self, pois: List[Dict[str, Any]], members: List[Dict[str, Any]],
+                          mode: str = "filter") -> Dict[str, Any]:
+        """
+        按成员健康档案过滤或标注 POI
+
+        Args:
+            pois: POI 列表（使用 facilities、crowd_level、duration、tags 等字段）
+            members: 成员健康档案列表（age、health、special_needs、dietary 等）
+            mode: filter 返回剔除后的列表；annotate 保留全部 POI 只附加标注
+
+        Returns:
+            过滤结果字典
+        """
+        try:
+            logger.info(f"Filtering {len(pois)} POIs for {len(members)} members")
+            compiled = [self.compile_profile(member) for member in members]
+            compiled = [(name, rules) for name, rules in compiled if rules]
+
+            suitable, excluded, annotated = [], [], []
+            for poi in pois:
+                features = PoiFeatures(poi)
+                exclusions, warnings = [], []
+                for name, rules in compiled:
+                    for rule_id, action, predicate, reason in rules:
+                        if predicate(features):
+                            entry = {'member': name, 'rule': rule_id, 'reason': reason}
+                            (exclusions if action == 'exclude' else warnings).append(entry)
+
+                status = 'excluded' if exclusions else ('warning' if warnings else 'ok')
+                annotation = {'name': poi.get('name', ''), 'status': status,
+                              'exclusions': exclusions, 'warnings': warnings}
+                annotated.append(annotation)
+                if exclusions:
+                    excluded.append(annotation)
+                else:
+                    suitable.append(dict(poi, health_warnings=warnings) if warnings else poi)
+
+            result = {
+                'success': True,
+                'mode': mode,
+                'members_with_constraints': [name for name, _ in compiled],
+                'excluded': excluded,
+                'statistics': {'total': len(pois), 'suitable': len(suitable), 'excluded': len(excluded),
+                               'with_warnings': sum(1 for a in annotated if a['status'] == 'warning')},
+                'filtered_at': datetime.now().isoformat()
+            }
+            if mode == 'annotate':
+                result['annotations'] = annotated
+            else:
+                result['suitable'] = suitable
+            return result
+        except Exception as e:
+            logger.error(f"Health filter error: {str(e)}")
+            return {'success': False, 'error': f"Health filter failed: {str(e)}", 'mode': mode,
+                    'suitable': [], 'excluded': [], 'statistics': {}, 'filtered_at': datetime.now().isoformat()}
+
+health_filter = HealthFilterEngine()
+
+@tool(name="filter_activities", description="Filter or annotate POIs against members' health, accessibility and dietary constraints")
+def filter_activities(pois: List[Dict[str, Any]], members: List[Dict[str, Any]], mode: str = "filter") -> str:
+    result = health_filter.filter_activities(pois, members, mode)
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    test_pois = [
+        {'name': '历史博物馆', 'type': '博物馆', 'duration': '2-3小时', 'crowd_level': '中等',
+         'facilities': ['停车场', '无障碍通道', '咖啡厅'], 'tags': ['历史', '文化']},
+        {'name': '虎跳峡徒步', 'type': '景点', 'duration': '4小时', 'crowd_level': '较低', 'tags': ['徒步', '探险']},
+        {'name': '古城墙遗址', 'type': '古迹', 'duration': '1-2小时', 'crowd_level': '较高',
+         'facilities': ['导览服务', '休息区'], 'tags': ['历史', '古迹']},
+        {'name': '老城火锅', 'cuisine': '川菜', 'tags': ['火锅']}
+    ]
+    test_members = [{'name': 'Carol', 'special_needs': ['pregnant']}, {'name': '奶奶', 'age': 70, 'health': '轻微高血压'},
+                    {'name': 'Eve', 'dietary': 'vegetarian'}, {'name': 'Bob', 'age': 28}]
+    print(filter_activities(test_pois, test_members, mode="annotate"))
+    print(_compile_profile.cache_info())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind History Index
+消息历史二级索引 - 在分段日志之上按频道、线程、私信会话维护按时间排序的位置列表，支持游标分页
+
+查询最新一页: 二分定位游标 O(log n)，再按 (段, 偏移) 随机读取 page_size 条记录，与历史总量无关
+"""
+
+import base64
+import json
+import os
+import tempfile
+import threading
+import logging
+from bisect import bisect_left, insort
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    from tools.event_log import SegmentedEventLog, decode_record
+except ImportError:
+    from event_log import SegmentedEventLog, decode_record
+
+logger = logging.getLogger(__name__)
+
+# 索引项: (timestamp, seq, 段名, 偏移)；seq 为全局追加序号，用于区分同一秒内的消息
+Entry = Tuple[float, int, str, int]
+
+
+def index_keys(event: Dict[str, Any]) -> List[str]:
+    """事件对应的索引键: channel:<名称>、thread:<根消息 id>、dm:<双方 id 排序>"""
+    name = event.get('event_name') or ''
+    payload = event.get('payload') or {}
+    keys = []
+    if name in ('thread.channel_message.post', 'thread.reply.post'):
+        destination = event.get('destination_id') or ''
+        channel = payload.get('channel') or (destination[len('channel:'):] if destination.startswith('channel:') else None)
+        if channel:
+            keys.append(f'channel:{channel}')
+        if payload.get('reply_to_id'):
+            keys.append(f"thread:{payload['reply_to_id']}")
+    elif name == 'thread.direct_message.send':
+        target = payload.get('target_agent_id') or event.get('destination_id')
+        if target and event.get('source_id'):
+            keys.append('dm:' + '|'.join(sorted([event['source_id'], target])))
+    return keys
+
+
+def encode_cursor(entry: Entry) -> str:
+    return base64.urlsafe_b64encode(f'{entry[0]}:{entry[1]}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    timestamp, seq = raw.split(':')
+    return float(timestamp), int(seq)
+
+
+class HistoryIndex:
+    """
+    分段日志的二级索引
+
+    append() 同时写日志和索引；save() 把索引快照写到日志目录，重启时加载快照后只补扫快照之后的记录。
+    压缩和保留清理应通过本类的 compact() / apply_retention() 调用，以便同步重建索引。
+    """
+
+    def __init__(self, log: SegmentedEventLog):
+        self.log = log
+        self._lock = threading.RLock()
+        self._lists: Dict[str, List[Entry]] = {}
+        self._seq = 0
+        self._covered: Dict[str, int] = {}
+        if not self._load_snapshot():
+            self.rebuild()
+        else:
+            self._catch_up()
+
+    # ---- 写入 ----
+
+    def append(self, event: Dict[str, Any]) -> Tuple[str, int]:
+        with self._lock:
+            segment, offset = self.log.append(event)
+            self._add(event, segment, offset)
+            self._covered[segment] = self.log.segments[-1]['bytes']
+            return segment, offset
+
+    def rebuild(self):
+        """从日志全量重建索引"""
+        with self._lock:
+            self._lists, self._seq, self._covered = {}, 0, {}
+            self._catch_up()
+        logger.info(f"Rebuilt history index: {len(self._lists)} keys, {self._seq} entries")
+
+    def compact(self) -> Dict[str, int]:
+        """压缩日志并重建索引（压缩会改变记录位置）"""
+        with self._lock:
+            result = self.log.compact()
+            self.rebuild()
+        return result
+
+    def apply_retention(self) -> int:
+        with self._lock:
+            removed = self.log.apply_retention()
+            if removed:
+                self.rebuild()
+        return removed
+
+    def save(self):
+        """原子写入索引快照"""
+        with self._lock:
+            snapshot = {'version': 1, 'seq': self._seq, 'covered': self._covered,
+                        'lists': {key: [list(entry) for entry in entries] for key, entries in self._lists.items()}}
+        fd, tmp = tempfile.mkstemp(dir=self.log.directory, prefix='.index-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self._snapshot_path())
+
+    # ---- 查询 ----
+
+    def page(self, channel: Optional[str] = None, thread: Optional[str] = None, dm: Optional[Tuple[str, str]] = None,
+             limit: int = 50, cursor: Optional[str] = None, direction: str = 'backward') -> Dict[str, Any]:
+        """
+        游标分页读取
+
+        Args:
+            channel / thread / dm: 三选一，dm 为两个 agent id
+            limit: 每页条数
+            cursor: 上一页返回的 next_cursor；为空时 backward 从最新开始，forward 从最早开始
+            direction: backward（由新到旧翻页）或 forward（由旧到新）
+
+        Returns:
+            {'messages': 按时间正序的事件列表, 'next_cursor': 下一页游标或 None, 'has_more': bool}
+        """
+        if channel:
+            key = f'channel:{channel}'
+        elif thread:
+            key = f'thread:{thread}'
+        elif dm:
+            key = 'dm:' + '|'.join(sorted(dm))
+        else:
+            raise ValueError("One of channel, thread or dm is required")
+
+        with self._lock:
+            entries = self._lists.get(key, [])
+            if direction == 'backward':
+                end = bisect_left(entries, decode_cursor(cursor)) if cursor else len(entries)
+                start = max(end - limit, 0)
+                selected = entries[start:end]
+                has_more = start > 0
+                next_entry = selected[0] if selected and has_more else None
+            else:
+                if cursor:
+                    timestamp, seq = decode_cursor(cursor)
+                    start = bisect_left(entries, (timestamp, seq + 1))
+                else:
+                    start = 0
+                selected = entries[start:start + limit]
+                has_more = start + limit < len(entries)
+                next_entry = selected[-1] if selected and has_more else None
+            total = len(entries)
+
+        messages = self._read_entries(selected)
+        return {'key': key, 'messages': messages, 'next_cursor': encode_cursor(next_entry) if next_entry else None,
+                'has_more': has_more, 'total': total}
+
+    def retrieve_channel_messages(self, channel: str, limit: int = 200, offset: int = 0) -> List[Dict[str, Any]]:
+        """兼容 thread.channel_messages.retrieve 的 limit/offset 语义（offset 从最新消息往回数）"""
+        with self._lock:
+            entries = self._lists.get(f'channel:{channel}', [])
+            end = max(len(entries) - offset, 0)
+            selected = entries[max(end - limit, 0):end]
+        return self._read_entries(selected)
+
+    def keys(self, prefix: str = '') -> Dict[str, int]:
+        with self._lock:
+            return {key: len(entries) for key, entries in self._lists.items() if key.startswith(prefix)}
+
+    # ---- 内部 ----
+
+    def _add(self, event: Dict[str, Any], segment: str, offset: int):
+        self._seq += 1
+        entry = (float(event.get('timestamp') or 0), self._seq, segment, offset)
+        for key in index_keys(event):
+            entries = self._lists.setdefault(key, [])
+            if not entries or entries[-1] <= entry:
+                entries.append(entry)
+            else:
+                # 时间戳乱序到达时按时间插入
+                insort(entries, entry)
+
+    def _read_entries(self, entries: List[Entry]) -> List[Dict[str, Any]]:
+        """按位置随机读取记录，同一段只打开一次文件"""
+        events, handles = [], {}
+        try:
+            for _, _, segment, offset in entries:
+                handle = handles.get(segment)
+                if handle is None:
+                    handle = handles[segment] = open(self.log.directory / segment, 'rb')
+                handle.seek(offset)
+                event = decode_record(handle.readline())
+                if event is not None:
+                    events.append(event)
+        finally:
+            for handle in handles.values():
+                handle.close()
+        return events
+
+    def _catch_up(self):
+        """扫描快照未覆盖的段或段尾"""
+        for segment in list(self.log.segments):
+            name = segment['name']
+            covered = self._covered.get(name, 0)
+            if covered >= segment['bytes']:
+                continue
+            for offset, event in self.log.read_segment(name):
+                if offset >= covered:
+                    self._add(event, name, offset)
+            self._covered[name] = segment['bytes']
+
+    def _snapshot_path(self) -> Path:
+        return self.log.directory / 'index.json'
+
+    def _load_snapshot(self) -> bool:
+        path = self._snapshot_path()
+        if not path.exists():
+            return False
+        try:
+            with open(path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except ValueError:
+            logger.warning("History index snapshot is unreadable, rebuilding")
+            return False
+        names = {segment['name'] for segment in self.log.segments}
+        # 快照引用了已被压缩或删除的段时，偏移已失效
+        if any(name not in names for name in snapshot['covered']):
+            return False
+        self._seq = snapshot['seq']
+        self._covered = snapshot['covered']
+        self._lists = {key: [tuple(entry) for entry in entries] for key, entries in snapshot['lists'].items()}
+        return True
+
+if __name__ == "__main__":
+    import time
+    directory = tempfile.mkdtemp()
+    history = Path(__file__).resolve().parent.parent / 'mods' / 'openagents.mods.workspace.messaging' / 'message_history.json'
+    log = SegmentedEventLog(directory)
+    log.import_history(str(history))
+    index = HistoryIndex(log)
+    print(index.keys())
+
+    now = time.time()
+    for i in range(50000):
+        index.append({'event_name': 'thread.channel_message.post', 'event_id': f'e{i}', 'timestamp': now + i // 10,
+                      'source_id': 'coordinator', 'payload': {'channel': 'general' if i % 5 else 'project:demo',
+                                                              'content': {'text': f'message {i}'}}})
+    started = time.perf_counter()
+    first = index.page(channel='general', limit=20)
+    second = index.page(channel='general', limit=20, cursor=first['next_cursor'])
+    elapsed = (time.perf_counter() - started) * 1000
+    print([m['event_id'] for m in first['messages']][-3:], [m['event_id'] for m in second['messages']][-3:],
+          f"{elapsed:.2f} ms for two pages of {first['total']}")
+    index.save()
+    log.close()
+    reopened = HistoryIndex(SegmentedEventLog(directory))
+    print('after reopen:', reopened.page(channel='general', limit=1)['messages'][0]['event_id'])
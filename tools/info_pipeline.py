@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Info Pipeline Tool
+信息管道工具 - 在同一进程内完成抓取和分析，抓取结果以内存对象直接交给分析器
+"""
+
+import json
+import time
+import logging
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+
+try:
+    from openagents import tool
+except ImportError:
+    def tool(func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+try:
+    from tools.web_scraper import scraper
+    from tools.information_analyzer import analyzer
+except ImportError:
+    from web_scraper import scraper
+    from information_analyzer import analyzer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class InfoPipeline:
+    """抓取 + 分析融合阶段，省去 info.scraping.completed 这一跳及 raw_data 的序列化"""
+
+    def scrape(self, info_type: str, query: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        抓取旅行信息，关键词过滤掉全部结果时回退为不过滤
+
+        Args:
+            info_type: 信息类型 (attractions|hotels|restaurants|weather|transportation)
+            query: 查询参数，keywords 可以是列表或逗号分隔的字符串
+
+        Returns:
+            scrape_travel_info 的结果字典
+        """
+        query = dict(query or {})
+        query['keywords'] = self.normalize_keywords(query.get('keywords'))
+        result = scraper.scrape_travel_info(info_type, query)
+        if result.get('success') and not result['raw_data'] and query['keywords']:
+            logger.info("Keywords filtered out every item, retrying without keywords")
+            result = scraper.scrape_travel_info(info_type, dict(query, keywords=[]))
+        return result
+
+    def scrape_and_analyze(self, info_type: str, query: Dict[str, Any], analysis_type: str = "comprehensive",
+                           output_mode: str = "full", token_budget: Optional[int] = None) -> Dict[str, Any]:
+        """
+        抓取并分析旅行信息
+
+        Args:
+            info_type: 信息类型
+            query: 查询参数（location、keywords、budget_range）
+            analysis_type: 分析类型 comprehensive|quick|detailed
+            output_mode: full | compact（按 token_budget 裁剪的精简摘要）
+            token_budget: compact 模式的估算 token 上限
+
+        Returns:
+            与 analyze_information 相同结构的分析结果，附带抓取元数据和各阶段耗时
+        """
+        try:
+            started = time.perf_counter()
+            scraped = self.scrape(info_type, query)
+            scraped_at = time.perf_counter()
+            if not scraped.get('success'):
+                return self._create_error_result(scraped.get('error', 'Scraping failed'), info_type)
+
+            # raw_data 直接以列表对象传给分析器，不经过 JSON 往返
+            result = analyzer.analyze_information(scraped['raw_data'], analysis_type, output_mode, token_budget)
+            result['info_type'] = info_type
+            result['scrape_metadata'] = scraped['metadata']
+            result['timings_ms'] = {
+                'scrape': round((scraped_at - started) * 1000, 2),
+                'analyze': round((time.perf_counter() - scraped_at) * 1000, 2)
+            }
+            return result
+        except Exception as e:
+            logger.error(f"Info pipeline error: {str(e)}")
+            return self._create_error_result(f"Info pipeline failed: {str(e)}", info_type)
+
+    def normalize_keywords(self, keywords: Any) -> List[str]:
+        if isinstance(keywords, str):
+            keywords = keywords.replace('，', ',').split(',')
+        return [str(keyword).strip() for keyword in keywords or [] if str(keyword).strip()]
+
+    def _create_error_result(self, error_message: str, info_type: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': error_message,
+            'info_type': info_type,
+            'processed_data': {'summary': 'Pipeline failed', 'top_recommendations': [], 'insights': [], 'categories': {}},
+            'quality_metrics': {},
+            'scrape_metadata': {},
+            'analyzed_at': datetime.now().isoformat()
+        }
+
+info_pipeline = InfoPipeline()
+
+@tool(name="scrape_and_analyze", description="Scrape travel information and analyze it in one step")
+def scrape_and_analyze(info_type: str, query: Dict[str, Any], analysis_type: str = "comprehensive",
+                       output_mode: str = "full", token_budget: Optional[int] = None) -> str:
+    result = info_pipeline.scrape_and_analyze(info_type, query, analysis_type, output_mode, token_budget)
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    result = info_pipeline.scrape_and_analyze('attractions', {'location': '东京', 'keywords': '文化, 历史'})
+    print(json.dumps({k: result[k] for k in ('success', 'info_type', 'timings_ms')}, ensure_ascii=False))
+    print(result['processed_data']['summary'])
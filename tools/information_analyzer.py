@@ -2,11 +2,16 @@
 # -*- coding: utf-8 -*-
 """
 TripMind Information Analyzer Tool
+
+输出模式: full 返回完整分析结果；compact 按 token 预算返回排序后的精简摘要（digest），
+完整推荐列表以 blob 引用携带，供 optimize_route 等工具读取而不进入提示词。
 """
 
+import asyncio
 import json
 import logging
-from typing import Dict, List, Any
+import os
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 from collections import Counter, defaultdict
 import re
@@ -19,9 +24,28 @@ except ImportError:
             return lambda f: f
         return func
 
+try:
+    from tools.blob_store import blob_store
+    from tools.opening_hours import parse_opening_hours
+    from tools.token_estimator import estimate_tokens, truncate_to_tokens
+    from tools.tool_executor import tool_executor
+    from tools.tracing import traced
+except ImportError:
+    from blob_store import blob_store
+    from opening_hours import parse_opening_hours
+    from token_estimator import estimate_tokens, truncate_to_tokens
+    from tool_executor import tool_executor
+    from tracing import traced
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_TOKEN_BUDGET = 800
+# compact 模式的最小预算：固定部分（blob 引用、budget 字段、分类统计）加一个条目约需 250 token，更小的预算按此裁剪并标记 over_budget
+MIN_TOKEN_BUDGET = 250
+# 异步分析的默认超时（秒），包括在进程池中排队的时间
+ANALYSIS_TIMEOUT_SECONDS = float(os.getenv('ANALYSIS_TIMEOUT_SECONDS', '60'))
+
 class InformationAnalyzer:
     def __init__(self):
         self.quality_weights = {
@@ -39,7 +63,19 @@ class InformationAnalyzer:
             'accessibility': 0.15
         }
     
-    def analyze_information(self, raw_data: List[Dict[str, Any]], analysis_type: str = "comprehensive") -> Dict[str, Any]:
+    @traced('analyze_information')
+    def analyze_information(self, raw_data: List[Dict[str, Any]], analysis_type: str = "comprehensive",
+                            output_mode: str = "full", token_budget: Optional[int] = None) -> Dict[str, Any]:
+        """
+        分析抓取数据
+
+        Args:
+            raw_data: 抓取的原始条目
+            analysis_type: 分析类型 comprehensive|quick|detailed
+            output_mode: full 完整结果 | compact 按 token_budget 裁剪的精简摘要
+            token_budget: compact 模式下 processed_data 的估算 token 上限（默认 DEFAULT_TOKEN_BUDGET，
+                最小 MIN_TOKEN_BUDGET）
+        """
         try:
             logger.info(f"Analyzing {len(raw_data)} items")
             if not raw_data:
@@ -60,8 +96,12 @@ class InformationAnalyzer:
                 'total_items_processed': len(raw_data),
                 'valid_items': len(cleaned_data),
                 'duplicates_removed': len(raw_data) - len(cleaned_data),
-                'analyzed_at': datetime.now().isoformat()
+                'analyzed_at': datetime.now().isoformat(),
+                'output_mode': output_mode
             }
+            if output_mode == 'compact':
+                analysis_result = self._compact_digest(cleaned_data, analysis_result, token_budget or DEFAULT_TOKEN_BUDGET)
+            analysis_metadata['estimated_tokens'] = estimate_tokens(analysis_result)
             
             return {
                 'success': True,
@@ -73,6 +113,23 @@ class InformationAnalyzer:
             logger.error(f"Analysis error: {str(e)}")
             return self._create_error_result(f"Analysis failed: {str(e)}")
     
+    @traced('analyze_information')
+    async def analyze_information_async(self, raw_data: Any, analysis_type: str = "comprehensive",
+                                        output_mode: str = "full", token_budget: Optional[int] = None,
+                                        timeout: Optional[float] = ANALYSIS_TIMEOUT_SECONDS) -> Dict[str, Any]:
+        """
+        在进程池中分析，不阻塞调用方的事件循环
+
+        raw_data 可以是 blob 引用，在子进程中才读取，大块数据不经过进程间传输。
+        超时返回错误结果；调用方取消时抛出 CancelledError，尚未开始的分析被撤销
+        """
+        try:
+            return await tool_executor.run_cpu(analyze_in_process, raw_data, analysis_type, output_mode, token_budget,
+                                               timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Analysis timed out after {timeout}s")
+            return self._create_error_result(f"Analysis timed out after {timeout}s")
+    
     def _clean_and_deduplicate(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         cleaned_data = []
         seen_items = set()
@@ -163,7 +220,11 @@ class InformationAnalyzer:
                 'score': score,
                 'reasons': self._generate_recommendation_reasons(item),
                 'highlights': item.get('tags', [])[:3],
-                'practical_info': item.get('opening_hours', '')
+                'practical_info': item.get('opening_hours', ''),
+                'rating': item.get('rating', 0),
+                'price': item.get('price'),
+                'duration': item.get('duration', ''),
+                'location': item.get('location')
             }
             scored_items.append(recommendation)
         scored_items.sort(key=lambda x: x['score'], reverse=True)
@@ -183,7 +244,10 @@ class InformationAnalyzer:
                 score += 0.8 * self.recommendation_weights['price_value']
         opening_hours = item.get('opening_hours', '')
         if opening_hours:
-            score += 0.7 * self.recommendation_weights['accessibility']
+            # 只解析文本；结构化的开放时间（dict / list）沿用固定分
+            schedule = parse_opening_hours(opening_hours) if isinstance(opening_hours, str) else None
+            accessibility = 0.4 + 0.6 * schedule.open_days / 7 if schedule and schedule.known else 0.7
+            score += accessibility * self.recommendation_weights['accessibility']
         return min(1.0, score)
     
     def _generate_recommendation_reasons(self, item: Dict[str, Any]) -> List[str]:
@@ -225,6 +289,124 @@ class InformationAnalyzer:
                 result[category] = items[:5]
         return result
     
+    def _compact_digest(self, data: List[Dict[str, Any]], analysis_result: Dict[str, Any],
+                        token_budget: int) -> Dict[str, Any]:
+        """
+        按 token 预算生成精简摘要
+
+        先放入必需部分（摘要、洞察、分类统计、完整推荐列表的 blob 引用），再按推荐分数依次加入
+        投影后的条目直到预算用完；必需部分本身超出预算时依次去掉分类代表条目、洞察、条目最少的分类，
+        最后截断摘要。预算低于 MIN_TOKEN_BUDGET 时按 MIN_TOKEN_BUDGET 裁剪；无论预算多少都保留分数最高的
+        条目。budget.over_budget 按调用方请求的预算判断，结果超出请求预算（包括被抬高到最小预算的情况）时为 True。
+        """
+        requested_budget = token_budget
+        token_budget = max(token_budget, MIN_TOKEN_BUDGET)
+        recommendations = analysis_result['top_recommendations']
+        compact = {
+            'summary': analysis_result['summary'],
+            'insights': list(analysis_result['insights']),
+            'categories': self._summarize_categories(data),
+            'digest': [],
+            # 完整列表不进入提示词，工具按引用读取
+            'top_recommendations': blob_store.offload(recommendations, threshold_bytes=0),
+        }
+        # 预留 budget 字段本身的位置，最终数值位数相近
+        budget = {'token_budget': token_budget, 'items': 0, 'omitted': len(recommendations),
+                  'estimated_tokens': token_budget, 'over_budget': False}
+        if requested_budget != token_budget:
+            budget['requested_budget'] = requested_budget
+        compact['budget'] = budget
+
+        # 收缩必需部分时给分数最高的条目留出位置
+        reserved = estimate_tokens(self._project_item(recommendations[0])) + 1 if recommendations else 0
+        used = estimate_tokens(compact)
+        for shrink in (self._drop_category_examples, self._drop_insight, self._drop_category, self._truncate_summary):
+            while used + reserved > token_budget and shrink(compact, used + reserved - token_budget):
+                used = estimate_tokens(compact)
+
+        for item in recommendations:
+            entry = self._project_item(item)
+            cost = estimate_tokens(entry) + 1
+            # 分数最高的条目总是保留，摘要不会只剩统计
+            if used + cost > token_budget and compact['digest']:
+                break
+            compact['digest'].append(entry)
+            used += cost
+        budget['items'] = len(compact['digest'])
+        budget['omitted'] = len(recommendations) - budget['items']
+        budget['estimated_tokens'] = estimate_tokens(compact)
+        budget['over_budget'] = budget['estimated_tokens'] > requested_budget
+        return compact
+
+    def _project_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """只保留排程和叙述需要的字段，值缩写为短文本，空字段省略"""
+        # "09:00-17:00" -> "9-17"
+        hours = re.sub(r'\b0?(\d{1,2}):00\b', r'\1', str(item.get('practical_info') or ''))
+        entry = {
+            'name': truncate_to_tokens(str(item.get('name', '')), 12),
+            'type': item.get('type', ''),
+            'score': round(item.get('score', 0), 2),
+            'rating': round(item['rating'], 1) if item.get('rating') else None,
+            'price': self._abbreviate_price(item.get('price')),
+            'hours': truncate_to_tokens(hours, 10),
+            'duration': item.get('duration') or None,
+            'why': ', '.join(item.get('reasons') or []) or None,
+        }
+        return {key: value for key, value in entry.items() if value not in (None, '', [])}
+
+    def _abbreviate_price(self, price: Any) -> Optional[str]:
+        if not isinstance(price, dict):
+            return None
+        amount = price.get('amount', 0)
+        if amount == 0:
+            return 'free' if price.get('text') != 'Unknown' else None
+        return f"{amount:g} {price.get('currency', '')}".strip()
+
+    def _summarize_categories(self, data: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """分类只保留数量、平均评分和评分最高的两个名称"""
+        categories = defaultdict(list)
+        for item in data:
+            categories[item.get('type', 'Other')].append(item)
+        summary = {}
+        for category, items in sorted(categories.items(), key=lambda entry: -len(entry[1])):
+            ratings = [item['rating'] for item in items if item.get('rating', 0) > 0]
+            best = sorted(items, key=lambda item: item.get('rating', 0), reverse=True)[:2]
+            summary[category] = {
+                'count': len(items),
+                'avg_rating': round(sum(ratings) / len(ratings), 1) if ratings else None,
+                'examples': [truncate_to_tokens(str(item['name']), 8) for item in best],
+            }
+        return summary
+
+    def _drop_category_examples(self, compact: Dict[str, Any], excess: int) -> bool:
+        for category in reversed(list(compact['categories'])):
+            if compact['categories'][category].get('examples'):
+                compact['categories'][category].pop('examples')
+                return True
+        return False
+
+    def _drop_insight(self, compact: Dict[str, Any], excess: int) -> bool:
+        if compact['insights']:
+            compact['insights'].pop()
+            return True
+        return False
+
+    def _drop_category(self, compact: Dict[str, Any], excess: int) -> bool:
+        # 分类按数量降序排列，去掉最后（最少）的一个，至少保留一个
+        if len(compact['categories']) > 1:
+            compact['categories'].pop(list(compact['categories'])[-1])
+            return True
+        return False
+
+    def _truncate_summary(self, compact: Dict[str, Any], excess: int) -> bool:
+        summary = compact['summary']
+        target = max(estimate_tokens(summary) - excess, 0)
+        shortened = truncate_to_tokens(summary, target)
+        if shortened == summary:
+            return False
+        compact['summary'] = shortened
+        return True
+
     def _assess_quality(self, cleaned_data: List[Dict[str, Any]], raw_data: List[Dict[str, Any]]) -> Dict[str, float]:
         if not raw_data:
             return {'data_completeness': 0.0, 'source_reliability': 0.0, 'information_freshness': 0.0, 'overall_quality': 0.0}
@@ -258,12 +440,36 @@ class InformationAnalyzer:
 
 analyzer = InformationAnalyzer()
 
+def analyze_in_process(raw_data: Any, analysis_type: str = "comprehensive", output_mode: str = "full",
+                       token_budget: Optional[int] = None) -> Dict[str, Any]:
+    """进程池入口（模块级函数才能 pickle）：在子进程中解析 blob 引用并分析"""
+    return analyzer.analyze_information(blob_store.resolve(raw_data), analysis_type, output_mode, token_budget)
+
 @tool(name="analyze_information", description="Analyze scraped travel information")
-def analyze_information(raw_data: List[Dict[str, Any]], analysis_type: str = "comprehensive") -> str:
-    result = analyzer.analyze_information(raw_data, analysis_type)
+def analyze_information(raw_data: List[Dict[str, Any]], analysis_type: str = "comprehensive",
+                        output_mode: str = "full", token_budget: Optional[int] = None) -> str:
+    result = analyzer.analyze_information(blob_store.resolve(raw_data), analysis_type, output_mode, token_budget)
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+@tool(name="analyze_information_async", description="Analyze scraped travel information in a worker process without blocking the agent (supports timeout_seconds)")
+async def analyze_information_async(raw_data: List[Dict[str, Any]], analysis_type: str = "comprehensive",
+                                    output_mode: str = "full", token_budget: Optional[int] = None,
+                                    timeout_seconds: float = ANALYSIS_TIMEOUT_SECONDS) -> str:
+    result = await analyzer.analyze_information_async(raw_data, analysis_type, output_mode, token_budget,
+                                                      timeout=timeout_seconds)
     return json.dumps(result, ensure_ascii=False, indent=2)
 
 if __name__ == "__main__":
     test_data = [{'name': 'Test Museum', 'type': 'Museum', 'rating': 4.5, 'price': {'amount': 0, 'currency': 'CNY', 'text': 'Free'}, 'tags': ['culture', 'history']}]
     result = analyze_information(test_data)
     print(result)
+
+    catalog = [{'name': f'Spot {i}', 'type': ['Museum', 'Temple', 'Park'][i % 3], 'rating': 3.5 + (i % 10) / 7,
+                'price': {'amount': (i % 4) * 500, 'currency': 'JPY'}, 'opening_hours': '09:00-17:00',
+                'tags': ['culture'], 'location': {'address': f'{i} Chome', 'lat': 35.7, 'lng': 139.7}}
+               for i in range(40)]
+    full = analyzer.analyze_information(catalog)
+    print('full processed_data tokens:', estimate_tokens(full['processed_data']))
+    for budget in (150, 400, 800):
+        compact = analyzer.analyze_information(catalog, output_mode='compact', token_budget=budget)
+        print(budget, '->', compact['processed_data']['budget'])
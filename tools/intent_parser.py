@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Intent Parser
+规则意图解析 - 用 jieba 分词、目的地词表和正则抽取目的地、天数、预算、人数和偏好，并给出置信度
+
+置信度足够时直接生成结构化意图，跳过一次 LLM 调用；置信度低（缺少目的地、存在歧义等）时
+交给 LLM 解析，已抽取的字段作为提示一并传递。未安装 jieba 时退化为子串匹配。
+"""
+
+import json
+import re
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime
+
+try:
+    from openagents import tool
+except ImportError:
+    def tool(func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+try:
+    import jieba
+    JIEBA_AVAILABLE = True
+except ImportError:
+    jieba = None
+    JIEBA_AVAILABLE = False
+
+try:
+    from tools.group_preference import PREFERENCE_CATEGORIES
+    from tools.health_filter import CONDITION_MARKERS
+except ImportError:
+    from group_preference import PREFERENCE_CATEGORIES
+    from health_filter import CONDITION_MARKERS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 目的地词表: 名称 -> (国家, 所属地区)；所属地区用于区分"云南 + 大理"（同一行程）和"北京 + 上海"（多地）
+DESTINATIONS = {
+    '云南': ('中国', None), '昆明': ('中国', '云南'), '大理': ('中国', '云南'), '丽江': ('中国', '云南'),
+    '西双版纳': ('中国', '云南'), '香格里拉': ('中国', '云南'), '四川': ('中国', None), '成都': ('中国', '四川'),
+    '九寨沟': ('中国', '四川'), '峨眉山': ('中国', '四川'), '乐山': ('中国', '四川'), '重庆': ('中国', None),
+    '北京': ('中国', None), '上海': ('中国', None), '天津': ('中国', None), '西安': ('中国', '陕西'),
+    '陕西': ('中国', None), '浙江': ('中国', None), '杭州': ('中国', '浙江'), '乌镇': ('中国', '浙江'),
+    '江苏': ('中国', None), '南京': ('中国', '江苏'), '苏州': ('中国', '江苏'), '广东': ('中国', None),
+    '广州': ('中国', '广东'), '深圳': ('中国', '广东'), '广西': ('中国', None), '桂林': ('中国', '广西'),
+    '阳朔': ('中国', '广西'), '海南': ('中国', None), '三亚': ('中国', '海南'), '福建': ('中国', None),
+    '厦门': ('中国', '福建'), '鼓浪屿': ('中国', '福建'), '山东': ('中国', None), '青岛': ('中国', '山东'),
+    '西藏': ('中国', None), '拉萨': ('中国', '西藏'), '新疆': ('中国', None), '乌鲁木齐': ('中国', '新疆'),
+    '湖南': ('中国', None), '长沙': ('中国', '湖南'), '张家界': ('中国', '湖南'), '凤凰古城': ('中国', '湖南'),
+    '安徽': ('中国', None), '黄山': ('中国', '安徽'), '贵州': ('中国', None), '贵阳': ('中国', '贵州'),
+    '内蒙古': ('中国', None), '呼伦贝尔': ('中国', '内蒙古'), '黑龙江': ('中国', None), '哈尔滨': ('中国', '黑龙江'),
+    '青海': ('中国', None), '甘肃': ('中国', None), '敦煌': ('中国', '甘肃'), '香港': ('中国', None),
+    '澳门': ('中国', None), '台湾': ('中国', None), '台北': ('中国', '台湾'),
+    '日本': ('日本', None), '东京': ('日本', '日本'), '大阪': ('日本', '日本'), '京都': ('日本', '日本'),
+    '北海道': ('日本', '日本'), '冲绳': ('日本', '日本'), '韩国': ('韩国', None), '首尔': ('韩国', '韩国'),
+    '济州岛': ('韩国', '韩国'), '泰国': ('泰国', None), '曼谷': ('泰国', '泰国'), '清迈': ('泰国', '泰国'),
+    '普吉岛': ('泰国', '泰国'), '新加坡': ('新加坡', None), '马来西亚': ('马来西亚', None), '越南': ('越南', None),
+    '巴厘岛': ('印度尼西亚', None), '马尔代夫': ('马尔代夫', None), '法国': ('法国', None), '巴黎': ('法国', '法国'),
+    '英国': ('英国', None), '伦敦': ('英国', '英国'), '意大利': ('意大利', None), '罗马': ('意大利', '意大利'),
+    '美国': ('美国', None), '纽约': ('美国', '美国'), '澳大利亚': ('澳大利亚', None), '悉尼': ('澳大利亚', '澳大利亚'),
+}
+
+# 英文名 -> 词表名称
+DESTINATION_ALIASES = {
+    'yunnan': '云南', 'kunming': '昆明', 'dali': '大理', 'lijiang': '丽江', 'chengdu': '成都', 'chongqing': '重庆',
+    'beijing': '北京', 'shanghai': '上海', "xi'an": '西安', 'xian': '西安', 'hangzhou': '杭州', 'suzhou': '苏州',
+    'guilin': '桂林', 'sanya': '三亚', 'xiamen': '厦门', 'lhasa': '拉萨', 'hong kong': '香港', 'macau': '澳门',
+    'taipei': '台北', 'japan': '日本', 'tokyo': '东京', 'osaka': '大阪', 'kyoto': '京都', 'korea': '韩国',
+    'seoul': '首尔', 'thailand': '泰国', 'bangkok': '曼谷', 'chiang mai': '清迈', 'phuket': '普吉岛',
+    'singapore': '新加坡', 'bali': '巴厘岛', 'paris': '巴黎', 'london': '伦敦', 'rome': '罗马',
+    'new york': '纽约', 'sydney': '悉尼',
+}
+
+CN_DIGITS = {'零': 0, '〇': 0, '一': 1, '二': 2, '两': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+CN_UNITS = {'十': 10, '百': 100, '千': 1000, '万': 10000}
+NUM = r'(\d+(?:\.\d+)?|[零〇一二两三四五六七八九十百千万]+)'
+
+DATE_PATTERN = re.compile(r'(\d{4}[-/年])?\d{1,2}月(\d{1,2}[日号])?(?:\s*[-到至~]\s*(\d{1,2}月)?\d{1,2}[日号])?'
+                          r'|\d{4}-\d{1,2}-\d{1,2}')
+DATE_WORDS = ['春节', '国庆', '五一', '元旦', '清明', '端午', '中秋', '暑假', '寒假', '毕业后', '周末', '下周',
+              '下个月', '明年', '今年', '年底', '月底', '月初', '春天', '夏天', '秋天', '冬天']
+DURATION_PATTERNS = [
+    (re.compile(NUM + r'\s*个?\s*(?:天|日游)'), 1),
+    (re.compile(NUM + r'\s*个?\s*(?:星期|周)(?!末)'), 7),
+    (re.compile(r'(\d+)\s*(?:-\s*)?days?\b', re.I), 1),
+    (re.compile(r'(\d+)\s*(?:-\s*)?weeks?\b', re.I), 7),
+]
+NIGHTS_PATTERN = re.compile(NUM + r'\s*(?:晚|夜)|(\d+)\s*nights?\b', re.I)
+BUDGET_PATTERN = re.compile(
+    r'(?:(预算|花费|费用|budget|人均|每人|一人)[^\d零一二两三四五六七八九十$¥￥。，,.]{0,6})?'
+    r'([$¥￥])?\s*' + NUM + r'\s*(万|千|k\b|K\b)?\s*'
+    r'(元|块|人民币|rmb|RMB|美元|美金|刀|dollars?|USD|usd|日元|円|yen)?', re.I)
+PER_PERSON_WORDS = ['每人', '人均', '一人', '每个人', 'per person', 'each', 'pp']
+APPROXIMATE_WORDS = ['左右', '大概', '大约', '约', '以内', '上下', 'around', 'about']
+STRICT_WORDS = ['以内', '不超过', '最多', '封顶', 'at most', 'max']
+COUNTED_PEOPLE = re.compile(NUM + r'\s*(?:个|位|名)\s*[一-龥]{0,4}?'
+                            r'(人|同学|朋友|同事|家人|伙伴|闺蜜|兄弟|姐妹|室友|老人|大人|成人|小孩|孩子|儿童)')
+BARE_PEOPLE = re.compile(NUM + r'\s*(?:人|口)(?![均民])')
+ENGLISH_PEOPLE = re.compile(r'(\d+)\s*(?:people|persons|travell?ers|adults|friends|of us)\b', re.I)
+FAMILY_PATTERN = re.compile(r'一家' + NUM + r'口')
+AGE_PATTERN = re.compile(r'(\d{1,3})\s*岁')
+GROUP_WORDS = {
+    'Friends': ['同学', '朋友', '同事', '闺蜜', '兄弟', '室友', '伙伴', 'friends', 'classmates', 'colleagues'],
+    'Family': ['家人', '一家', '父母', '爸妈', '孩子', '小孩', '老人', 'family', 'kids', 'parents'],
+    'Couple': ['情侣', '夫妻', '老婆', '老公', '女朋友', '男朋友', '对象', '蜜月', 'couple', 'honeymoon', 'wife', 'husband'],
+    'Solo': ['一个人', '独自', '自己去', 'solo', 'alone', 'by myself'],
+}
+PACE_WORDS = {
+    'Leisurely': ['不太累', '太累', '轻松', '休闲', '慢节奏', '悠闲', '不赶', '放松', 'relaxed', 'leisurely', 'slow'],
+    'Fast-paced': ['特种兵', '紧凑', '多去几个', '打卡', 'packed', 'fast-paced'],
+}
+QUESTION_WORDS = ['去哪', '哪里', '推荐', '建议', '什么地方', '?', '？', 'where', 'recommend', 'suggest']
+NEGATIONS = ['不', '没', '别', '讨厌', '不想', '不喜欢', "don't", 'not', 'no ']
+
+# 各字段对置信度的贡献，目的地和天数决定能否直接开始规划
+FIELD_WEIGHTS = {'destination': 0.35, 'days': 0.25, 'budget': 0.15, 'travelers': 0.15, 'preferences': 0.10}
+DEFAULT_THRESHOLD = 0.7
+
+
+def cn_to_number(text: str) -> Optional[float]:
+    """阿拉伯数字或中文数字（如 六、十五、两万、三千五）转为数值"""
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    total, section, digit, last_unit = 0, 0, None, 1
+    for char in text:
+        if char in CN_DIGITS:
+            digit = CN_DIGITS[char]
+        elif char in CN_UNITS:
+            unit = CN_UNITS[char]
+            if unit == 10000:
+                total += (section + (digit or 0)) * unit
+                section = 0
+            else:
+                section += (1 if digit is None else digit) * unit
+            digit, last_unit = None, unit
+        else:
+            return None
+    if digit and last_unit >= 100 and text[-2] in CN_UNITS:
+        # 口语省略末位单位: "一万五" = 15000, "三千五" = 3500
+        digit *= last_unit // 10
+    return float(total + section + (digit or 0))
+
+
+class IntentParser:
+    """确定性意图抽取，输出与 user-intent-agent 相同的 parsed_intent 结构并附带置信度"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._keyword_index = {
+            keyword: category
+            for category, keywords in PREFERENCE_CATEGORIES.items()
+            for keyword in keywords
+        }
+        self._ready = False
+
+    def warm_up(self):
+        """加载 jieba 词典并加入目的地和偏好词，首次分词约需 1 秒"""
+        if self._ready:
+            return
+        if JIEBA_AVAILABLE:
+            jieba.setLogLevel(logging.WARNING)
+            for word in list(DESTINATIONS) + list(self._keyword_index):
+                if re.search(r'[一-龥]', word):
+                    jieba.add_word(word, freq=20000)
+            jieba.initialize()
+        self._ready = True
+
+    def tokenize(self, text: str) -> List[str]:
+        self.warm_up()
+        if JIEBA_AVAILABLE:
+            return [token for token in jieba.lcut(text) if token.strip()]
+        # 没有分词器时不切分中文，单字关键词（山、湖）因此不会误匹配地名中的字
+        return re.findall(r'[A-Za-z]+|\d+', text)
+
+    def parse(self, text: str) -> Dict[str, Any]:
+        """
+        解析用户旅行请求
+
+        Returns:
+            {'parsed_intent': {...}, 'confidence': 0-1, 'use_llm': bool, 'missing': [...], 'ambiguities': [...]}
+        """
+        text = (text or '').strip()
+        tokens = self.tokenize(text)
+        lowered = text.lower()
+
+        destination, nearby, origin, ambiguities = self._extract_destinations(text, tokens)
+        date_text, masked = self._extract_dates(text)
+        days = self._extract_days(masked) or self._days_from_dates(date_text)
+        budget = self._extract_budget(masked)
+        travelers, ages = self._extract_travelers(masked, lowered)
+        interests, categories, dislikes = self._extract_preferences(text, tokens)
+        requirements = [marker for marker, words in CONDITION_MARKERS.items()
+                        if any(word in lowered for word in words)]
+        group_type = self._group_type(lowered, travelers)
+        pace = next((pace for pace, words in PACE_WORDS.items() if any(word in lowered for word in words)), None)
+
+        if budget and travelers and budget['per_person'] is not None:
+            budget['total'] = budget['amount'] * travelers if budget['per_person'] else budget['amount']
+        if budget:
+            budget['level'] = self._budget_level(budget, days, travelers)
+
+        found = {'destination': destination, 'days': days, 'budget': budget, 'travelers': travelers,
+                 'preferences': interests}
+        confidence = sum(weight for field, weight in FIELD_WEIGHTS.items() if found[field])
+        if not destination and any(word in lowered for word in QUESTION_WORDS):
+            ambiguities.append('asks for a destination recommendation')
+        confidence *= 0.75 ** len(ambiguities)
+        if len(text) > 200:
+            # 长文本通常有规则抓不住的细节
+            confidence *= 0.9
+        if not destination:
+            confidence = min(confidence, 0.5)
+        confidence = round(confidence, 2)
+
+        parsed_intent = {
+            'destination': destination or 'not specified',
+            'nearby_cities': nearby,
+            'origin': origin,
+            'country': DESTINATIONS[destination][0] if destination in DESTINATIONS else None,
+            'duration': f'{days}天' if days else 'not specified',
+            'days': days,
+            'dates': date_text or 'flexible',
+            'budget': self._describe_budget(budget) if budget else 'not specified',
+            'budget_amount': budget['amount'] if budget else None,
+            'budget_currency': budget['currency'] if budget else None,
+            'budget_per_person': budget['per_person'] if budget else None,
+            'budget_total': budget.get('total') if budget else None,
+            'budget_level': budget['level'] if budget else None,
+            'budget_flexibility': budget['flexibility'] if budget else None,
+            'travelers': travelers or 'not specified',
+            'group_type': group_type,
+            'ages': ages,
+            'preferences': interests,
+            'interest_categories': categories,
+            'dislikes': dislikes,
+            'requirements': requirements,
+            'travel_style': pace or 'Moderate',
+            'members': [],
+            'parser': 'rules',
+        }
+        return {
+            'parsed_intent': parsed_intent,
+            'confidence': confidence,
+            'use_llm': confidence < self.threshold,
+            'missing': [field for field, value in found.items() if not value],
+            'ambiguities': ambiguities,
+            'segmenter': 'jieba' if JIEBA_AVAILABLE else 'characters',
+            'parsed_at': datetime.now().isoformat(),
+        }
+
+    # ---- 抽取 ----
+
+    def _extract_destinations(self, text: str, tokens: List[str]) -> Tuple[Optional[str], List[str], Optional[str], List[str]]:
+        """按出现顺序找出目的地，去掉出发地和否定的地点；返回 (主目的地, 同区域的其他地点, 出发地, 歧义)"""
+        mentions = []
+        for name in DESTINATIONS:
+            for match in re.finditer(re.escape(name), text):
+                mentions.append((match.start(), match.end(), name))
+        lowered = text.lower()
+        for alias, name in DESTINATION_ALIASES.items():
+            for match in re.finditer(r'\b' + re.escape(alias) + r'\b', lowered):
+                mentions.append((match.start(), match.end(), name))
+        # 长名称优先（"西双版纳" 不再单独算 "版纳"，"凤凰古城" 优先于其中的子串）
+        mentions.sort(key=lambda mention: (mention[0], -(mention[1] - mention[0])))
+        accepted, covered_until = [], -1
+        for start, end, name in mentions:
+            if start < covered_until:
+                continue
+            accepted.append((start, end, name))
+            covered_until = end
+        if JIEBA_AVAILABLE and tokens:
+            # 只接受分词后独立成词的地点，避免 "大理石" 之类的误匹配
+            token_set = set(tokens)
+            accepted = [mention for mention in accepted
+                        if mention[2] in token_set or not re.search(r'[一-龥]', mention[2])
+                        or text[mention[0]:mention[1]] != mention[2]]
+
+        origin, places, ambiguities = None, [], []
+        for start, end, name in accepted:
+            before, after = text[max(0, start - 3):start], text[end:end + 3]
+            if '从' in before or after.startswith(('出发', '飞', '坐')) or 'from' in lowered[max(0, start - 6):start]:
+                origin = origin or name
+            elif any(word in before for word in ('不去', '不想去', '除了', '别去')):
+                continue
+            elif name not in places:
+                places.append(name)
+        if not places:
+            return None, [], origin, ambiguities
+
+        primary = places[0]
+        # 省份/国家与其下属城市同时出现时，以最上层地区为主目的地
+        regions = {DESTINATIONS[name][1] for name in places if DESTINATIONS[name][1]}
+        for name in places:
+            if DESTINATIONS[name][1] is None and name in regions:
+                primary = name
+                break
+        region = DESTINATIONS[primary][1] or primary
+        nearby = [name for name in places if name != primary]
+        unrelated = [name for name in nearby if (DESTINATIONS[name][1] or name) != region]
+        if unrelated:
+            ambiguities.append(f"several destinations: {', '.join([primary] + unrelated)}")
+        return primary, nearby, origin, ambiguities
+
+    def _extract_dates(self, text: str) -> Tuple[Optional[str], str]:
+        """返回日期描述，以及去掉日期后的文本（避免 "10月1日" 被当成天数）"""
+        parts = [match.group(0) for match in DATE_PATTERN.finditer(text)]
+        masked = DATE_PATTERN.sub(' ', text)
+        parts += [word for word in DATE_WORDS if word in text]
+        return ('、'.join(parts) if parts else None), masked
+
+    def _days_from_dates(self, date_text: Optional[str]) -> Optional[int]:
+        """"10月1日到10月5日" -> 5 天（同一年内，按首尾日期计算）"""
+        days = re.findall(r'(?:(\d{1,2})月)?(\d{1,2})[日号]', date_text or '')
+        if len(days) < 2 or not days[0][0]:
+            return None
+        try:
+            start = datetime(2000, int(days[0][0]), int(days[0][1]))
+            end = datetime(2000, int(days[1][0] or days[0][0]), int(days[1][1]))
+        except ValueError:
+            return None
+        span = (end - start).days + 1
+        return span if 0 < span <= 60 else None
+
+    def _extract_days(self, text: str) -> Optional[int]:
+        for pattern, multiplier in DURATION_PATTERNS:
+            for match in pattern.finditer(text):
+                value = cn_to_number(match.group(1))
+                if value and 0 < value * multiplier <= 60:
+                    return int(value * multiplier)
+        match = NIGHTS_PATTERN.search(text)
+        if match:
+            value = cn_to_number(match.group(1) or match.group(2))
+            if value and 0 < value <= 60:
+                return int(value) + 1
+        return None
+
+    def _extract_budget(self, text: str) -> Optional[Dict[str, Any]]:
+        """只接受带预算关键词、货币符号或货币单位的数字"""
+        for match in BUDGET_PATTERN.finditer(text):
+            keyword, symbol, number, multiplier, unit = match.groups()
+            if not (keyword or symbol or unit):
+                continue
+            value = cn_to_number(number)
+            if not value:
+                continue
+            value *= {'万': 10000, '千': 1000, 'k': 1000}.get((multiplier or '').lower(), 1)
+            if value < 50:
+                continue
+            currency = 'CNY'
+            if symbol == '$' or (unit or '').lower() in ('美元', '美金', '刀', 'dollar', 'dollars', 'usd'):
+                currency = 'USD'
+            elif (unit or '').lower() in ('日元', '円', 'yen'):
+                currency = 'JPY'
+            window = text[max(0, match.start() - 8):match.end() + 8].lower()
+            return {
+                'amount': value,
+                'currency': currency,
+                'per_person': True if any(word in window for word in PER_PERSON_WORDS) else
+                              (False if '总' in window or 'total' in window else None),
+                'flexibility': 'Strict' if any(word in window for word in STRICT_WORDS) else
+                               ('Flexible' if any(word in window for word in APPROXIMATE_WORDS) else 'not specified'),
+                'text': match.group(0).strip(),
+            }
+        return None
+
+    def _extract_travelers(self, text: str, lowered: str) -> Tuple[Optional[int], List[int]]:
+        ages = [int(age) for age in AGE_PATTERN.findall(text) if 0 < int(age) < 110]
+        counts = {}
+        for match in COUNTED_PEOPLE.finditer(text):
+            counts[match.group(2)] = counts.get(match.group(2), 0) + int(cn_to_number(match.group(1)) or 0)
+        adults = sum(count for role, count in counts.items() if role in ('大人', '成人', '老人'))
+        children = sum(count for role, count in counts.items() if role in ('小孩', '孩子', '儿童'))
+        if adults or children:
+            # "2大人2小孩" 这类分项计数
+            return adults + children, ages
+        adult_child = re.findall(NUM + r'\s*(?:个|位|名)?\s*(大人|成人|小孩|孩子|儿童)', text)
+        if adult_child:
+            return int(sum(cn_to_number(number) or 0 for number, _ in adult_child)), ages
+        if counts:
+            return int(max(counts.values())), ages
+        match = FAMILY_PATTERN.search(text) or ENGLISH_PEOPLE.search(lowered)
+        if match:
+            return int(cn_to_number(match.group(1))), ages
+        for match in BARE_PEOPLE.finditer(text):
+            # "每人"、"一人 5000" 是预算单位，不是人数
+            if text[max(0, match.start() - 1):match.start()] in ('每', '均'):
+                continue
+            value = cn_to_number(match.group(1))
+            if value and 2 <= value <= 100:
+                return int(value), ages
+        if any(word in lowered for word in GROUP_WORDS['Couple']):
+            return 2, ages
+        if any(word in lowered for word in GROUP_WORDS['Solo']):
+            return 1, ages
+        return None, ages
+
+    def _extract_preferences(self, text: str, tokens: List[str]) -> Tuple[List[str], List[str], List[str]]:
+        """返回 (用户原话中的兴趣词, 标准类别, 不喜欢的类别)；单字关键词只按完整分词匹配"""
+        token_set = set(tokens)
+        lowered = text.lower()
+        interests, categories, dislikes = [], [], []
+        for keyword, category in sorted(self._keyword_index.items(), key=lambda entry: -len(entry[0])):
+            if len(keyword) == 1:
+                if keyword not in token_set:
+                    continue
+                position = text.find(keyword)
+            else:
+                position = lowered.find(keyword.lower())
+                if position < 0:
+                    continue
+            if any(keyword in interest for interest in interests):
+                continue
+            before = lowered[max(0, position - 4):position]
+            if any(negation in before for negation in NEGATIONS):
+                if category not in dislikes:
+                    dislikes.append(category)
+                continue
+            interests.append(keyword)
+            if category not in categories:
+                categories.append(category)
+        interests.sort(key=lambda keyword: lowered.find(keyword.lower()))
+        return interests, [category for category in categories if category not in dislikes], dislikes
+
+    # ---- 归纳 ----
+
+    def _group_type(self, lowered: str, travelers: Optional[int]) -> str:
+        if travelers == 1:
+            return 'Solo'
+        for group_type in ('Family', 'Couple', 'Friends'):
+            if any(word in lowered for word in GROUP_WORDS[group_type]):
+                return group_type
+        return 'Couple' if travelers == 2 else ('Group' if travelers else 'not specified')
+
+    def _budget_level(self, budget: Dict[str, Any], days: Optional[int], travelers: Optional[int]) -> str:
+        """按人均每天花费（折合人民币）划分档次"""
+        amount = budget['amount'] * {'USD': 7.2, 'JPY': 0.048}.get(budget['currency'], 1.0)
+        if budget['per_person'] is not True and travelers:
+            amount /= travelers
+        per_day = amount / (days or 5)
+        if per_day < 500:
+            return 'Economy'
+        return 'Standard' if per_day < 1500 else 'Luxury'
+
+    def _describe_budget(self, budget: Dict[str, Any]) -> str:
+        scope = {True: ' per person', False: ' total'}.get(budget['per_person'], '')
+        return f"{budget['amount']:g} {budget['currency']}{scope}"
+
+# 全局解析器实例
+intent_parser = IntentParser()
+
+@tool(name="parse_travel_intent", description="Extract destination, days, budget, travelers and preferences from a travel request with a confidence score")
+def parse_travel_intent(user_message: str) -> str:
+    result = intent_parser.parse(user_message)
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    samples = [
+        '我们是6个大学同学想在毕业后一起去云南旅行7天，预算每人5000元。我们有不同的偏好：有人喜欢徒步，有人喜欢拍照，有人喜欢美食。',
+        '我想和家人（2大人2小孩，孩子分别是8岁和5岁）在春节期间去成都玩5天，预算2万元左右。我们喜欢美食和文化体验，不太喜欢太累的行程。',
+        'I want to travel to Tokyo for 5 days with a budget of $3000. I like temples, museums, and local food.',
+        '国庆想出去玩，有什么推荐的地方吗？',
+        '从上海出发，10月1日到10月5日去北京和西安，两个人，预算一万五',
+    ]
+    for sample in samples:
+        result = intent_parser.parse(sample)
+        intent = result['parsed_intent']
+        print(f"{result['confidence']:.2f} llm={result['use_llm']} | {intent['destination']} {intent['nearby_cities']} "
+              f"{intent['days']}d {intent['budget']} x{intent['travelers']} {intent['group_type']} "
+              f"{intent['preferences']} dates={intent['dates']} req={intent['requirements']} "
+              f"missing={result['missing']} {result['ambiguities']}")
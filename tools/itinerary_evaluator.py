@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Itinerary Evaluator Tool
+候选行程批量评估工具 - 在进程池中并行计算成本、强度、交通和偏好匹配指标，并按综合得分排序
+"""
+
+import json
+import math
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+
+try:
+    from openagents import tool
+except ImportError:
+    def tool(func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+try:
+    from tools.health_filter import PoiFeatures
+except ImportError:
+    from health_filter import PoiFeatures
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INTENSITY_LEVELS = {'低': 0, 'low': 0, '中': 1, '中等': 1, 'medium': 1, '高': 2, 'high': 2}
+FATIGUE_LEVELS = {'低': 20, '较低': 35, '中等': 50, '一般': 50, '较高': 70, '高': 85, 'low': 20, 'medium': 50, 'high': 85}
+
+# 工作进程内的只读共享数据，由进程池 initializer 写入一次
+_SHARED = {'catalog': {}, 'speed_kmh': 25.0}
+
+
+def _init_worker(pois: List[Dict[str, Any]], speed_kmh: float):
+    """进程池初始化：每个工作进程只接收一次 POI 目录，之后的任务只传候选行程"""
+    _SHARED['catalog'] = {poi.get('name'): poi for poi in pois if poi.get('name')}
+    _SHARED['speed_kmh'] = speed_kmh
+
+
+def _evaluate_chunk(chunk: List[Any]) -> List[Dict[str, Any]]:
+    return [_candidate_metrics(position, candidate) for position, candidate in chunk]
+
+
+def _candidate_metrics(position: int, candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """计算单个候选的原始指标（成本、强度、游览时长、交通时间、文本特征）"""
+    catalog = _SHARED['catalog']
+    days = _candidate_days(candidate)
+    cost = visit_minutes = travel_minutes = weighted_intensity = peak_intensity = 0.0
+    texts, item_count = [], 0
+    for items in days:
+        previous = None
+        for raw in items:
+            item = dict(catalog.get(raw.get('name'), {}), **raw)
+            features = PoiFeatures(item)
+            minutes = _item_minutes(item, features)
+            intensity = INTENSITY_LEVELS.get(str(item.get('intensity', '')).strip().lower(), features.intensity)
+            cost += _item_cost(item)
+            visit_minutes += minutes
+            weighted_intensity += intensity * minutes
+            peak_intensity = max(peak_intensity, intensity)
+            travel_minutes += _travel_minutes(previous, item)
+            texts.append(features.text + ' ' + str(item.get('description', '')).lower())
+            previous = item
+            item_count += 1
+    return {
+        'position': position,
+        'id': candidate.get('option_id') or candidate.get('id') or candidate.get('name') or f"candidate_{position + 1}",
+        'items': item_count,
+        'days': len(days),
+        'cost_per_person': round(cost, 2),
+        'visit_minutes': round(visit_minutes),
+        'travel_minutes': round(travel_minutes),
+        'avg_intensity': round(weighted_intensity / visit_minutes, 3) if visit_minutes else 0.0,
+        'peak_intensity': peak_intensity,
+        'text': ' '.join(texts)
+    }
+
+
+def _candidate_days(candidate: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    """候选可以是 optimize_route/repair_itinerary 的行程、活动列表或投票选项"""
+    if isinstance(candidate.get('itinerary'), dict):
+        candidate = candidate['itinerary']
+    if isinstance(candidate.get('days'), list):
+        return [[_as_item(item) for item in day.get('items', [])] for day in candidate['days']]
+    if isinstance(candidate.get('items'), list):
+        return [[_as_item(item) for item in candidate['items']]]
+    return [[candidate]]
+
+
+def _as_item(item: Any) -> Dict[str, Any]:
+    return item if isinstance(item, dict) else {'name': str(item)}
+
+
+def _item_cost(item: Dict[str, Any]) -> float:
+    for key in ('cost_per_person', 'price'):
+        value = item.get(key)
+        if isinstance(value, dict):
+            value = value.get('amount')
+        if isinstance(value, (int, float)):
+            return float(value)
+    return 0.0
+
+
+def _item_minutes(item: Dict[str, Any], features: PoiFeatures) -> float:
+    if item.get('start') and item.get('end'):
+        start, end = (int(h) * 60 + int(m) for h, m in (str(item[k]).split(':') for k in ('start', 'end')))
+        return max(end - start, 0)
+    duration = item.get('estimated_duration', item.get('duration'))
+    if duration is not None and features.duration is None:
+        features.duration = features._parse_duration(duration)
+    return features.duration or 90
+
+
+def _travel_minutes(previous: Optional[Dict[str, Any]], item: Dict[str, Any]) -> float:
+    """优先使用排程结果中的 travel_minutes，否则按坐标直线距离估算"""
+    if isinstance(item.get('travel_minutes'), (int, float)):
+        return float(item['travel_minutes'])
+    if previous is None:
+        return 0.0
+    a, b = previous.get('location'), item.get('location')
+    if not (isinstance(a, dict) and isinstance(b, dict) and None not in (a.get('lat'), a.get('lng'), b.get('lat'), b.get('lng'))):
+        return 0.0
+    lat1, lng1, lat2, lng2 = map(math.radians, (a['lat'], a['lng'], b['lat'], b['lng']))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    km = 2 * 6371.0 * math.asin(math.sqrt(min(h, 1.0)))
+    return km / _SHARED['speed_kmh'] * 60.0
+
+
+class ItineraryEvaluator:
+    """候选行程批量评估器：工作进程计算指标，主进程按批次归一化并排序"""
+
+    def __init__(self):
+        self.defaults = {
+            'weights': {'cost': 0.3, 'intensity': 0.25, 'travel': 0.2, 'preference': 0.25},
+            'max_workers': None,
+            'chunk_size': 32,
+            # 候选数量低于该值时在当前进程内评估，避免进程启动开销
+            'parallel_threshold': 64,
+            'time_budget_ms': None,
+            'speed_kmh': 25.0,
+            'top_k': None
+        }
+
+    def evaluate_itineraries(self, candidates: List[Dict[str, Any]], pois: Optional[List[Dict[str, Any]]] = None,
+                             profile: Optional[Dict[str, Any]] = None,
+                             options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        批量评估候选行程并排序
+
+        Args:
+            candidates: 候选行程列表（行程 {'days': [...]}、{'items': [...]} 或投票选项）
+            pois: 共享的 POI 目录，候选中只有名称的活动从这里补全价格、坐标、时长等
+            profile: 团队画像（budget_per_person、preferences、avoid、fatigue_level）
+            options: weights、max_workers、chunk_size、parallel_threshold、time_budget_ms、top_k
+
+        Returns:
+            排序后的评估结果字典
+        """
+        try:
+            start_time = time.perf_counter()
+            settings = dict(self.defaults, **(options or {}))
+            weights = dict(self.defaults['weights'], **settings.get('weights') or {})
+            profile = profile or {}
+            if not candidates:
+                return self._create_error_result("No candidate itineraries provided")
+
+            logger.info(f"Evaluating {len(candidates)} candidate itineraries")
+            metrics, mode = self._collect_metrics(candidates, pois or [], settings)
+            ranked = self._score(metrics, profile, weights)
+            top_k = settings.get('top_k')
+            return {
+                'success': True,
+                'ranked': ranked[:top_k] if top_k else ranked,
+                'best': ranked[0] if ranked else None,
+                'statistics': {
+                    'candidates': len(candidates),
+                    'evaluated': len(metrics),
+                    'timed_out': len(candidates) - len(metrics),
+                    'mode': mode,
+                    'weights': weights,
+                    'solve_time_ms': round((time.perf_counter() - start_time) * 1000, 2)
+                },
+                'evaluated_at': datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"Itinerary evaluation error: {str(e)}")
+            return self._create_error_result(f"Itinerary evaluation failed: {str(e)}")
+
+    def _collect_metrics(self, candidates: List[Dict[str, Any]], pois: List[Dict[str, Any]],
+                         settings: Dict[str, Any]):
+        indexed = list(enumerate(candidates))
+        workers = settings.get('max_workers') or os.cpu_count() or 1
+        deadline = settings.get('time_budget_ms')
+        if len(indexed) < settings['parallel_threshold'] or workers <= 1:
+            _init_worker(pois, settings['speed_kmh'])
+            metrics = []
+            started = time.perf_counter()
+            for position, candidate in indexed:
+                if deadline and (time.perf_counter() - started) * 1000 > deadline:
+                    break
+                metrics.append(_candidate_metrics(position, candidate))
+            return metrics, 'inline'
+
+        size = max(int(settings['chunk_size']), 1)
+        chunks = [indexed[i:i + size] for i in range(0, len(indexed), size)]
+        metrics = []
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker,
+                                       initargs=(pois, settings['speed_kmh']))
+        try:
+            pending = {executor.submit(_evaluate_chunk, chunk) for chunk in chunks}
+            end_at = time.perf_counter() + deadline / 1000 if deadline else None
+            while pending:
+                timeout = max(end_at - time.perf_counter(), 0) if end_at else None
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    logger.warning(f"Time budget reached, {len(pending)} chunks not evaluated")
+                    break
+                for future in done:
+                    metrics.extend(future.result())
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=not pending, cancel_futures=True)
+        metrics.sort(key=lambda entry: entry['position'])
+        return metrics, f"process_pool[{min(workers, len(chunks))}]"
+
+    def _score(self, metrics: List[Dict[str, Any]], profile: Dict[str, Any],
+               weights: Dict[str, float]) -> List[Dict[str, Any]]:
+        """将原始指标归一化为 0-1 分项得分（越高越好）并加权排序"""
+        if not metrics:
+            return []
+        budget = profile.get('budget_per_person')
+        max_cost = max(entry['cost_per_person'] for entry in metrics) or 1.0
+        max_travel = max(entry['travel_minutes'] for entry in metrics) or 1.0
+        tolerance = self._intensity_tolerance(profile)
+        preferences = [str(word).lower() for word in profile.get('preferences', []) or []]
+        avoid = [str(word).lower() for word in profile.get('avoid', []) or []]
+        total_weight = sum(weights.values()) or 1.0
+
+        ranked = []
+        for entry in metrics:
+            cost = entry['cost_per_person']
+            if budget:
+                cost_score = 1.0 if cost <= budget else max(0.0, 1.0 - (cost - budget) / budget)
+            else:
+                cost_score = 1.0 - cost / max_cost
+            excess = max(entry['avg_intensity'] - tolerance, 0.0) + 0.5 * max(entry['peak_intensity'] - tolerance - 0.5, 0.0)
+            intensity_score = max(0.0, 1.0 - excess / 2.0)
+            travel_score = 1.0 - entry['travel_minutes'] / max_travel
+            text = entry['text']
+            matched = [word for word in preferences if word in text]
+            avoided = [word for word in avoid if word in text]
+            preference_score = (len(matched) / len(preferences)) if preferences else 0.5
+            preference_score = max(0.0, preference_score - 0.5 * len(avoided))
+
+            scores = {'cost': round(cost_score, 3), 'intensity': round(intensity_score, 3),
+                      'travel': round(travel_score, 3), 'preference': round(preference_score, 3)}
+            total = sum(weights.get(key, 0.0) * value for key, value in scores.items()) / total_weight
+            result = {key: value for key, value in entry.items() if key != 'text'}
+            result.update({'scores': scores, 'total_score': round(total, 4),
+                           'matched_preferences': matched, 'avoided': avoided})
+            ranked.append(result)
+
+        ranked.sort(key=lambda entry: (-entry['total_score'], entry['position']))
+        for rank, entry in enumerate(ranked, 1):
+            entry['rank'] = rank
+        return ranked
+
+    def _intensity_tolerance(self, profile: Dict[str, Any]) -> float:
+        """疲劳度 0-100 映射为可接受的平均强度 0-2"""
+        level = profile.get('fatigue_level', profile.get('fatigue_score'))
+        if isinstance(level, str):
+            level = FATIGUE_LEVELS.get(level.strip().lower(), 50)
+        if not isinstance(level, (int, float)):
+            return 2.0 if profile.get('max_intensity') is None else float(profile['max_intensity'])
+        return max(0.0, 2.0 - 2.0 * float(level) / 100.0)
+
+    def _create_error_result(self, error_message: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': error_message,
+            'ranked': [],
+            'best': None,
+            'statistics': {},
+            'evaluated_at': datetime.now().isoformat()
+        }
+
+itinerary_evaluator = ItineraryEvaluator()
+
+@tool(name="evaluate_itineraries", description="Score and rank many candidate itineraries by cost, intensity, travel time and preference fit")
+def evaluate_itineraries(candidates: List[Dict[str, Any]], pois: Optional[List[Dict[str, Any]]] = None,
+                         profile: Optional[Dict[str, Any]] = None, options: Optional[Dict[str, Any]] = None) -> str:
+    result = itinerary_evaluator.evaluate_itineraries(candidates, pois, profile, options)
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    import random
+    events_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'events')
+    with open(os.path.join(events_dir, 'example_voting_request.json'), encoding='utf-8') as f:
+        voting = json.load(f)['data']
+    test_profile = {'budget_per_person': 100, 'preferences': ['文化', '拍照'], 'fatigue_level': voting['context']['current_fatigue_level']}
+    result = itinerary_evaluator.evaluate_itineraries(voting['options'], profile=test_profile)
+    print(json.dumps([{k: entry[k] for k in ('rank', 'id', 'total_score', 'scores')} for entry in result['ranked']],
+                     ensure_ascii=False, indent=2))
+
+    random.seed(7)
+    test_pois = [{'name': f'景点{i}', 'price': {'amount': random.choice([0, 30, 60, 120])},
+                  'duration': f'{random.randint(1, 4)}小时', 'tags': random.sample(['文化', '徒步', '美食', '自然', '拍照'], 2),
+                  'location': {'lat': 26.87 + random.uniform(-0.1, 0.1), 'lng': 100.23 + random.uniform(-0.1, 0.1)}}
+                 for i in range(300)]
+    test_candidates = [{'id': f'plan_{n}', 'days': [{'day': d, 'items': [{'name': poi['name']} for poi in random.sample(test_pois, 4)]}
+                                                    for d in range(1, 4)]}
+                       for n in range(400)]
+    result = itinerary_evaluator.evaluate_itineraries(test_candidates, test_pois, test_profile,
+                                                      {'max_workers': 4, 'top_k': 3})
+    print(result['statistics'], [(entry['id'], entry['total_score']) for entry in result['ranked']])
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Join Barrier
+汇合屏障 - 按 project_id 收集并行分支的结果，全部到达或超时后继续后续流程
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Any, Awaitable, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JoinState:
+    """单个项目的一次扇出：期望的分支、已到达的结果和各分支耗时"""
+
+    __slots__ = ('project_id', 'branches', 'results', 'latency_ms', 'context', 'started', 'timer')
+
+    def __init__(self, project_id: str, branches: Iterable[str], context: Optional[Dict[str, Any]] = None):
+        self.project_id = project_id
+        self.branches = list(branches)
+        self.results: Dict[str, Any] = {}
+        self.latency_ms: Dict[str, float] = {}
+        self.context = context or {}
+        self.started = time.perf_counter()
+        self.timer: Optional[asyncio.Task] = None
+
+    @property
+    def missing(self) -> List[str]:
+        return [branch for branch in self.branches if branch not in self.results]
+
+    def summary(self, timed_out: bool) -> Dict[str, Any]:
+        return {
+            'project_id': self.project_id,
+            'results': self.results,
+            'missing': self.missing,
+            'timed_out': timed_out,
+            'latency_ms': self.latency_ms,
+            'elapsed_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'context': self.context
+        }
+
+
+class JoinBarrier:
+    """
+    Scatter-gather 汇合点
+
+    open() 登记一次扇出，arrive() 记录分支结果；所有分支到达或 timeout_seconds 到期时
+    调用 on_complete(summary) 且只调用一次。屏障关闭后到达的结果由 arrive() 返回 False。
+    """
+
+    def __init__(self, on_complete: Callable[[Dict[str, Any]], Awaitable[None]], timeout_seconds: float = 90.0):
+        self.on_complete = on_complete
+        self.timeout_seconds = timeout_seconds
+        self._joins: Dict[str, JoinState] = {}
+        self.stats = {'opened': 0, 'completed': 0, 'timed_out': 0, 'late': 0}
+
+    def is_open(self, project_id: str) -> bool:
+        return project_id in self._joins
+
+    def open(self, project_id: str, branches: Iterable[str], context: Optional[Dict[str, Any]] = None,
+             timeout_seconds: Optional[float] = None) -> JoinState:
+        """登记扇出；同一项目重复扇出时旧的屏障被替换"""
+        previous = self._joins.pop(project_id, None)
+        if previous is not None and previous.timer is not None:
+            previous.timer.cancel()
+        state = JoinState(project_id, branches, context)
+        state.timer = asyncio.create_task(self._expire(project_id, timeout_seconds or self.timeout_seconds))
+        self._joins[project_id] = state
+        self.stats['opened'] += 1
+        return state
+
+    async def arrive(self, project_id: str, branch: str, result: Any) -> bool:
+        """记录分支结果，返回是否被屏障接收"""
+        state = self._joins.get(project_id)
+        if state is None or branch not in state.branches:
+            self.stats['late'] += 1
+            return False
+        state.results[branch] = result
+        state.latency_ms[branch] = round((time.perf_counter() - state.started) * 1000, 1)
+        if not state.missing:
+            await self._close(project_id, timed_out=False)
+        return True
+
+    async def _expire(self, project_id: str, timeout_seconds: float):
+        await asyncio.sleep(timeout_seconds)
+        state = self._joins.get(project_id)
+        if state is not None:
+            logger.warning(f"Join for {project_id} timed out, missing: {state.missing}")
+            await self._close(project_id, timed_out=True)
+
+    async def _close(self, project_id: str, timed_out: bool):
+        state = self._joins.pop(project_id, None)
+        if state is None:
+            return
+        if state.timer is not None and state.timer is not asyncio.current_task():
+            state.timer.cancel()
+        self.stats['timed_out' if timed_out else 'completed'] += 1
+        try:
+            await self.on_complete(state.summary(timed_out))
+        except Exception as e:
+            logger.error(f"Join completion for {project_id} failed: {e}")
+
+if __name__ == "__main__":
+    async def demo():
+        async def done(summary: Dict[str, Any]):
+            print(f"{summary['project_id']}: got {sorted(summary['results'])}, missing {summary['missing']}, "
+                  f"timed_out={summary['timed_out']}, elapsed {summary['elapsed_ms']} ms")
+
+        async def branch(project_id: str, name: str, delay: float):
+            await asyncio.sleep(delay)
+            await barrier.arrive(project_id, name, {'ok': True})
+
+        barrier = JoinBarrier(done, timeout_seconds=0.5)
+        branches = ['route', 'preferences', 'health', 'budget']
+        barrier.open('p1', branches)
+        barrier.open('p2', branches)
+        await asyncio.gather(*[branch('p1', name, delay) for name, delay in zip(branches, (0.3, 0.1, 0.2, 0.1))],
+                             *[branch('p2', name, delay) for name, delay in zip(branches, (0.8, 0.1, 0.2, 0.1))])
+        print(barrier.stats)
+
+    asyncio.run(demo())
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind LLM Stub
+确定性 LLM 桩服务 - 兼容 OpenAI chat/completions 接口，供压测时替代真实模型
+
+桩服务不生成文字，而是按触发器指令中写明的 send_event(...) 步骤依次返回工具调用，
+收到工具结果后返回 finish()，这样事件仍按真实拓扑在 agent 之间流转。
+延迟 = latency_ms ± jitter_ms，随机数由请求内容决定，同样的请求总是得到同样的延迟。
+
+启动:
+    python tools/llm_stub.py --port 8900 --latency-ms 800 --jitter-ms 200 --max-concurrency 8
+然后把 agent 使用的模型服务地址（如 OPENAI_BASE_URL）指向 http://127.0.0.1:8900/v1
+"""
+
+import ast
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import logging
+from typing import Dict, List, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_SOURCE_PATTERN = re.compile(r'<\s*(?:payload\.([\w.]+)|([\w.]+) from payload)')
+SEND_EVENT_PATTERN = re.compile(r'send_event\(\s*event_name\s*=\s*"([^"]+)"\s*,\s*destination_id\s*=\s*("[^"]*"|<[^>]*>|[^,]+?)\s*,\s*payload\s*=\s*\{')
+# 事件 payload 可能以 JSON 或 Python dict 的形式出现在提示中，两种引号都要匹配
+PROJECT_ID_PATTERN = re.compile(r'["\']project_id["\']\s*:\s*["\']([^"\'<>]+)["\']')
+REPLY_TO_PATTERN = re.compile(r'["\']reply_to["\']\s*:\s*["\']([^"\'<>]+)["\']')
+TRACE_PATTERN = re.compile(r'["\']trace["\']\s*:\s*(\{[^{}]*\})')
+
+# 收到的 payload 中没有对应字段时的固定取值，保证下游工具和 worker 能拿到结构正确的数据
+STUB_VALUES = {
+    'parsed_intent': {'destination': '成都', 'days': 3, 'travelers': 4, 'budget': 20000,
+                      'preferences': ['美食', '文化'], 'members': []},
+    'query': {'location': '成都', 'keywords': ['文化'], 'budget_range': [0, 500]},
+    'itinerary': 'Stub itinerary',
+    'route_version': None,
+    'members': [],
+}
+
+
+def _top_level_items(text: str, start: int) -> List[Tuple[str, str]]:
+    """从 payload={ 之后的位置扫描，返回最外层字典的 (键名, 值的原始文本)"""
+    items, depth, i = [], 1, start
+    key, value_start = None, None
+    while i < len(text) and depth > 0:
+        char = text[i]
+        if char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+        elif char == '"':
+            end = text.find('"', i + 1)
+            if end < 0:
+                break
+            if depth == 1 and key is None and text[end + 1:].lstrip().startswith(':'):
+                key = text[i + 1:end]
+                value_start = text.index(':', end) + 1
+                end = value_start - 1
+            i = end
+        if depth == 1 and char == ',' or depth == 0:
+            if key is not None:
+                items.append((key, text[value_start:i].strip()))
+            key = None
+        i += 1
+    return items
+
+
+def _object_end(text: str, start: int) -> int:
+    """start 为 '{' 的位置，返回与之匹配的 '}' 之后的位置；不完整时返回 -1"""
+    depth, i, quote = 0, start, None
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return -1
+
+
+def incoming_payload(prompt: str, skip: List[Tuple[int, int]]) -> Dict[str, Any]:
+    """
+    提示中事件 payload 的字段（JSON 或 Python dict 形式）；skip 为指令中 send_event 模板 payload 的区间。
+    有多个对象时合并最外层字段，先出现的优先
+    """
+    decoder = json.JSONDecoder()
+    fields: Dict[str, Any] = {}
+    position = prompt.find('{')
+    while position >= 0:
+        end = -1
+        if not any(first <= position < last for first, last in skip):
+            try:
+                value, end = decoder.raw_decode(prompt, position)
+            except ValueError:
+                end = _object_end(prompt, position)
+                try:
+                    value = ast.literal_eval(prompt[position:end]) if end > 0 else None
+                except (ValueError, SyntaxError):
+                    value, end = None, -1
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    fields.setdefault(key, item)
+            else:
+                end = -1
+        position = prompt.find('{', end if end > 0 else position + 1)
+    return fields
+
+
+def lookup(fields: Dict[str, Any], path: str) -> Any:
+    """按 a.b.c 读取嵌套字段，不存在时返回 KeyError 实例"""
+    value: Any = fields
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return KeyError(path)
+        value = value[part]
+    return value
+
+
+class StubLLM:
+    """根据请求内容生成确定性的工具调用响应"""
+
+    def __init__(self, latency_ms: float = 800.0, jitter_ms: float = 200.0, max_concurrency: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        # 0 表示不限；大于 0 时模拟模型服务的并发上限，超出的请求排队
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self.stats = {'requests': 0, 'tool_calls': 0, 'in_flight': 0, 'max_in_flight': 0, 'queued_ms': 0.0}
+
+    def respond(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        生成 chat/completions 响应
+
+        Args:
+            request: OpenAI 格式的请求体（messages、tools）
+
+        Returns:
+            OpenAI 格式的响应体
+        """
+        messages = request.get('messages') or []
+        tool_names = {tool.get('function', {}).get('name') for tool in request.get('tools') or []}
+        calls = []
+        # 上一轮已经调用过工具，本轮结束
+        if not messages or messages[-1].get('role') != 'tool':
+            prompt = self._prompt(messages)
+            if 'send_event' in tool_names or not tool_names:
+                calls = [('send_event', arguments) for arguments in self.plan_events(prompt)]
+        if not calls and 'finish' in tool_names:
+            calls = [('finish', {})]
+
+        digest = self._digest(request)
+        message: Dict[str, Any] = {'role': 'assistant', 'content': None if calls else 'OK'}
+        if calls:
+            message['tool_calls'] = [{'id': f'call_{digest[:8]}_{i}', 'type': 'function',
+                                      'function': {'name': name, 'arguments': json.dumps(arguments, ensure_ascii=False)}}
+                                     for i, (name, arguments) in enumerate(calls)]
+        self.stats['tool_calls'] += len(calls)
+        return {
+            'id': f'chatcmpl-stub-{digest[:12]}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'stub'),
+            'choices': [{'index': 0, 'message': message, 'finish_reason': 'tool_calls' if calls else 'stop'}],
+            'usage': {'prompt_tokens': sum(len(str(m.get('content') or '')) for m in messages) // 4,
+                      'completion_tokens': 16 * max(len(calls), 1), 'total_tokens': 0},
+        }
+
+    def plan_events(self, prompt: str) -> List[Dict[str, Any]]:
+        """提取指令中的 send_event 步骤，并用收到的 payload 填充占位符"""
+        project_id = (PROJECT_ID_PATTERN.search(prompt) or [None, 'stub-project'])[1]
+        reply_to = REPLY_TO_PATTERN.search(prompt)
+        trace = TRACE_PATTERN.search(prompt)
+        matches = list(SEND_EVENT_PATTERN.finditer(prompt))
+        received = incoming_payload(prompt, [(match.end() - 1, _object_end(prompt, match.end() - 1)) for match in matches])
+        events = []
+        for match in matches:
+            event_name, destination = match.group(1), match.group(2).strip()
+            if destination.startswith('"') and '<' not in destination:
+                destination = destination.strip('"')
+            else:
+                # 例如 <payload.reply_to, or coordinator if absent>
+                fallback = re.findall(r'or "?([\w-]+)"? if absent', destination)
+                destination = reply_to.group(1) if reply_to else (fallback[0] if fallback else 'coordinator')
+            payload = {}
+            for key, raw in _top_level_items(prompt, match.end()):
+                if '<' not in raw and raw:
+                    # 指令中写死的值（如 status、message）原样使用
+                    payload[key] = self._literal(raw)
+                elif key == 'project_id':
+                    payload[key] = project_id
+                elif key == 'reply_to':
+                    payload[key] = reply_to.group(1) if reply_to else None
+                elif key == 'trace':
+                    payload[key] = self._literal(trace.group(1)) if trace else None
+                elif key == 'agent_id':
+                    payload[key] = 'stub'
+                else:
+                    # <parsed_intent from payload> / <payload.data.options> 按引用的字段取值，否则按同名字段
+                    source = PLACEHOLDER_SOURCE_PATTERN.search(raw)
+                    value = lookup(received, source.group(1) or source.group(2)) if source else KeyError(key)
+                    if isinstance(value, KeyError):
+                        value = lookup(received, key)
+                    payload[key] = STUB_VALUES.get(key, 'stub') if isinstance(value, KeyError) else value
+            events.append({'event_name': event_name, 'destination_id': destination,
+                           'payload': {key: value for key, value in payload.items() if value is not None}})
+        return events
+
+    def delay_seconds(self, request: Dict[str, Any]) -> float:
+        rng = random.Random(self._digest(request))
+        return max(self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms), 0.0) / 1000
+
+    async def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """按配置的延迟和并发上限返回响应"""
+        self.stats['requests'] += 1
+        queued = time.perf_counter()
+        if self._semaphore is not None:
+            await self._semaphore.acquire()
+        self.stats['queued_ms'] += (time.perf_counter() - queued) * 1000
+        self.stats['in_flight'] += 1
+        self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+        try:
+            await asyncio.sleep(self.delay_seconds(request))
+            return self.respond(request)
+        finally:
+            self.stats['in_flight'] -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    def _prompt(self, messages: List[Dict[str, Any]]) -> str:
+        """只看最后一条非 system 消息（触发器指令和事件 payload 在这里），避免把所有触发器都执行一遍"""
+        for message in reversed(messages):
+            if message.get('role') != 'system':
+                content = message.get('content')
+                if isinstance(content, list):
+                    content = ' '.join(part.get('text', '') for part in content if isinstance(part, dict))
+                return str(content or '')
+        return ''
+
+    def _literal(self, text: str) -> Any:
+        try:
+            return json.loads(text)
+        except ValueError:
+            try:
+                return ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                return None
+
+    def _digest(self, request: Dict[str, Any]) -> str:
+        return hashlib.sha1(json.dumps(request.get('messages'), sort_keys=True, ensure_ascii=False,
+                                       default=str).encode('utf-8')).hexdigest()
+
+
+def create_app(stub: StubLLM):
+    """aiohttp 应用；同时提供 OpenAI 与智谱 (/api/paas/v4) 路径"""
+    from aiohttp import web
+
+    async def completions(request):
+        body = await request.json()
+        if body.get('stream'):
+            return web.json_response({'error': {'message': 'Streaming is not supported by the stub'}}, status=400)
+        return web.json_response(await stub.handle(body))
+
+    async def stats(request):
+        return web.json_response(stub.stats)
+
+    async def models(request):
+        return web.json_response({'object': 'list', 'data': [{'id': 'stub', 'object': 'model'}]})
+
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app.router.add_post('/v1/chat/completions', completions)
+    app.router.add_post('/api/paas/v4/chat/completions', completions)
+    app.router.add_get('/v1/models', models)
+    app.router.add_get('/stats', stats)
+    return app
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Deterministic LLM stub for TripMind load tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=800.0)
+    parser.add_argument('--jitter-ms', type=float, default=200.0)
+    parser.add_argument('--max-concurrency', type=int, default=0, help="Simulated provider concurrency limit (0 = unlimited)")
+    parser.add_argument('--demo', action='store_true', help="Print the response to a coordinator trigger and exit")
+    args = parser.parse_args()
+
+    stub = StubLLM(args.latency_ms, args.jitter_ms, args.max_concurrency)
+    if args.demo:
+        prompt = ('Event intent.parsed payload: {"project_id": "p1", "parsed_intent": {"destination": "东京", "travelers": 2}}\n'
+                  '2. send_event(event_name="intent.parsed", destination_id="orchestrator", '
+                  'payload={"project_id": "<from payload>", "parsed_intent": "<parsed_intent from payload>"})\n3. finish()')
+        request = {'model': 'glm-4.5', 'messages': [{'role': 'user', 'content': prompt}],
+                   'tools': [{'type': 'function', 'function': {'name': name}} for name in ('send_event', 'finish')]}
+        print(json.dumps(stub.respond(request), ensure_ascii=False, indent=2))
+        print(f"delay {stub.delay_seconds(request) * 1000:.0f} ms")
+    else:
+        from aiohttp import web
+        web.run_app(create_app(stub), host=args.host, port=args.port)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Load Generator
+压测场景与报告 - 把 events/*.json 场景和 message_history.json 录制流量转换成可回放的事件，
+按并发项目数分级加压，统计吞吐量、端到端与逐跳延迟分位数，并找出饱和点
+
+驱动部分（连接网络、发送事件）在 agents/load_generator_worker.py；
+逐跳延迟来自 tools/tracing.py 写出的 trace 文件。
+"""
+
+import json
+import math
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_EVENTS_DIR = ROOT / 'events'
+DEFAULT_HISTORY = ROOT / 'mods' / 'openagents.mods.workspace.messaging' / 'message_history.json'
+
+# event_type -> (事件名, 目标 agent)；user_input 会启动完整的规划流程
+SCENARIO_ROUTES = {
+    'user_input': ('project.notification.message_received', 'admission-controller'),
+    'constraint_violation': ('constraint_violation', 'admission-controller'),
+    'mood_update': ('mood_update', 'admission-controller'),
+    'voting_request': ('voting_request', 'admission-controller'),
+}
+
+# 录制流量只回放这些字段，发送方身份和 secret 由压测 agent 自己提供
+HISTORY_FIELDS = ('event_name', 'destination_id', 'payload')
+
+
+def load_scenarios(events_dir: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    读取场景文件
+
+    Returns:
+        {'planning': 启动规划流程的场景, 'follow_up': 规划完成后发送的调整类事件}
+        每个场景为 {'name', 'event_name', 'destination_id', 'payload'}，payload 中的 project_id 在发送时替换
+    """
+    scenarios = {'planning': [], 'follow_up': []}
+    for path in sorted(Path(events_dir or DEFAULT_EVENTS_DIR).glob('*.json')):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if 'event_name' in data:
+            # 已经是事件格式（例如 example_web_scraping.json）
+            scenario = {'name': path.stem, 'event_name': data['event_name'],
+                        'destination_id': data.get('destination_id'), 'payload': data.get('payload') or {}}
+            scenarios['follow_up'].append(scenario)
+            continue
+        route = SCENARIO_ROUTES.get(data.get('event_type'))
+        if route is None:
+            logger.warning(f"Skipping scenario {path.name}: unknown event_type {data.get('event_type')}")
+            continue
+        body = data.get('data') or {}
+        if data['event_type'] == 'user_input':
+            payload = {'content': {'text': body.get('input_text', '')}}
+            if body.get('group_info'):
+                payload['group_info'] = body['group_info']
+            scenarios['planning'].append({'name': path.stem, 'event_name': route[0], 'destination_id': route[1],
+                                          'payload': payload})
+        else:
+            scenarios['follow_up'].append({'name': path.stem, 'event_name': route[0], 'destination_id': route[1],
+                                           'payload': {'data': body}})
+    return scenarios
+
+
+def load_history(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """读取录制的消息历史，按时间排序"""
+    with open(path or DEFAULT_HISTORY, encoding='utf-8') as f:
+        history = json.load(f)
+    events = history.values() if isinstance(history, dict) else history
+    replay = []
+    for event in sorted(events, key=lambda event: event.get('timestamp') or 0):
+        if not event.get('event_name'):
+            continue
+        replay.append({key: event.get(key) for key in HISTORY_FIELDS})
+    return replay
+
+
+def instantiate(scenario: Dict[str, Any], project_id: str) -> Dict[str, Any]:
+    """生成一次发送用的事件，payload 中写入本次的 project_id"""
+    return {'event_name': scenario['event_name'], 'destination_id': scenario['destination_id'],
+            'payload': dict(scenario['payload'], project_id=project_id)}
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """线性插值分位数，p 取 0-100"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_summary(values: List[float]) -> Dict[str, Any]:
+    return {'count': len(values), 'p50': percentile(values, 50), 'p95': percentile(values, 95),
+            'p99': percentile(values, 99), 'max': max(values) if values else None}
+
+
+def hop_latencies(spans_by_project: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    按 "service: span 名" 汇总各跳耗时（毫秒），hop 类 span 另外汇总排队等待
+
+    Args:
+        spans_by_project: project_id -> tracer.load() 的结果
+    """
+    durations: Dict[str, List[float]] = {}
+    for spans in spans_by_project.values():
+        for span in spans:
+            if span['kind'] == 'send':
+                continue
+            key = f"{span['service']}: {span['name']}"
+            durations.setdefault(key, []).append((span['end_ns'] - span['start_ns']) / 1e6)
+            if 'queue_wait_ms' in span['attributes']:
+                durations.setdefault(f"{key} (queue)", []).append(span['attributes']['queue_wait_ms'])
+    return {key: latency_summary(values) for key, values in sorted(durations.items())}
+
+
+class StageRecorder:
+    """记录一个并发级别内每个项目的开始、完成和超时"""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.latencies_ms: List[float] = []
+        self.project_ids: List[str] = []
+        self.timeouts = 0
+        self.errors = 0
+
+    def completed(self, project_id: str, latency_ms: float):
+        self.project_ids.append(project_id)
+        self.latencies_ms.append(latency_ms)
+
+    def finish(self):
+        self.finished_at = time.monotonic()
+
+    def summary(self, hops: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        attempted = len(self.latencies_ms) + self.timeouts + self.errors
+        return {
+            'concurrency': self.concurrency,
+            'elapsed_s': round(elapsed, 2),
+            'completed': len(self.latencies_ms),
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'failure_rate': round((self.timeouts + self.errors) / attempted, 4) if attempted else 0.0,
+            'throughput_per_min': round(len(self.latencies_ms) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+            'end_to_end_ms': latency_summary(self.latencies_ms),
+            'hops_ms': hops or {},
+        }
+
+
+def find_saturation(stages: List[Dict[str, Any]], min_gain: float = 0.1, max_failure_rate: float = 0.05,
+                    latency_factor: float = 2.0) -> Dict[str, Any]:
+    """
+    找出饱和点: 第一个满足以下任一条件的并发级别
+    - 吞吐量相对上一级的增幅低于 min_gain
+    - 超时/错误比例超过 max_failure_rate
+    - 端到端 p95 超过最低并发级别 p95 的 latency_factor 倍
+
+    Returns:
+        {'saturated_at': 并发数或 None, 'max_sustainable': 饱和前最后一个级别, 'reason': 说明}
+    """
+    baseline_p95 = next((stage['end_to_end_ms']['p95'] for stage in stages if stage['end_to_end_ms']['p95']), None)
+    previous = None
+    for stage in stages:
+        reason = None
+        p95 = stage['end_to_end_ms']['p95']
+        if stage['failure_rate'] > max_failure_rate:
+            reason = f"failure rate {stage['failure_rate']:.1%} > {max_failure_rate:.0%}"
+        elif baseline_p95 and p95 and p95 > baseline_p95 * latency_factor:
+            reason = f"p95 {p95 / 1000:.1f}s > {latency_factor:g}x baseline {baseline_p95 / 1000:.1f}s"
+        elif previous and previous['throughput_per_min'] > 0 and \
+                stage['throughput_per_min'] < previous['throughput_per_min'] * (1 + min_gain):
+            reason = (f"throughput {stage['throughput_per_min']}/min vs {previous['throughput_per_min']}/min "
+                      f"at {previous['concurrency']} (gain < {min_gain:.0%})")
+        if reason:
+            return {'saturated_at': stage['concurrency'],
+                    'max_sustainable': previous['concurrency'] if previous else None, 'reason': reason}
+        previous = stage
+    return {'saturated_at': None, 'max_sustainable': previous['concurrency'] if previous else None,
+            'reason': 'not saturated within the tested levels'}
+
+
+def format_report(report: Dict[str, Any], top_hops: int = 12) -> str:
+    """终端报告: 各级别吞吐量和延迟、最慢的若干跳、饱和点"""
+    def seconds(value):
+        return f"{value / 1000:.1f}s" if value is not None else '-'
+
+    lines = [f"{'conc':>5} {'done':>5} {'fail':>5} {'thr/min':>8} {'p50':>7} {'p95':>7} {'p99':>7}"]
+    for stage in report['stages']:
+        e2e = stage['end_to_end_ms']
+        lines.append(f"{stage['concurrency']:>5} {stage['completed']:>5} {stage['timeouts'] + stage['errors']:>5} "
+                     f"{stage['throughput_per_min']:>8} {seconds(e2e['p50']):>7} {seconds(e2e['p95']):>7} "
+                     f"{seconds(e2e['p99']):>7}")
+    if report['stages']:
+        last = report['stages'][-1]
+        hops = sorted(last['hops_ms'].items(), key=lambda item: -(item[1]['p95'] or 0))[:top_hops]
+        if hops:
+            lines.append(f"\nslowest hops at concurrency {last['concurrency']} (p50 / p95 ms):")
+            for name, stats in hops:
+                lines.append(f"  {name[:56]:<56} {stats['p50']:>9.1f} {stats['p95']:>9.1f}")
+    saturation = report['saturation']
+    lines.append(f"\nsaturation: {saturation['saturated_at'] or 'none'}"
+                 f" (max sustainable: {saturation['max_sustainable']}) - {saturation['reason']}")
+    if report.get('config', {}).get('max_concurrent_projects'):
+        lines.append(f"network.yaml max_concurrent_projects: {report['config']['max_concurrent_projects']}")
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    scenarios = load_scenarios()
+    print({kind: [scenario['name'] for scenario in items] for kind, items in scenarios.items()})
+    print(f"{len(load_history())} recorded events to replay")
+    stages = []
+    for concurrency, throughput, p95 in [(1, 2.0, 60000), (2, 3.9, 62000), (4, 7.5, 65000), (8, 8.0, 110000)]:
+        stages.append({'concurrency': concurrency, 'completed': 10, 'timeouts': 0, 'errors': 0, 'failure_rate': 0.0,
+                       'throughput_per_min': throughput, 'hops_ms': {},
+                       'end_to_end_ms': latency_summary([p95 * 0.8, p95 * 0.9, p95])})
+    print(format_report({'stages': stages, 'saturation': find_saturation(stages)}))
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Opening Hours
+开放时间解析 - 将自由文本开放时间编译为每周时间区间，并为 POI 集合建立区间索引
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+MINUTES_PER_DAY = 24 * 60
+
+_DAY_TOKENS = {
+    '一': 0, '二': 1, '三': 2, '四': 3, '五': 4, '六': 5, '日': 6, '天': 6, '七': 6,
+    'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6
+}
+_DAY_GROUPS = {
+    '每天': range(7), '每日': range(7), '全天': range(7), '工作日': range(5), '周末': range(5, 7),
+    'daily': range(7), 'weekdays': range(5), 'weekends': range(5, 7)
+}
+
+_TIME_RANGE = re.compile(r'(\d{1,2})[:：](\d{2})\s*(?:-|–|—|~|～|至|到|to)\s*(\d{1,2})[:：](\d{2})')
+# 英文只认完整的星期名或常见缩写，'month'、'sunset' 之类的单词不算
+_EN_DAY = (r'\b(mon(?:day)?|tue(?:s(?:day)?)?|wed(?:nesday)?|thu(?:r(?:s(?:day)?)?)?|fri(?:day)?'
+           r'|sat(?:urday)?|sun(?:day)?)\b')
+_DAY_RANGE = re.compile(r'(?:周|星期|礼拜)([一二三四五六日天七])\s*(?:-|–|—|~|～|至|到)\s*(?:周|星期|礼拜)?([一二三四五六日天七])'
+                        r'|' + _EN_DAY + r'\.?\s*-\s*' + _EN_DAY, re.I)
+_SINGLE_DAY = re.compile(r'(?:周|星期|礼拜)([一二三四五六日天七])|' + _EN_DAY, re.I)
+_CLOSED = re.compile(r'闭馆|休息|休馆|关闭|不开放|closed', re.I)
+_ALWAYS_OPEN = re.compile(r'24\s*小时|全天开放|全天候|24/7|24\s*hours', re.I)
+
+
+class WeeklySchedule:
+    """编译后的每周开放时间，intervals[weekday] 为 (开门分钟, 关门分钟) 元组"""
+
+    __slots__ = ('text', 'intervals', 'known')
+
+    def __init__(self, text: str, intervals: Tuple[Tuple[Tuple[int, int], ...], ...], known: bool):
+        self.text = text
+        self.intervals = intervals
+        self.known = known
+
+    @property
+    def always_open(self) -> bool:
+        return self.known and all(day == ((0, MINUTES_PER_DAY),) for day in self.intervals)
+
+    @property
+    def open_days(self) -> int:
+        return sum(1 for day in self.intervals if day)
+
+    def day_intervals(self, weekday: Optional[int] = None) -> Tuple[Tuple[int, int], ...]:
+        """某天的开放区间；weekday 为 None 时返回第一个开放日的区间"""
+        if weekday is not None:
+            return self.intervals[weekday % 7]
+        for day in self.intervals:
+            if day:
+                return day
+        return ()
+
+    def is_open(self, weekday: int, start: int, end: Optional[int] = None) -> bool:
+        """判断 [start, end] 分钟区间内是否持续开放"""
+        end = start if end is None else end
+        return any(open_at <= start and end <= close_at for open_at, close_at in self.intervals[weekday % 7])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'known': self.known,
+            'always_open': self.always_open,
+            'weekly': {
+                WEEKDAY_NAMES[day]: [f"{format_clock(a)}-{format_clock(b)}" for a, b in intervals]
+                for day, intervals in enumerate(self.intervals)
+            }
+        }
+
+    def __repr__(self) -> str:
+        return f"WeeklySchedule({self.text!r}, open_days={self.open_days}, known={self.known})"
+
+
+def format_clock(minutes: int) -> str:
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+def parse_opening_hours(text: Any) -> WeeklySchedule:
+    """
+    将开放时间文本编译为 WeeklySchedule，结果按原始字符串缓存；非字符串（结构化的 dict / list）视为未知
+
+    支持: '9:00-17:00'、'9:00-17:00 (周一闭馆)'、'24小时开放'、'周一至周五 9:00-18:00'、
+    '11:00-14:00, 17:00-22:00'、'18:00-02:00'（跨午夜）等
+
+    Args:
+        text: 开放时间文本
+
+    Returns:
+        WeeklySchedule 对象；无法识别时 known=False 且视为全天开放
+    """
+    if not isinstance(text, str):
+        return _unknown('' if text is None else str(text))
+    return _compile(text)
+
+
+@lru_cache(maxsize=4096)
+def _compile(text: str) -> WeeklySchedule:
+    raw = text
+    normalized = raw.strip()
+    if not normalized:
+        return _unknown(raw)
+    if _ALWAYS_OPEN.search(normalized) and not _TIME_RANGE.search(normalized):
+        return WeeklySchedule(raw, tuple(((0, MINUTES_PER_DAY),) for _ in range(7)), True)
+
+    week = [[] for _ in range(7)]
+    closed_days = set()
+    specific_days = set()
+    base_ranges = []
+    found = False
+
+    for segment in re.split(r'[;；,，/()（）\[\]【】\n]', normalized):
+        segment = segment.strip()
+        if not segment:
+            continue
+        days = _parse_days(segment)
+        ranges = [_to_minutes(m) for m in _TIME_RANGE.finditer(segment)]
+        if _CLOSED.search(segment):
+            closed_days.update(days or [])
+            found = found or bool(days)
+            if not ranges:
+                continue
+            # '9:00-17:00 周一闭馆'：星期属于闭馆说明，时间段适用于其余各天
+            days = []
+        if not ranges and _ALWAYS_OPEN.search(segment):
+            ranges = [(0, MINUTES_PER_DAY)]
+        if not ranges:
+            continue
+        found = True
+        if days:
+            specific_days.update(days)
+            for day in days:
+                for open_at, close_at in ranges:
+                    _add_range(week, day, open_at, close_at)
+        else:
+            base_ranges.extend(ranges)
+
+    if not found:
+        return _unknown(raw)
+
+    for day in range(7):
+        if day in specific_days:
+            continue
+        for open_at, close_at in base_ranges:
+            _add_range(week, day, open_at, close_at)
+    for day in closed_days:
+        week[day] = []
+
+    intervals = tuple(tuple(_merge(day)) for day in week)
+    return WeeklySchedule(raw, intervals, True)
+
+
+def _unknown(raw: str) -> WeeklySchedule:
+    return WeeklySchedule(raw, tuple(((0, MINUTES_PER_DAY),) for _ in range(7)), False)
+
+
+def _to_minutes(match) -> Tuple[int, int]:
+    open_at = int(match.group(1)) * 60 + int(match.group(2))
+    close_at = int(match.group(3)) * 60 + int(match.group(4))
+    if close_at <= open_at:
+        close_at += MINUTES_PER_DAY
+    return open_at, close_at
+
+
+def _add_range(week: List[List[Tuple[int, int]]], day: int, open_at: int, close_at: int):
+    """加入区间，跨午夜部分顺延到下一天"""
+    week[day].append((open_at, min(close_at, MINUTES_PER_DAY)))
+    if close_at > MINUTES_PER_DAY:
+        week[(day + 1) % 7].append((0, close_at - MINUTES_PER_DAY))
+
+
+def _merge(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged = []
+    for open_at, close_at in sorted(ranges):
+        if merged and open_at <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], close_at))
+        else:
+            merged.append((open_at, close_at))
+    return merged
+
+
+def _day_index(token: str) -> int:
+    return _DAY_TOKENS[token.lower()[:3] if token.isascii() else token]
+
+
+def _parse_days(segment: str) -> List[int]:
+    days = []
+    for name, group in _DAY_GROUPS.items():
+        if name in segment.lower():
+            days.extend(group)
+    for match in _DAY_RANGE.finditer(segment):
+        first, last = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+        start, stop = _day_index(first), _day_index(last)
+        days.extend((start + offset) % 7 for offset in range((stop - start) % 7 + 1))
+    if not days:
+        for match in _SINGLE_DAY.finditer(segment):
+            days.append(_day_index(match.group(1) or match.group(2)))
+        # '周一、三闭馆' 这类省略写法
+        if days and re.search(r'[、和及]\s*[一二三四五六日天]', segment):
+            days.extend(_DAY_TOKENS[c] for c in re.findall(r'[、和及]\s*([一二三四五六日天])', segment))
+    return sorted(set(days))
+
+
+class OpeningHoursIndex:
+    """POI 开放时间区间索引：每个工作日按时间片保存开放 POI 的位图，查询无需重新解析文本"""
+
+    def __init__(self, pois: Optional[List[Dict[str, Any]]] = None, slot_minutes: int = 5):
+        self.slot_minutes = slot_minutes
+        self.slots_per_day = MINUTES_PER_DAY // slot_minutes
+        self.pois = []
+        self.schedules = []
+        self._slots = [[0] * self.slots_per_day for _ in range(7)]
+        self._unknown_mask = 0
+        for poi in pois or []:
+            self.add(poi)
+
+    def __len__(self) -> int:
+        return len(self.pois)
+
+    def add(self, poi: Dict[str, Any]) -> int:
+        """加入 POI，返回其在索引中的编号"""
+        position = len(self.pois)
+        schedule = parse_opening_hours(poi.get('opening_hours') or poi.get('practical_info') or '')
+        self.pois.append(poi)
+        self.schedules.append(schedule)
+        bit = 1 << position
+        if not schedule.known:
+            self._unknown_mask |= bit
+        for day, intervals in enumerate(schedule.intervals):
+            slots = self._slots[day]
+            for open_at, close_at in intervals:
+                # 只登记被完整覆盖的时间片
+                first = -(-open_at // self.slot_minutes)
+                last = close_at // self.slot_minutes
+                for slot in range(first, last):
+                    slots[slot] |= bit
+        return position
+
+    def open_mask(self, weekday: int, start: int, end: int, include_unknown: bool = True) -> int:
+        """返回在 [start, end) 内持续开放的 POI 位图"""
+        first = max(start // self.slot_minutes, 0)
+        last = min(-(-end // self.slot_minutes), self.slots_per_day)
+        mask = (1 << len(self.pois)) - 1
+        for slot in self._slots[weekday % 7][first:last]:
+            mask &= slot
+            if not mask:
+                break
+        if not include_unknown:
+            mask &= ~self._unknown_mask
+        return mask
+
+    def open_between(self, weekday: int, start: int, end: int, include_unknown: bool = True) -> List[int]:
+        """返回在 [start, end) 内持续开放的 POI 编号列表"""
+        mask = self.open_mask(weekday, start, end, include_unknown)
+        result = []
+        while mask:
+            low = mask & -mask
+            result.append(low.bit_length() - 1)
+            mask ^= low
+        return result
+
+    def query(self, weekday: int, start: str, end: str, include_unknown: bool = True) -> List[Dict[str, Any]]:
+        """按 '15:00' 形式的时间查询开放 POI，例如 query(0, '15:00', '17:00') 表示周一 15:00-17:00"""
+        return [self.pois[i] for i in self.open_between(weekday, _clock(start), _clock(end), include_unknown)]
+
+
+def _clock(text: str) -> int:
+    hours, minutes = str(text).replace('：', ':').split(':')
+    return int(hours) * 60 + int(minutes)
+
+if __name__ == "__main__":
+    samples = ['9:00-17:00 (周一闭馆)', '24小时开放', '10:00-18:00 (周二闭馆)', '周一至周五 9:00-18:00; 周末 10:00-20:00',
+               '11:00-14:00, 17:00-22:00', '18:00-02:00', '5:00-24:00', '需预约']
+    for sample in samples:
+        print(sample, '->', parse_opening_hours(sample).to_dict())
+    index = OpeningHoursIndex([{'name': sample, 'opening_hours': sample} for sample in samples])
+    print('周一 15:00-17:00:', [poi['name'] for poi in index.query(0, '15:00', '17:00', include_unknown=False)])
+    print(_compile.cache_info())
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind POI Catalog
+本地 POI 目录 - 把抓取到的景点、酒店、餐厅写入 SQLite，按地点、关键词和价格检索，重复目的地直接从磁盘返回
+
+- 全文检索使用 FTS5。unicode61 分词器不切分中文，写入和查询前把中日韩字符切成重叠的二字词
+  （外加每段末字），关键词按短语查询，效果等同于原抓取函数的子串匹配；
+- 每个 (类型, 地点) 记录最近一次抓取时间，超过 POI_CATALOG_MAX_AGE_HOURS 后重新抓取；
+- POI_CATALOG_OFFLINE=1 时只读目录、不调用抓取函数，配合 TRIPMIND_POI_DB 和 import_jsonl 作为离线数据源
+
+数据库: TRIPMIND_POI_DB（默认 data/poi_catalog.sqlite3）
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional
+
+try:
+    from openagents import tool
+except ImportError:
+    def tool(func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / 'data' / 'poi_catalog.sqlite3'
+CATALOG_TYPES = ('attractions', 'hotels', 'restaurants')
+MAX_AGE_HOURS = float(os.getenv('POI_CATALOG_MAX_AGE_HOURS', '168'))
+OFFLINE = os.getenv('POI_CATALOG_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pois (
+    id         INTEGER PRIMARY KEY,
+    info_type  TEXT NOT NULL,
+    location   TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    price      REAL,
+    rating     REAL,
+    data       TEXT NOT NULL,
+    source     TEXT,
+    updated_at REAL NOT NULL,
+    UNIQUE (info_type, location, name)
+);
+CREATE TABLE IF NOT EXISTS poi_locations (
+    info_type    TEXT NOT NULL,
+    location     TEXT NOT NULL,
+    refreshed_at REAL NOT NULL,
+    item_count   INTEGER NOT NULL,
+    PRIMARY KEY (info_type, location)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS poi_search USING fts5(name, category, tags, description, tokenize='unicode61');
+"""
+
+CJK_RUN = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]+')
+WORD = re.compile(r'[^\W_]+')
+
+
+def search_terms(text: str) -> List[str]:
+    """切分为检索词：中日韩字符串切成重叠二字词加末字，其余按单词小写"""
+    terms = []
+    position = 0
+    for match in CJK_RUN.finditer(text):
+        terms += WORD.findall(text[position:match.start()].lower())
+        run = match.group()
+        terms += [run[i:i + 2] for i in range(len(run) - 1)] + [run[-1]]
+        position = match.end()
+    terms += WORD.findall(text[position:].lower())
+    return terms
+
+
+def match_expression(keywords: Iterable[str]) -> str:
+    """任一关键词命中即可；每个关键词是一个短语，最后一个词按前缀匹配"""
+    phrases = []
+    for keyword in keywords:
+        keyword = str(keyword)
+        terms = search_terms(keyword)
+        last_run = None
+        for last_run in CJK_RUN.finditer(keyword):
+            pass
+        # 末字只为单字关键词而写入；关键词以多字中文结尾时去掉末字，短语才与正文的词序列连续
+        if last_run and len(last_run.group()) > 1 and not WORD.search(keyword, last_run.end()):
+            terms = terms[:-1]
+        if terms:
+            phrases.append('"' + ' '.join(terms) + '" *')
+    return ' OR '.join(phrases)
+
+
+def normalize_location(location: str) -> str:
+    return ' '.join(str(location).split()).lower()
+
+
+def price_of(item: Dict[str, Any]) -> Optional[float]:
+    price = item.get('price')
+    if isinstance(price, dict):
+        price = price.get('amount')
+    return float(price) if isinstance(price, (int, float)) else None
+
+
+class PoiCatalog:
+    """按 (类型, 地点, 名称) 保存 POI，支持全文检索和价格过滤"""
+
+    def __init__(self, path: Optional[str] = None, max_age_hours: Optional[float] = None):
+        self.path = str(path or os.getenv('TRIPMIND_POI_DB') or DEFAULT_PATH)
+        self.max_age_seconds = (MAX_AGE_HOURS if max_age_hours is None else max_age_hours) * 3600
+        self._local = threading.local()
+
+    def upsert(self, info_type: str, location: str, items: List[Dict[str, Any]], source: Optional[str] = None) -> int:
+        """写入一个地点的抓取结果（同名 POI 覆盖），并记录该地点的刷新时间；返回写入条数"""
+        location = normalize_location(location)
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            for item in items:
+                if not item.get('name'):
+                    continue
+                connection.execute(
+                    'INSERT INTO pois (info_type, location, name, price, rating, data, source, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (info_type, location, name) DO UPDATE SET '
+                    'price = excluded.price, rating = excluded.rating, data = excluded.data, '
+                    'source = excluded.source, updated_at = excluded.updated_at',
+                    (info_type, location, item['name'], price_of(item), item.get('rating'),
+                     json.dumps(item, ensure_ascii=False, separators=(',', ':')),
+                     source or item.get('source'), now))
+                row_id = connection.execute('SELECT id FROM pois WHERE info_type = ? AND location = ? AND name = ?',
+                                            (info_type, location, item['name'])).fetchone()[0]
+                connection.execute('DELETE FROM poi_search WHERE rowid = ?', (row_id,))
+                connection.execute('INSERT INTO poi_search (rowid, name, category, tags, description) '
+                                   'VALUES (?, ?, ?, ?, ?)', (row_id, *self._search_columns(item)))
+            count = connection.execute('SELECT COUNT(*) FROM pois WHERE info_type = ? AND location = ?',
+                                       (info_type, location)).fetchone()[0]
+            connection.execute('INSERT OR REPLACE INTO poi_locations VALUES (?, ?, ?, ?)',
+                               (info_type, location, now, count))
+        return len([item for item in items if item.get('name')])
+
+    def search(self, info_type: str, location: str, keywords: Optional[List[str]] = None,
+               budget_range: Optional[List[float]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按地点检索；keywords 任一命中，budget_range 过滤价格（无价格的 POI 保留）"""
+        query = 'SELECT p.data FROM pois p'
+        conditions = ['p.info_type = ?', 'p.location = ?']
+        params: List[Any] = [info_type, normalize_location(location)]
+        order = 'p.rating IS NULL, p.rating DESC, p.id'
+
+        if isinstance(keywords, str):
+            keywords = keywords.replace('，', ',').split(',')
+        expression = match_expression(keywords or [])
+        if expression:
+            query += ' JOIN poi_search ON poi_search.rowid = p.id'
+            conditions.append('poi_search MATCH ?')
+            params.append(expression)
+            order = 'bm25(poi_search), ' + order
+        if budget_range is not None:
+            low, high = self._budget_bounds(budget_range)
+            conditions.append('(p.price IS NULL OR p.price BETWEEN ? AND ?)')
+            params += [low, high]
+
+        query += ' WHERE ' + ' AND '.join(conditions) + ' ORDER BY ' + order
+        if limit:
+            query += ' LIMIT ?'
+            params.append(int(limit))
+        return [json.loads(data) for data, in self._connection().execute(query, params).fetchall()]
+
+    def is_fresh(self, info_type: str, location: str, max_age_seconds: Optional[float] = None) -> bool:
+        """该地点是否已抓取过且未过期"""
+        row = self._connection().execute(
+            'SELECT refreshed_at FROM poi_locations WHERE info_type = ? AND location = ?',
+            (info_type, normalize_location(location))).fetchone()
+        max_age = self.max_age_seconds if max_age_seconds is None else max_age_seconds
+        return row is not None and time.time() - row[0] <= max_age
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._connection().execute(
+            'SELECT info_type, COUNT(*), SUM(item_count) FROM poi_locations GROUP BY info_type').fetchall()
+        return {info_type: {'locations': locations, 'pois': pois or 0} for info_type, locations, pois in rows}
+
+    def delete_location(self, info_type: str, location: str) -> int:
+        location = normalize_location(location)
+        connection = self._connection()
+        with connection:
+            connection.execute('DELETE FROM poi_search WHERE rowid IN '
+                               '(SELECT id FROM pois WHERE info_type = ? AND location = ?)', (info_type, location))
+            removed = connection.execute('DELETE FROM pois WHERE info_type = ? AND location = ?',
+                                         (info_type, location)).rowcount
+            connection.execute('DELETE FROM poi_locations WHERE info_type = ? AND location = ?', (info_type, location))
+        return removed
+
+    def export_jsonl(self, path: str, info_type: Optional[str] = None) -> int:
+        """导出为 JSON Lines（每行 info_type、location、item），可作为测试数据提交"""
+        query = 'SELECT info_type, location, data FROM pois'
+        params = []
+        if info_type:
+            query += ' WHERE info_type = ?'
+            params.append(info_type)
+        rows = self._connection().execute(query + ' ORDER BY info_type, location, id', params).fetchall()
+        with open(path, 'w', encoding='utf-8') as f:
+            for row_type, location, data in rows:
+                f.write(json.dumps({'info_type': row_type, 'location': location, 'item': json.loads(data)},
+                                   ensure_ascii=False) + '\n')
+        return len(rows)
+
+    def import_jsonl(self, path: str) -> int:
+        """导入 export_jsonl 的输出，导入的地点视为刚刚抓取"""
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    groups.setdefault((record['info_type'], record['location']), []).append(record['item'])
+        return sum(self.upsert(info_type, location, items) for (info_type, location), items in groups.items())
+
+    def _search_columns(self, item: Dict[str, Any]) -> tuple:
+        """name / category / tags / description 四列，与 AttractionScraper._matches_keywords 的搜索字段一致"""
+        def joined(*keys):
+            values = []
+            for key in keys:
+                value = item.get(key)
+                values += value if isinstance(value, list) else [value] if value else []
+            return ' '.join(search_terms(' '.join(str(value) for value in values)))
+
+        return (joined('name'), joined('type', 'category', 'cuisine'),
+                joined('tags', 'highlights', 'specialties', 'amenities'), joined('description'))
+
+    def _budget_bounds(self, budget_range: Any) -> tuple:
+        """[最低, 最高] 或单个上限（LLM 填写的预算可能是数字字符串）；无法解析时不限价格"""
+        if isinstance(budget_range, (list, tuple)) and len(budget_range) == 2:
+            try:
+                return float(budget_range[0]), float(budget_range[1])
+            except (TypeError, ValueError):
+                pass
+        try:
+            return 0.0, float(budget_range)
+        except (TypeError, ValueError):
+            return 0.0, float('inf')
+
+    def _connection(self) -> sqlite3.Connection:
+        """每个线程一个连接；首次使用时建表"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+# 全局 POI 目录实例
+poi_catalog = PoiCatalog()
+
+@tool(name="search_poi_catalog", description="Search locally cached attractions, hotels or restaurants by location, keywords and price range")
+def search_poi_catalog(info_type: str, location: str, keywords: Optional[List[str]] = None,
+                       budget_range: Optional[List[float]] = None, limit: int = 20) -> str:
+    try:
+        items = poi_catalog.search(info_type, location, keywords, budget_range, limit)
+        result = {'success': True, 'info_type': info_type, 'location': location, 'items': items,
+                  'total_items': len(items), 'fresh': poi_catalog.is_fresh(info_type, location)}
+    except Exception as e:
+        logger.error(f"POI catalog search error: {str(e)}")
+        result = {'success': False, 'error': f"POI catalog search failed: {str(e)}", 'info_type': info_type}
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    import tempfile
+    catalog = PoiCatalog(os.path.join(tempfile.mkdtemp(), 'poi.sqlite3'))
+    catalog.upsert('attractions', '成都', [
+        {'name': '成都历史博物馆', 'type': '博物馆', 'rating': 4.5, 'price': {'amount': 0},
+         'description': '展示成都丰富历史文化的综合性博物馆', 'tags': ['历史', '文化', '教育']},
+        {'name': '成都中央公园', 'type': '公园', 'rating': 4.2, 'price': {'amount': 0},
+         'description': '成都最大的城市公园，适合休闲散步', 'tags': ['自然', '休闲', '运动']},
+        {'name': '成都艺术画廊', 'type': '画廊', 'rating': 4.3, 'price': {'amount': 500},
+         'description': '展示当代艺术作品的现代画廊', 'tags': ['艺术', '文化', 'Modern Art']},
+    ], source='demo')
+    for keywords, budget in [(['文化'], None), (['文化'], [0, 100]), (['园'], None), (['modern'], None), (None, None)]:
+        print(keywords, budget, [item['name'] for item in catalog.search('attractions', '成都', keywords, budget)])
+    print(catalog.is_fresh('attractions', '成都'), catalog.is_fresh('hotels', '成都'), catalog.stats())
+    started = time.perf_counter()
+    for _ in range(1000):
+        catalog.search('attractions', '成都', ['历史', '艺术'], [0, 1000])
+    print(f"1000 searches in {(time.perf_counter() - started) * 1000:.1f} ms")
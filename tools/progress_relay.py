@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Progress Relay
+进度转发 - 将 progress.update 格式化为项目消息，并按 project_id 在短时间窗口内合并
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 出现这些状态时立即发送，不等待窗口结束
+FLUSH_STATUSES = {'failed', 'error'}
+
+
+def format_update(update: Dict[str, Any]) -> str:
+    """与原 coordinator 触发器相同的格式: [Agent: <agent_id>] <message>"""
+    return f"[Agent: {update.get('agent_id') or 'unknown'}] {update.get('message') or update.get('status') or ''}".rstrip()
+
+
+class ProgressCoalescer:
+    """
+    按项目合并进度消息
+
+    同一项目在 window_seconds 内的更新合并为一条消息；同一 agent 在窗口内的多次更新
+    只保留最新一条（例如 started 紧接 completed 时只显示 completed）。
+    """
+
+    def __init__(self, flush: Callable[[str, str], Awaitable[None]], window_seconds: float = 1.5,
+                 max_pending: int = 20):
+        self.flush_callback = flush
+        self.window_seconds = window_seconds
+        self.max_pending = max_pending
+        self._pending: Dict[str, OrderedDict] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self.stats = {'received': 0, 'sent': 0, 'coalesced': 0}
+
+    async def submit(self, update: Dict[str, Any]):
+        """加入一条进度更新，窗口结束、达到上限或遇到失败状态时发送"""
+        project_id = update.get('project_id')
+        if not project_id:
+            logger.warning(f"Dropping progress update without project_id: {update}")
+            return
+        self.stats['received'] += 1
+        pending = self._pending.setdefault(project_id, OrderedDict())
+        agent_id = update.get('agent_id') or 'unknown'
+        if agent_id in pending:
+            self.stats['coalesced'] += 1
+        # 保留 agent 首次出现的位置，内容更新为最新一条
+        pending[agent_id] = update
+
+        if str(update.get('status', '')).lower() in FLUSH_STATUSES or len(pending) >= self.max_pending:
+            await self.flush(project_id)
+        elif project_id not in self._timers:
+            self._timers[project_id] = asyncio.create_task(self._flush_later(project_id))
+
+    async def flush(self, project_id: str):
+        timer = self._timers.pop(project_id, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        pending = self._pending.pop(project_id, None)
+        if not pending:
+            return
+        text = '\n'.join(format_update(update) for update in pending.values())
+        self.stats['sent'] += 1
+        try:
+            await self.flush_callback(project_id, text)
+        except Exception as e:
+            logger.error(f"Failed to relay progress for {project_id}: {e}")
+
+    async def flush_all(self):
+        for project_id in list(self._pending):
+            await self.flush(project_id)
+
+    async def _flush_later(self, project_id: str):
+        await asyncio.sleep(self.window_seconds)
+        await self.flush(project_id)
+
+if __name__ == "__main__":
+    async def demo():
+        async def show(project_id: str, text: str):
+            print(f"--> {project_id}\n{text}")
+
+        relay = ProgressCoalescer(show, window_seconds=0.2)
+        updates: List[Optional[Dict[str, Any]]] = [
+            {'project_id': 'p1', 'agent_id': 'route-planning-agent', 'status': 'started', 'message': 'Planning route...'},
+            {'project_id': 'p1', 'agent_id': 'web-scraper-agent', 'status': 'started', 'message': 'Scraping travel information...'},
+            {'project_id': 'p2', 'agent_id': 'user-intent-agent', 'status': 'started', 'message': 'Parsing intent...'},
+            {'project_id': 'p1', 'agent_id': 'web-scraper-agent', 'status': 'completed', 'message': 'Scraping complete!'},
+        ]
+        for update in updates:
+            await relay.submit(update)
+        await asyncio.sleep(0.3)
+        print(relay.stats)
+
+    asyncio.run(demo())
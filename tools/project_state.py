@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Project State Tool
+项目状态存储 - 按 project_id 保存意图、抓取数据、分析结果和行程版本，事件只携带字段名和版本号
+
+各 agent 进程共享同一个 SQLite 文件（WAL 模式）；已写入的版本不可变，因此可以在进程内缓存
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+try:
+    from openagents import tool
+except ImportError:
+    def tool(func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / 'data' / 'project_state.sqlite3'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS project_state (
+    project_id TEXT NOT NULL,
+    field      TEXT NOT NULL,
+    version    INTEGER NOT NULL,
+    value      TEXT NOT NULL,
+    author     TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (project_id, field, version)
+)
+"""
+
+
+class ProjectStateStore:
+    """按项目和字段保存带版本的状态，读取最新版本或指定版本"""
+
+    def __init__(self, path: Optional[str] = None, cache_entries: int = 256):
+        self.path = str(path or os.getenv('TRIPMIND_STATE_DB') or DEFAULT_PATH)
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def put(self, project_id: str, field: str, value: Any, author: Optional[str] = None) -> int:
+        """写入字段的新版本，返回版本号"""
+        data = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        connection = self._connection()
+        with connection:
+            # BEGIN IMMEDIATE 保证多个进程同时写同一字段时版本号不冲突
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute('SELECT MAX(version) FROM project_state WHERE project_id = ? AND field = ?',
+                                     (project_id, field)).fetchone()
+            version = (row[0] or 0) + 1
+            connection.execute('INSERT INTO project_state VALUES (?, ?, ?, ?, ?, ?)',
+                               (project_id, field, version, data, author, time.time()))
+        self._remember((project_id, field, version), data)
+        return version
+
+    def get(self, project_id: str, field: str, version: Optional[int] = None, default: Any = None) -> Any:
+        """读取字段，version 为空时读取最新版本"""
+        if version is not None:
+            cached = self._recall((project_id, field, version))
+            if cached is not None:
+                return json.loads(cached)
+            row = self._connection().execute(
+                'SELECT value FROM project_state WHERE project_id = ? AND field = ? AND version = ?',
+                (project_id, field, version)).fetchone()
+        else:
+            latest = self.versions(project_id, [field]).get(field)
+            if latest is None:
+                return default
+            return self.get(project_id, field, latest, default)
+        if row is None:
+            return default
+        # 缓存 JSON 文本而不是对象，调用方修改返回值不会影响缓存
+        self._remember((project_id, field, version), row[0])
+        return json.loads(row[0])
+
+    def get_fields(self, project_id: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """读取多个字段的最新版本；fields 为空时读取全部字段"""
+        return {field: self.get(project_id, field, version)
+                for field, version in self.versions(project_id, fields).items()}
+
+    def versions(self, project_id: str, fields: Optional[List[str]] = None) -> Dict[str, int]:
+        """各字段的最新版本号"""
+        query = 'SELECT field, MAX(version) FROM project_state WHERE project_id = ?'
+        params = [project_id]
+        if fields:
+            query += f" AND field IN ({','.join('?' * len(fields))})"
+            params += list(fields)
+        rows = self._connection().execute(query + ' GROUP BY field', params).fetchall()
+        return {field: version for field, version in rows}
+
+    def history(self, project_id: str, field: str) -> List[Dict[str, Any]]:
+        """字段的版本列表（不含值）"""
+        rows = self._connection().execute(
+            'SELECT version, author, updated_at FROM project_state WHERE project_id = ? AND field = ? ORDER BY version',
+            (project_id, field)).fetchall()
+        return [{'version': version, 'author': author, 'updated_at': updated_at} for version, author, updated_at in rows]
+
+    def delete_project(self, project_id: str) -> int:
+        connection = self._connection()
+        with connection:
+            removed = connection.execute('DELETE FROM project_state WHERE project_id = ?', (project_id,)).rowcount
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == project_id]:
+                del self._cache[key]
+        return removed
+
+    def _connection(self) -> sqlite3.Connection:
+        """每个线程一个连接；首次使用时建表"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+    def _recall(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+# 全局项目状态实例
+project_state = ProjectStateStore()
+
+@tool(name="get_project_state", description="Read the latest shared project state fields (intent, analysis, route, budget, ...)")
+def get_project_state(project_id: str, fields: Optional[List[str]] = None) -> str:
+    try:
+        result = {'success': True, 'project_id': project_id, 'versions': project_state.versions(project_id, fields),
+                  'state': project_state.get_fields(project_id, fields)}
+    except Exception as e:
+        logger.error(f"Project state read error: {str(e)}")
+        result = {'success': False, 'error': f"Project state read failed: {str(e)}", 'project_id': project_id}
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+@tool(name="update_project_state", description="Store a new version of a shared project state field")
+def update_project_state(project_id: str, field: str, value: Any, author: Optional[str] = None) -> str:
+    try:
+        result = {'success': True, 'project_id': project_id, 'field': field,
+                  'version': project_state.put(project_id, field, value, author)}
+    except Exception as e:
+        logger.error(f"Project state write error: {str(e)}")
+        result = {'success': False, 'error': f"Project state write failed: {str(e)}", 'project_id': project_id}
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    import tempfile
+    store = ProjectStateStore(os.path.join(tempfile.mkdtemp(), 'state.sqlite3'))
+    store.put('p1', 'intent', {'destination': '成都', 'days': 3, 'travelers': 4}, 'orchestrator')
+    store.put('p1', 'route', {'days': [{'day': 1, 'items': [{'name': '武侯祠'}]}]}, 'route-planning-agent')
+    version = store.put('p1', 'route', {'days': [{'day': 1, 'items': [{'name': '成都博物馆'}]}]}, 'dynamic-adjuster-agent')
+    print(store.versions('p1'), store.get('p1', 'route', 1)['days'][0]['items'], store.get('p1', 'route')['days'][0]['items'])
+    print(store.history('p1', 'route'))
+    started = time.perf_counter()
+    for _ in range(1000):
+        store.get_fields('p1', ['intent'])
+    print(f"1000 reads in {(time.perf_counter() - started) * 1000:.1f} ms")
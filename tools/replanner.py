@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Incremental Replanner Tool
+增量重规划工具 - 根据约束变化只修复受影响的天和活动，并报告调整代价
+"""
+
+import copy
+import json
+import time
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime
+
+try:
+    from openagents import tool
+except ImportError:
+    def tool(func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+try:
+    from tools.health_filter import PoiFeatures
+    from tools.project_state import project_state
+    from tools.route_optimizer import route_optimizer
+    from tools.tracing import traced
+except ImportError:
+    from health_filter import PoiFeatures
+    from project_state import project_state
+    from route_optimizer import route_optimizer
+    from tracing import traced
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDOOR_WORDS = ['室内', '博物馆', '画廊', '科技馆', '咖啡', '茶馆', '商场', '剧院', 'museum', 'gallery', 'cafe', 'indoor']
+
+
+class IncrementalReplanner:
+    """增量修复引擎：预算超支时删减或替换高价活动，疲劳时降低强度和游览时长"""
+
+    def __init__(self):
+        self.fatigue_threshold = 60
+        # 预算修复最多改动的活动比例，超出部分作为未解决缺口上报
+        self.max_changed_fraction = 0.5
+        # 疲劳度 -> 当天游览总时长上限（分钟）
+        self.fatigue_visit_caps = [(90, 180), (75, 300), (60, 420)]
+
+    def repair_itinerary(self, itinerary: Dict[str, Any], delta: Dict[str, Any],
+                         candidates: Optional[List[Dict[str, Any]]] = None,
+                         options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        增量修复行程
+
+        Args:
+            itinerary: optimize_route 输出的行程（{'days': [{'day', 'items': [...]}]}）
+            delta: 约束变化，可直接传入 constraint_violation / mood_update 事件的 data
+            candidates: 可用于替换或插入的备选 POI
+            options: travelers、current_day、start_date、destination 等
+
+        Returns:
+            修复结果字典，包含新行程和调整代价
+        """
+        try:
+            start_time = time.perf_counter()
+            options = options or {}
+            days = copy.deepcopy(itinerary.get('days', []))
+            if not days:
+                return self._create_error_result("Itinerary has no days to repair")
+
+            constraint = self._normalize_delta(delta, options)
+            logger.info(f"Repairing itinerary for {constraint['kind']} constraint")
+            used_names = {item.get('name') for day in days for item in day.get('items', [])}
+            pool = [poi for poi in candidates or [] if poi.get('name') not in used_names]
+            editable = [day for day in days if day.get('day', 0) >= constraint['from_day']]
+
+            if constraint['kind'] == 'budget':
+                changes, affected, shortfall = self._repair_budget(editable, pool, constraint)
+            elif constraint['kind'] == 'fatigue':
+                changes, affected = self._repair_fatigue(editable, pool, constraint)
+                shortfall = 0.0
+            else:
+                return self._create_error_result(f"Unsupported constraint: {constraint['kind']}")
+
+            for day in days:
+                if day.get('day') in affected:
+                    self._reoptimize_day(day, options)
+
+            return {
+                'success': True,
+                'constraint': constraint,
+                'itinerary': {'days': days},
+                'affected_days': sorted(affected),
+                'changes': changes,
+                'cost_of_change': self._cost_of_change(itinerary.get('days', []), days, changes, shortfall),
+                'solve_time_ms': round((time.perf_counter() - start_time) * 1000, 2),
+                'repaired_at': datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"Replanning error: {str(e)}")
+            return self._create_error_result(f"Replanning failed: {str(e)}")
+
+    def _normalize_delta(self, delta: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+        """将事件数据统一为 {'kind', 'from_day', ...}"""
+        delta = delta.get('data', delta)
+        travelers = max(int(options.get('travelers', 1) or 1), 1)
+        from_day = int(options.get('current_day') or delta.get('current_day') or 1)
+
+        if delta.get('violation_type') == 'budget_exceeded' or delta.get('kind') == 'budget':
+            details = delta.get('details', delta)
+            if 'reduce_by' in details:
+                overspend = float(details['reduce_by'])
+            else:
+                overspend = float(details.get('actual_value', 0)) - float(details.get('expected_value', 0))
+            return {'kind': 'budget', 'from_day': from_day, 'reduce_per_person': round(max(overspend, 0) / travelers, 2),
+                    'reduce_total': round(max(overspend, 0), 2)}
+
+        context = delta.get('context', {})
+        request = delta.get('adjustment_request', {})
+        fatigue = delta.get('fatigue_score', context.get('fatigue_score'))
+        if fatigue is not None or delta.get('kind') == 'fatigue':
+            fatigue = float(fatigue or self.fatigue_threshold)
+            # 当天傍晚上报的疲劳只影响之后的行程
+            first_day = from_day + 1 if delta.get('current_day') and not options.get('current_day') else from_day
+            cap = next((minutes for level, minutes in self.fatigue_visit_caps if fatigue >= level), None)
+            return {'kind': 'fatigue', 'from_day': first_day, 'fatigue_score': fatigue,
+                    'days_affected': int(delta.get('days_affected', 1)), 'max_visit_minutes': cap,
+                    'avoid': request.get('avoid_activities', []), 'prefer': request.get('preferred_activities', []),
+                    'midday_rest': any('午休' in need or 'rest' in need.lower() for need in request.get('special_needs', []))}
+        return {'kind': delta.get('violation_type') or delta.get('kind') or 'unknown', 'from_day': from_day}
+
+    def _item_cost(self, item: Dict[str, Any]) -> float:
+        price = item.get('price')
+        if isinstance(price, dict):
+            return float(price.get('amount') or 0)
+        if isinstance(price, (int, float)):
+            return float(price)
+        return 0.0
+
+    def _item_value(self, item: Dict[str, Any]) -> float:
+        if isinstance(item.get('score'), (int, float)):
+            return float(item['score'])
+        rating = item.get('rating')
+        return rating / 5.0 if isinstance(rating, (int, float)) and rating > 0 else 0.5
+
+    def _repair_budget(self, days: List[Dict[str, Any]], pool: List[Dict[str, Any]],
+                       constraint: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], set, float]:
+        """按 价值损失/节省金额 从小到大替换或删除活动，直到覆盖超支"""
+        needed = constraint['reduce_per_person']
+        options = []
+        for day in days:
+            for item in day.get('items', []):
+                cost = self._item_cost(item)
+                if cost <= 0:
+                    continue
+                replacement = self._cheaper_alternative(item, pool)
+                if replacement:
+                    saving = cost - self._item_cost(replacement)
+                    loss = max(self._item_value(item) - self._item_value(replacement), 0.01)
+                    options.append((loss / saving, 'replace', day, item, replacement, saving))
+                options.append((self._item_value(item) / cost, 'drop', day, item, None, cost))
+        options.sort(key=lambda option: option[0])
+
+        total_items = sum(len(day.get('items', [])) for day in days)
+        max_changes = int(total_items * self.max_changed_fraction)
+        changes, affected, touched, saved = [], set(), set(), 0.0
+        for _, action, day, item, replacement, saving in options:
+            if saved >= needed or len(changes) >= max_changes:
+                break
+            if id(item) in touched or (replacement and replacement.get('name') in touched):
+                continue
+            if action == 'drop' and len(day['items']) <= 1:
+                continue
+            touched.add(id(item))
+            items = day['items']
+            position = items.index(item)
+            if action == 'replace':
+                touched.add(replacement.get('name'))
+                pool.remove(replacement)
+                items[position] = self._as_item(replacement, item)
+            else:
+                items.pop(position)
+            saved += saving
+            affected.add(day.get('day'))
+            changes.append({'day': day.get('day'), 'action': action, 'item': item.get('name'),
+                            'replacement': replacement.get('name') if replacement else None,
+                            'saving_per_person': round(saving, 2)})
+        return changes, affected, round(max(needed - saved, 0.0), 2)
+
+    def _cheaper_alternative(self, item: Dict[str, Any], pool: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """在备选中找同类型或标签相近且更便宜的 POI"""
+        cost = self._item_cost(item)
+        tags = set(item.get('tags', []) or [])
+        best, best_key = None, None
+        for poi in pool:
+            if self._item_cost(poi) >= cost:
+                continue
+            similarity = len(tags & set(poi.get('tags', []) or [])) + (1 if poi.get('type') == item.get('type') else 0)
+            if similarity == 0:
+                continue
+            key = (similarity, self._item_value(poi))
+            if best_key is None or key > best_key:
+                best, best_key = poi, key
+        return best
+
+    def _repair_fatigue(self, days: List[Dict[str, Any]], pool: List[Dict[str, Any]],
+                        constraint: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], set]:
+        """移除高强度或需回避的活动，压缩游览时长，再补入低强度备选"""
+        target_days = [day for day in days if day.get('day', 0) < constraint['from_day'] + constraint['days_affected']]
+        avoid = [word.lower() for word in constraint.get('avoid', [])]
+        avoid_outdoor = any('户外' in word or 'outdoor' in word for word in avoid)
+        changes, affected = [], set()
+        for day in target_days:
+            kept = []
+            for item in day.get('items', []):
+                features = PoiFeatures(item)
+                reason = None
+                if features.intensity >= 2:
+                    reason = 'high intensity'
+                elif any(word and word in features.text for word in avoid):
+                    reason = 'matches avoided activity'
+                elif avoid_outdoor and features.intensity >= 1 and not features.mentions(INDOOR_WORDS):
+                    reason = 'outdoor activity'
+                if reason:
+                    changes.append({'day': day.get('day'), 'action': 'drop', 'item': item.get('name'), 'reason': reason})
+                else:
+                    kept.append(item)
+
+            cap = constraint.get('max_visit_minutes')
+            if cap:
+                kept.sort(key=self._item_value, reverse=True)
+                total, capped = 0, []
+                for item in kept:
+                    minutes = self._visit_minutes(item)
+                    if total + minutes > cap:
+                        changes.append({'day': day.get('day'), 'action': 'drop', 'item': item.get('name'),
+                                        'reason': 'daily visit time cap'})
+                        continue
+                    total += minutes
+                    capped.append(item)
+                kept = capped
+                for poi in self._relaxed_candidates(pool, avoid, constraint.get('prefer', [])):
+                    minutes = self._visit_minutes(poi)
+                    if total + minutes > cap:
+                        continue
+                    pool.remove(poi)
+                    kept.append(self._as_item(poi))
+                    total += minutes
+                    changes.append({'day': day.get('day'), 'action': 'insert', 'item': poi.get('name'),
+                                    'reason': 'low-intensity alternative'})
+                    break
+
+            if len(kept) != len(day.get('items', [])) or any(c['day'] == day.get('day') for c in changes):
+                day['items'] = kept
+                affected.add(day.get('day'))
+            if constraint.get('midday_rest'):
+                day['rest_break'] = {'start': '12:00', 'end': '14:00'}
+                affected.add(day.get('day'))
+        return changes, affected
+
+    def _relaxed_candidates(self, pool: List[Dict[str, Any]], avoid: List[str], prefer: List[str]) -> List[Dict[str, Any]]:
+        ranked = []
+        for poi in pool:
+            features = PoiFeatures(poi)
+            if features.intensity >= 2 or any(word and word in features.text for word in avoid):
+                continue
+            bonus = sum(1 for word in prefer if word.lower() in features.text) + (1 if features.mentions(INDOOR_WORDS) else 0)
+            ranked.append((bonus, self._item_value(poi), poi))
+        ranked.sort(key=lambda entry: (entry[0], entry[1]), reverse=True)
+        return [poi for _, _, poi in ranked]
+
+    def _visit_minutes(self, item: Dict[str, Any]) -> int:
+        if item.get('start') and item.get('end'):
+            return self._clock(item['end']) - self._clock(item['start'])
+        features = PoiFeatures(item)
+        return features.duration or 90
+
+    def _clock(self, text: str) -> int:
+        hours, minutes = str(text).split(':')
+        return int(hours) * 60 + int(minutes)
+
+    def _as_item(self, poi: Dict[str, Any], replacing: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        item = dict(poi)
+        if replacing and 'duration' not in item and replacing.get('start'):
+            item['duration'] = self._visit_minutes(replacing)
+        return item
+
+    def _reoptimize_day(self, day: Dict[str, Any], options: Dict[str, Any]):
+        """只对受影响的一天重新排序和排程"""
+        pois = []
+        for item in day.get('items', []):
+            poi = dict(item)
+            if item.get('start') and item.get('end'):
+                poi['duration'] = self._visit_minutes(item)
+            pois.append(poi)
+        if not pois:
+            return
+        day_options = {'destination': options.get('destination', ''), 'max_items_per_day': len(pois)}
+        if day.get('date'):
+            day_options['start_date'] = day['date']
+        if day.get('rest_break'):
+            # 午休作为固定时段的占位活动参与排程
+            pois.append({'name': '午休', 'duration': 120, 'opening_hours': '12:00-14:00', 'score': 1.0})
+            day_options['max_items_per_day'] += 1
+        result = route_optimizer.optimize_route(pois, 1, day_options)
+        if result.get('success') and result['days']:
+            solved = result['days'][0]
+            day['items'] = solved['items']
+            day['total_travel_minutes'] = solved['total_travel_minutes']
+            day['total_visit_minutes'] = solved['total_visit_minutes']
+            if result['unscheduled']:
+                day['dropped_by_schedule'] = result['unscheduled']
+
+    def _cost_of_change(self, before: List[Dict[str, Any]], after: List[Dict[str, Any]],
+                        changes: List[Dict[str, Any]], shortfall: float) -> Dict[str, Any]:
+        def per_person(days):
+            return sum(self._item_cost(item) for day in days for item in day.get('items', []))
+
+        def travel(days):
+            return sum(day.get('total_travel_minutes', 0) for day in days)
+
+        total_items = sum(len(day.get('items', [])) for day in before) or 1
+        return {
+            'items_changed': len(changes),
+            'changed_fraction': round(len(changes) / total_items, 2),
+            'cost_delta_per_person': round(per_person(after) - per_person(before), 2),
+            'travel_minutes_delta': travel(after) - travel(before),
+            'unresolved_budget_per_person': shortfall
+        }
+
+    def _create_error_result(self, error_message: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': error_message,
+            'itinerary': {'days': []},
+            'affected_days': [],
+            'changes': [],
+            'cost_of_change': {},
+            'repaired_at': datetime.now().isoformat()
+        }
+
+replanner = IncrementalReplanner()
+
+@tool(name="repair_itinerary", description="Incrementally repair an itinerary after a budget or fatigue constraint change")
+@traced('repair_itinerary')
+def repair_itinerary(itinerary: Optional[Dict[str, Any]], delta: Dict[str, Any],
+                     candidates: Optional[List[Dict[str, Any]]] = None,
+                     options: Optional[Dict[str, Any]] = None) -> str:
+    # 未传行程时从项目状态读取最新路线，修复结果保存为新版本
+    project_id = (options or {}).get('project_id')
+    if not itinerary and project_id:
+        itinerary = project_state.get(project_id, 'route', default={})
+    result = replanner.repair_itinerary(itinerary or {}, delta, candidates, options)
+    if result['success'] and project_id and result['changes']:
+        result['state_version'] = project_state.put(project_id, 'route', result['itinerary'], 'dynamic-adjuster-agent')
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    import os
+    events_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'events')
+    test_pois = [
+        {'name': '武侯祠', 'type': '古迹', 'rating': 4.6, 'price': {'amount': 50}, 'duration': '2小时',
+         'opening_hours': '8:00-18:00', 'tags': ['历史', '文化'], 'location': {'lat': 30.646, 'lng': 104.047}},
+        {'name': '青城山徒步', 'type': '景点', 'rating': 4.7, 'price': {'amount': 90}, 'duration': '4小时',
+         'opening_hours': '8:00-18:00', 'tags': ['徒步', '户外'], 'location': {'lat': 30.900, 'lng': 103.570}},
+        {'name': '熊猫基地', 'type': '公园', 'rating': 4.8, 'price': {'amount': 55}, 'duration': '3小时',
+         'opening_hours': '7:30-18:00', 'tags': ['自然', '家庭'], 'location': {'lat': 30.733, 'lng': 104.146}},
+        {'name': '川剧变脸', 'type': '剧院', 'rating': 4.5, 'price': {'amount': 180}, 'duration': '1.5小时',
+         'opening_hours': '19:00-21:30', 'tags': ['文化', '室内'], 'location': {'lat': 30.660, 'lng': 104.060}},
+        {'name': '宽窄巷子', 'type': '古迹', 'rating': 4.3, 'price': {'amount': 0}, 'duration': '2小时',
+         'opening_hours': '24小时开放', 'tags': ['美食', '文化'], 'location': {'lat': 30.670, 'lng': 104.053}},
+    ]
+    test_candidates = [
+        {'name': '成都博物馆', 'type': '博物馆', 'rating': 4.7, 'price': {'amount': 0}, 'duration': '2小时',
+         'opening_hours': '9:00-17:00 (周一闭馆)', 'tags': ['历史', '文化', '室内'], 'location': {'lat': 30.657, 'lng': 104.064}},
+        {'name': '人民公园茶馆', 'type': '茶馆', 'rating': 4.4, 'price': {'amount': 30}, 'duration': '1.5小时',
+         'opening_hours': '9:00-21:00', 'tags': ['休闲', '室内'], 'location': {'lat': 30.658, 'lng': 104.056}},
+    ]
+    plan = route_optimizer.optimize_route(test_pois, 5, {'start_date': '2026-01-01', 'max_items_per_day': 2})
+    for name in ('example_mood_update.json', 'example_constraint_violation.json'):
+        with open(os.path.join(events_dir, name), encoding='utf-8') as f:
+            event = json.load(f)
+        result = replanner.repair_itinerary(plan, event, test_candidates, {'travelers': 4})
+        print(name, json.dumps({k: result[k] for k in ('affected_days', 'changes', 'cost_of_change', 'solve_time_ms')},
+                               ensure_ascii=False, indent=2))
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Route Optimizer Tool
+路线优化工具 - 基于坐标、开放时间和游览时长生成每日有序路线
+"""
+
+import json
+import time
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timedelta
+import re
+
+try:
+    from openagents import tool
+except ImportError:
+    def tool(func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+try:
+    from tools.blob_store import blob_store
+    from tools.distance_matrix import distance_service
+    from tools.project_state import project_state
+    from tools.opening_hours import parse_opening_hours, WEEKDAY_NAMES
+    from tools.tracing import traced
+except ImportError:
+    from blob_store import blob_store
+    from distance_matrix import distance_service
+    from project_state import project_state
+    from opening_hours import parse_opening_hours, WEEKDAY_NAMES
+    from tracing import traced
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RouteOptimizer:
+    """带时间窗的每日路线求解器（插入启发式 + 2-opt / or-opt 局部优化）"""
+
+    def __init__(self):
+        self.defaults = {
+            'day_start': '9:00',
+            'day_end': '22:00',
+            'speed_kmh': 25.0,
+            'default_travel_minutes': 30,
+            'default_duration_minutes': 90,
+            'max_items_per_day': 6,
+            'start_date': None,
+            'start_location': None,
+            'destination': ''
+        }
+
+    def optimize_route(self, pois: List[Dict[str, Any]], days: int = 1,
+                       options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        生成每日路线
+
+        Args:
+            pois: 候选地点列表，包含 name、location.lat/lng、opening_hours、duration、rating
+            days: 行程天数
+            options: 覆盖默认参数（day_start、day_end、speed_kmh、start_date、start_location、destination 等）
+
+        Returns:
+            路线结果字典
+        """
+        try:
+            start_time = time.perf_counter()
+            settings = dict(self.defaults)
+            settings.update(options or {})
+
+            candidates = [poi for poi in pois if isinstance(poi, dict) and poi.get('name')]
+            if not candidates:
+                return self._create_error_result("No candidate POIs to schedule")
+            logger.info(f"Optimizing {len(candidates)} POIs over {days} days")
+
+            day_start = self._parse_clock(settings['day_start'])
+            day_end = self._parse_clock(settings['day_end'])
+            durations = [self._parse_duration(poi, settings['default_duration_minutes']) for poi in candidates]
+            scores = [self._poi_score(poi) for poi in candidates]
+            travel = self._build_travel_matrix(candidates, settings)
+            depot = len(candidates) if settings.get('start_location') else None
+
+            start_weekday = self._start_weekday(settings.get('start_date'))
+            unassigned = set(range(len(candidates)))
+            day_plans = []
+            for day_index in range(int(days)):
+                weekday = (start_weekday + day_index) % 7 if start_weekday is not None else None
+                windows = {i: self._opening_windows(candidates[i], weekday, day_start, day_end) for i in unassigned}
+                problem = {
+                    'travel': travel, 'durations': durations, 'scores': scores, 'windows': windows,
+                    'depot': depot, 'day_start': day_start, 'day_end': day_end,
+                    'max_items': int(settings['max_items_per_day'])
+                }
+                route = self._build_day_route(problem, unassigned)
+                route = self._improve_route(problem, route)
+                route = self._fill_route(problem, route, unassigned - set(route))
+                unassigned -= set(route)
+                day_plans.append(self._describe_day(problem, route, candidates, day_index, weekday, settings))
+
+            return {
+                'success': True,
+                'days': day_plans,
+                'unscheduled': [candidates[i].get('name', '') for i in sorted(unassigned)],
+                'statistics': {
+                    'candidate_count': len(candidates),
+                    'scheduled_count': len(candidates) - len(unassigned),
+                    'total_travel_minutes': sum(day['total_travel_minutes'] for day in day_plans),
+                    'solve_time_ms': round((time.perf_counter() - start_time) * 1000, 2)
+                },
+                'optimized_at': datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"Route optimization error: {str(e)}")
+            return self._create_error_result(f"Route optimization failed: {str(e)}")
+
+    def _build_travel_matrix(self, pois: List[Dict[str, Any]], settings: Dict[str, Any]) -> List[List[float]]:
+        """计算两两之间的行程时间（分钟），缺少坐标时使用默认值"""
+        points = list(pois)
+        if settings.get('start_location'):
+            points.append({'name': '__start__', 'location': settings['start_location']})
+        matrix = distance_service.get_matrix(settings.get('destination', ''), points)
+        return matrix.travel_minutes(speed_kmh=settings['speed_kmh'],
+                                     fallback_minutes=settings['default_travel_minutes']).tolist()
+
+    def _parse_clock(self, text: str) -> int:
+        hours, minutes = str(text).split(':')
+        return int(hours) * 60 + int(minutes)
+
+    def _parse_duration(self, poi: Dict[str, Any], default: int) -> int:
+        duration = poi.get('duration')
+        if isinstance(duration, (int, float)):
+            return int(duration)
+        if not duration:
+            return default
+        numbers = [float(n) for n in re.findall(r'\d+(?:\.\d+)?', str(duration))]
+        if not numbers:
+            return default
+        value = sum(numbers[:2]) / len(numbers[:2])
+        if '分' in str(duration) or 'min' in str(duration).lower():
+            return int(value)
+        return int(value * 60)
+
+    def _poi_score(self, poi: Dict[str, Any]) -> float:
+        if isinstance(poi.get('score'), (int, float)):
+            return max(float(poi['score']), 0.05)
+        rating = poi.get('rating', 0)
+        if isinstance(rating, (int, float)) and rating > 0:
+            return rating / 5.0
+        return 0.5
+
+    def _start_weekday(self, start_date: Optional[str]) -> Optional[int]:
+        if not start_date:
+            return None
+        return datetime.strptime(str(start_date)[:10], '%Y-%m-%d').weekday()
+
+    def _opening_windows(self, poi: Dict[str, Any], weekday: Optional[int], day_start: int,
+                         day_end: int) -> List[Tuple[int, int]]:
+        """取编译后的开放时间，返回与行程时段相交的时间窗列表"""
+        schedule = parse_opening_hours(poi.get('opening_hours') or poi.get('practical_info') or '')
+        windows = []
+        for open_at, close_at in schedule.day_intervals(weekday):
+            open_at, close_at = max(open_at, day_start), min(close_at, day_end)
+            if open_at < close_at:
+                windows.append((open_at, close_at))
+        return windows
+
+    def _schedule(self, problem: Dict[str, Any], route: List[int]) -> Optional[List[Dict[str, float]]]:
+        """按顺序排程，返回每站到达/开始/结束时间；不可行时返回 None"""
+        travel, durations, depot = problem['travel'], problem['durations'], problem['depot']
+        clock = problem['day_start']
+        previous = depot
+        visits = []
+        for node in route:
+            move = travel[previous][node] if previous is not None else 0.0
+            arrival = clock + move
+            slot = self._fit_window(problem['windows'].get(node, []), arrival, durations[node])
+            if slot is None:
+                return None
+            start, close = slot
+            clock = start + durations[node]
+            visits.append({'node': node, 'travel': move, 'arrival': arrival, 'start': start,
+                           'end': clock, 'close': close})
+            previous = node
+        if visits and depot is not None:
+            clock += travel[previous][depot]
+        if clock > problem['day_end']:
+            return None
+        return visits
+
+    def _fit_window(self, windows: List[Tuple[int, int]], arrival: float,
+                    duration: int) -> Optional[Tuple[float, int]]:
+        for open_at, close_at in windows:
+            start = max(arrival, open_at)
+            if start + duration <= close_at:
+                return start, close_at
+        return None
+
+    def _max_shifts(self, problem: Dict[str, Any], visits: List[Dict[str, float]]) -> List[float]:
+        """每站可推迟的最大分钟数（不破坏后续站点的时间窗和日终时间）"""
+        tail = problem['day_end']
+        if visits and problem['depot'] is not None:
+            tail -= problem['travel'][visits[-1]['node']][problem['depot']]
+        shifts = [0.0] * len(visits)
+        following = tail - visits[-1]['end'] if visits else 0.0
+        for position in range(len(visits) - 1, -1, -1):
+            visit = visits[position]
+            shifts[position] = min(visit['close'] - visit['end'], following)
+            following = (visit['start'] - visit['arrival']) + shifts[position]
+        return shifts
+
+    def _best_insertion(self, problem: Dict[str, Any], route: List[int], visits: List[Dict[str, float]],
+                        candidates: set) -> Optional[Tuple[float, int, int]]:
+        """在所有候选和位置中选择 得分/绕行时间 比值最高的插入（游览时长不计入惩罚）"""
+        travel, durations, depot = problem['travel'], problem['durations'], problem['depot']
+        shifts = self._max_shifts(problem, visits)
+        best = None
+        for node in candidates:
+            windows = problem['windows'].get(node)
+            if not windows:
+                continue
+            for position in range(len(route) + 1):
+                previous = route[position - 1] if position > 0 else depot
+                prev_end = visits[position - 1]['end'] if position > 0 else problem['day_start']
+                move_in = travel[previous][node] if previous is not None else 0.0
+                slot = self._fit_window(windows, prev_end + move_in, durations[node])
+                if slot is None:
+                    continue
+                node_end = slot[0] + durations[node]
+                if position < len(route):
+                    following = route[position]
+                    old_move = travel[previous][following] if previous is not None else 0.0
+                    added = node_end - prev_end + travel[node][following] - old_move
+                    wait_next = visits[position]['start'] - visits[position]['arrival']
+                    if added > wait_next + shifts[position]:
+                        continue
+                else:
+                    move_out = travel[node][depot] if depot is not None else 0.0
+                    old_out = travel[previous][depot] if depot is not None and previous is not None else 0.0
+                    if node_end + move_out > problem['day_end']:
+                        continue
+                    added = node_end - prev_end + move_out - old_out
+                detour = added - durations[node]
+                ratio = problem['scores'][node] ** 2 / (detour + 10.0)
+                if best is None or ratio > best[0]:
+                    best = (ratio, node, position)
+        return best
+
+    def _build_day_route(self, problem: Dict[str, Any], candidates: set) -> List[int]:
+        return self._fill_route(problem, [], set(candidates))
+
+    def _fill_route(self, problem: Dict[str, Any], route: List[int], candidates: set) -> List[int]:
+        route = list(route)
+        candidates = set(candidates)
+        visits = self._schedule(problem, route) or []
+        while len(route) < problem['max_items'] and candidates:
+            best = self._best_insertion(problem, route, visits, candidates)
+            if best is None:
+                break
+            _, node, position = best
+            route.insert(position, node)
+            candidates.discard(node)
+            visits = self._schedule(problem, route)
+        return route
+
+    def _route_cost(self, problem: Dict[str, Any], route: List[int]) -> Optional[float]:
+        visits = self._schedule(problem, route)
+        if visits is None:
+            return None
+        cost = sum(visit['travel'] for visit in visits)
+        if visits and problem['depot'] is not None:
+            cost += problem['travel'][route[-1]][problem['depot']]
+        return cost
+
+    def _improve_route(self, problem: Dict[str, Any], route: List[int]) -> List[int]:
+        """2-opt 与 or-opt 局部搜索，降低总行程时间且保持时间窗可行"""
+        best_cost = self._route_cost(problem, route)
+        if best_cost is None or len(route) < 3:
+            return route
+        improved = True
+        while improved:
+            improved = False
+            for i in range(len(route) - 1):
+                for j in range(i + 1, len(route)):
+                    moves = [route[:i] + route[i:j + 1][::-1] + route[j + 1:]]
+                    node = route[i]
+                    remainder = route[:i] + route[i + 1:]
+                    moves.append(remainder[:j] + [node] + remainder[j:])
+                    for candidate in moves:
+                        cost = self._route_cost(problem, candidate)
+                        if cost is not None and cost < best_cost - 1e-6:
+                            route, best_cost, improved = candidate, cost, True
+                            break
+                    if improved:
+                        break
+                if improved:
+                    break
+        return route
+
+    def _describe_day(self, problem: Dict[str, Any], route: List[int], pois: List[Dict[str, Any]],
+                      day_index: int, weekday: Optional[int], settings: Dict[str, Any]) -> Dict[str, Any]:
+        visits = self._schedule(problem, route) or []
+        items = []
+        for visit in visits:
+            poi = pois[visit['node']]
+            items.append({
+                'name': poi.get('name', ''),
+                'type': poi.get('type', ''),
+                'arrival': self._format_clock(visit['arrival']),
+                'start': self._format_clock(visit['start']),
+                'end': self._format_clock(visit['end']),
+                'travel_minutes': round(visit['travel']),
+                'wait_minutes': round(visit['start'] - visit['arrival']),
+                'location': poi.get('location'),
+                'opening_hours': poi.get('opening_hours', ''),
+                'price': poi.get('price'),
+                'rating': poi.get('rating'),
+                'tags': poi.get('tags', [])
+            })
+        day = {
+            'day': day_index + 1,
+            'weekday': WEEKDAY_NAMES[weekday] if weekday is not None else None,
+            'items': items,
+            'total_travel_minutes': round(sum(visit['travel'] for visit in visits)),
+            'total_visit_minutes': round(sum(visit['end'] - visit['start'] for visit in visits))
+        }
+        if settings.get('start_date'):
+            date = datetime.strptime(str(settings['start_date'])[:10], '%Y-%m-%d') + timedelta(days=day_index)
+            day['date'] = date.strftime('%Y-%m-%d')
+        return day
+
+    def _format_clock(self, minutes: float) -> str:
+        minutes = int(round(minutes))
+        return f"{minutes // 60}:{minutes % 60:02d}"
+
+    def _create_error_result(self, error_message: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'error': error_message,
+            'days': [],
+            'unscheduled': [],
+            'statistics': {'candidate_count': 0, 'scheduled_count': 0, 'total_travel_minutes': 0, 'solve_time_ms': 0},
+            'optimized_at': datetime.now().isoformat()
+        }
+
+route_optimizer = RouteOptimizer()
+
+@tool(name="optimize_route", description="Build per-day ordered routes from POIs using coordinates, opening hours and visit durations")
+@traced('optimize_route')
+def optimize_route(pois: List[Dict[str, Any]], days: int = 1, options: Optional[Dict[str, Any]] = None) -> str:
+    # pois 可以是 info.analysis.completed 中 top_recommendations 的 blob 引用
+    result = route_optimizer.optimize_route(blob_store.resolve(pois), days, options)
+    # 带 project_id 时把路线保存为项目状态的新版本，后续事件只需携带版本号
+    if result['success'] and (options or {}).get('project_id'):
+        result['state_version'] = project_state.put(options['project_id'], 'route', {'days': result['days']},
+                                                    'route-planning-agent')
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    import random
+    random.seed(7)
+    test_pois = [
+        {
+            'name': f'景点{i}',
+            'type': '景点',
+            'rating': round(random.uniform(3.5, 5.0), 1),
+            'opening_hours': random.choice(['9:00-17:00 (周一闭馆)', '24小时开放', '10:00-18:00 (周二闭馆)', '8:00-18:00']),
+            'duration': random.choice(['1-2小时', '2-3小时', '30分钟']),
+            'location': {'lat': 35.68 + random.uniform(-0.08, 0.08), 'lng': 139.76 + random.uniform(-0.08, 0.08)}
+        }
+        for i in range(220)
+    ]
+    result = route_optimizer.optimize_route(test_pois, 7, {'start_date': '2024-03-01'})
+    print(json.dumps(result['statistics'], ensure_ascii=False, indent=2))
+    for day in result['days']:
+        print(day['day'], day['weekday'], [(item['name'], item['start'], item['end']) for item in day['items']])
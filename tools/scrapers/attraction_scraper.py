@@ -9,6 +9,11 @@ from typing import Dict, List, Any
 from datetime import datetime
 from .base_scraper import BaseScraper
 
+try:
+    from tools.poi_catalog import poi_catalog, OFFLINE as POI_CATALOG_OFFLINE
+except ImportError:
+    from poi_catalog import poi_catalog, OFFLINE as POI_CATALOG_OFFLINE
+
 logger = logging.getLogger(__name__)
 
 class AttractionScraper(BaseScraper):
@@ -48,8 +53,11 @@ class AttractionScraper(BaseScraper):
         logger.info(f"开始抓取 {location} 的景点信息，关键词: {keywords}")
         
         # 在实际实现中，这里会调用真实的网站API或抓取网页
-        # 目前使用模拟数据进行演示
-        attractions = self._generate_mock_attractions(location, keywords, budget_range)
+        # 目前使用模拟数据进行演示；同一地点只生成一次，之后由本地 POI 目录按关键词和预算检索
+        if not (POI_CATALOG_OFFLINE or poi_catalog.is_fresh('attractions', location)):
+            poi_catalog.upsert('attractions', location,
+                               self._generate_mock_attractions(location, [], [0, float('inf')]), self.name)
+        attractions = poi_catalog.search('attractions', location, keywords, budget_range)
         
         logger.info(f"成功抓取到 {len(attractions)} 个景点")
         return attractions
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Token Estimator
+Token 估算 - 不调用模型、不加载分词器，按字符类别粗略估计文本或 JSON 值的 token 数
+
+经验值（GLM / GPT 类 BPE 分词器）: 中日韩字符约 1 字符 1 token，英文单词约 4 字符 1 token，
+JSON 中的标点和数字切分更碎，约 2 字符 1 token。估计值略偏高，用于预算时留有余量。
+"""
+
+import json
+import math
+import re
+from typing import Any
+
+CJK_PATTERN = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿＀-￯]')
+WORD_PATTERN = re.compile(r'[A-Za-z]+')
+SYMBOL_PATTERN = re.compile(r'[^\sA-Za-z぀-ヿ㐀-䶿一-鿿가-힯豈-﫿＀-￯]')
+
+
+def to_text(value: Any) -> str:
+    """非字符串按紧凑 JSON 序列化，与事件负载进入提示词时的形式一致"""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def estimate_tokens(value: Any) -> int:
+    """估算文本或可 JSON 序列化值的 token 数"""
+    text = to_text(value)
+    if not text:
+        return 0
+    cjk = len(CJK_PATTERN.findall(text))
+    words = sum(math.ceil(len(word) / 4) for word in WORD_PATTERN.findall(text))
+    symbols = math.ceil(len(SYMBOL_PATTERN.findall(text)) / 2)
+    return cjk + words + symbols
+
+
+def truncate_to_tokens(text: str, max_tokens: int, suffix: str = '…') -> str:
+    """截断文本使估算 token 数不超过 max_tokens（二分查找截断位置）"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle] + suffix) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] + suffix if low else ''
+
+if __name__ == "__main__":
+    samples = [
+        'Senso-ji Temple is the oldest temple in Tokyo.',
+        '浅草寺是东京最古老的寺庙',
+        {'name': 'Tokyo National Museum', 'rating': 4.6, 'price': {'amount': 1000, 'currency': 'JPY'}},
+    ]
+    for sample in samples:
+        print(estimate_tokens(sample), to_text(sample))
+    print(truncate_to_tokens('Found 42 items. Types: Museum(12), Temple(9), Park(8). Average rating: 4.3.', 10))
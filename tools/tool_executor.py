@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Tool Executor
+工具执行器 - 把阻塞的抓取放到有界线程池、把 CPU 密集的分析放到进程池，agent 的事件循环不被阻塞
+
+- 并发上限用 asyncio.Semaphore 控制，超出的调用在事件循环中排队，排队期间可以直接取消；
+- 超时或取消时，尚未开始的任务直接撤销；已在运行的任务无法中断，其结果被丢弃，
+  槽位等任务真正结束后才释放，线程池 / 进程池中的任务数始终不超过上限；
+- 线程池调用复制当前 contextvars，工具内的追踪 span 仍挂在调用方的 span 下。
+
+线程数: TRIPMIND_TOOL_THREADS（默认 8）；进程数: TRIPMIND_TOOL_PROCESSES（默认 CPU 核数的一半）
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from tools.tracing import detach_context
+except ImportError:
+    from tracing import detach_context
+
+logger = logging.getLogger(__name__)
+
+
+class ToolExecutor:
+    """有界线程池 + 进程池，按需创建"""
+
+    def __init__(self, max_threads: Optional[int] = None, max_processes: Optional[int] = None):
+        self.max_threads = max_threads or int(os.getenv('TRIPMIND_TOOL_THREADS', '8'))
+        self.max_processes = (max_processes or int(os.getenv('TRIPMIND_TOOL_PROCESSES', '0'))
+                              or max((os.cpu_count() or 2) // 2, 1))
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # 信号量绑定事件循环，按 (循环, 池类型) 分别创建
+        self._slots: Dict[tuple, asyncio.Semaphore] = {}
+        self.stats = {'thread_calls': 0, 'process_calls': 0, 'timeouts': 0, 'cancelled': 0, 'abandoned': 0,
+                      'broken_pools': 0}
+
+    async def run_blocking(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """在线程池中运行阻塞函数（网络请求、sleep、文件 I/O）"""
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        self.stats['thread_calls'] += 1
+        return await self._run('thread', self._thread_pool, call, timeout)
+
+    async def run_cpu(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """在进程池中运行 CPU 密集函数；func 和参数必须可以 pickle（模块级函数）"""
+        self.stats['process_calls'] += 1
+        try:
+            return await self._run('process', self._process_pool, functools.partial(func, *args, **kwargs), timeout)
+        except BrokenProcessPool:
+            # 子进程异常退出后整个进程池不可用，丢弃后下次调用重建
+            self.stats['broken_pools'] += 1
+            with self._lock:
+                self._processes = None
+            raise
+
+    async def _run(self, kind: str, pool: Callable[[], Any], call: Callable, timeout: Optional[float]) -> Any:
+        loop = asyncio.get_running_loop()
+        slots = self._semaphore(loop, kind)
+        deadline = loop.time() + timeout if timeout else None
+        try:
+            # 排队也计入超时
+            await asyncio.wait_for(slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            raise
+        except asyncio.CancelledError:
+            self.stats['cancelled'] += 1
+            raise
+
+        try:
+            future = pool().submit(call)
+        except BaseException:
+            slots.release()
+            raise
+        release_now = True
+        try:
+            remaining = max(deadline - loop.time(), 0) if deadline else None
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), remaining)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            self.stats['timeouts' if isinstance(e, asyncio.TimeoutError) else 'cancelled'] += 1
+            if not future.cancel():
+                # 已在运行，无法中断：结果丢弃，任务结束后再释放槽位
+                release_now = False
+                self.stats['abandoned'] += 1
+                logger.warning(f"{kind} task {getattr(call, 'func', call)} abandoned after "
+                               f"{'timeout' if isinstance(e, asyncio.TimeoutError) else 'cancellation'}, still running")
+                future.add_done_callback(lambda _: loop.call_soon_threadsafe(slots.release))
+            raise
+        finally:
+            if release_now:
+                slots.release()
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop, kind: str) -> asyncio.Semaphore:
+        key = (id(loop), kind)
+        if key not in self._slots:
+            self._slots[key] = asyncio.Semaphore(self.max_threads if kind == 'thread' else self.max_processes)
+        return self._slots[key]
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix='tripmind-tool')
+            return self._threads
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._processes is None:
+                # 子进程中的工具不属于任何 span，由调用方在父进程中记录
+                self._processes = ProcessPoolExecutor(max_workers=self.max_processes, initializer=detach_context)
+            return self._processes
+
+    def shutdown(self, wait: bool = False):
+        """撤销排队中的任务并关闭两个池"""
+        with self._lock:
+            pools, self._threads, self._processes = [self._threads, self._processes], None, None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
+
+# 全局执行器实例
+tool_executor = ToolExecutor()
+
+
+def _busy(seconds: float) -> float:
+    end = time.perf_counter() + seconds
+    count = 0
+    while time.perf_counter() < end:
+        count += 1
+    return seconds
+
+if __name__ == "__main__":
+    async def demo():
+        executor = ToolExecutor(max_threads=4, max_processes=2)
+        started = time.perf_counter()
+        heartbeat = []
+
+        async def beat():
+            while True:
+                heartbeat.append(round(time.perf_counter() - started, 2))
+                await asyncio.sleep(0.1)
+
+        beater = asyncio.create_task(beat())
+        results = await asyncio.gather(
+            *(executor.run_blocking(time.sleep, 0.5) for _ in range(8)),
+            *(executor.run_cpu(_busy, 0.5) for _ in range(4)),
+            executor.run_blocking(time.sleep, 2, timeout=0.3),
+            return_exceptions=True)
+        beater.cancel()
+        print(f'12 calls in {time.perf_counter() - started:.2f}s, loop ticks: {len(heartbeat)}')
+        print('timeout ->', type(results[-1]).__name__, executor.stats)
+        executor.shutdown(wait=True)
+
+    asyncio.run(demo())
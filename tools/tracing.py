@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TripMind Tracing
+端到端链路追踪 - trace_id 由 project_id 推导，span 上下文随事件 payload 的 "trace" 字段在 agent 之间传递
+
+每个 span 记录一次跳转中的排队等待、LLM 时间、工具时间和发送延迟，按行追加到
+data/traces/<trace_id>.jsonl，可导出为 OTLP JSON 或在终端显示瀑布图:
+
+    python tools/tracing.py <project_id> [--otlp trace.json]
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_KEY = 'trace'
+DEFAULT_DIRECTORY = Path(__file__).resolve().parent.parent / 'data' / 'traces'
+
+# 当前线程/协程中正在进行的 span；asyncio.to_thread 会复制上下文，工具 span 因此能挂到所在的跳转下
+_current_span = contextvars.ContextVar('tripmind_current_span', default=None)
+
+
+def trace_id_for(project_id: str) -> str:
+    """同一项目的所有 span 属于同一个 trace（32 位十六进制，与 OTLP traceId 格式一致）"""
+    return hashlib.md5(str(project_id).encode('utf-8')).hexdigest()
+
+
+def detach_context():
+    """清除当前 span；fork 出的子进程会继承父进程的 span，在子进程初始化时调用"""
+    _current_span.set(None)
+
+
+def new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+class Tracer:
+    """记录 span 并追加写入本地文件；多个 agent 进程写同一 trace 文件时每行一次 O_APPEND 写入"""
+
+    def __init__(self, directory: Optional[str] = None, enabled: Optional[bool] = None):
+        self.directory = Path(directory or os.getenv('TRIPMIND_TRACE_DIR') or DEFAULT_DIRECTORY)
+        self.enabled = os.getenv('TRIPMIND_TRACING', '1') != '0' if enabled is None else enabled
+        self._lock = threading.Lock()
+
+    # ---- 记录 ----
+
+    def start(self, name: str, project_id: Optional[str] = None, parent: Optional[Dict[str, Any]] = None,
+              service: Optional[str] = None, kind: str = 'internal', start_ns: Optional[int] = None,
+              **attributes) -> Optional[Dict[str, Any]]:
+        """
+        开始一个 span
+
+        Args:
+            name: span 名称
+            project_id: 没有父 span 时用于确定 trace
+            parent: 父 span 或从事件中提取的上下文（含 trace_id / span_id）；缺省为当前 span，传 {} 表示根 span
+            service: 所在 agent，缺省沿用父 span 的 service
+            kind: hop / llm / tool / send / progress
+            start_ns: 开始时间（time.time_ns()），缺省为当前时间
+
+        Returns:
+            span 字典；未启用或无法确定 trace 时返回 None
+        """
+        if not self.enabled:
+            return None
+        parent = _current_span.get() if parent is None else parent or None
+        if parent is not None:
+            trace_id = parent['trace_id']
+            project_id = project_id or parent.get('project_id')
+        elif project_id:
+            trace_id = trace_id_for(project_id)
+        else:
+            return None
+        return {
+            'trace_id': trace_id,
+            'span_id': new_span_id(),
+            'parent_span_id': parent['span_id'] if parent else None,
+            'name': name,
+            'service': service or (parent or {}).get('service') or 'tools',
+            'kind': kind,
+            'project_id': project_id,
+            'start_ns': start_ns or time.time_ns(),
+            'end_ns': None,
+            'attributes': {key: value for key, value in attributes.items() if value is not None},
+        }
+
+    def end(self, span: Optional[Dict[str, Any]], end_ns: Optional[int] = None, **attributes):
+        if span is None:
+            return
+        span['end_ns'] = end_ns or time.time_ns()
+        span['attributes'].update({key: value for key, value in attributes.items() if value is not None})
+        self._write(span)
+
+    def record(self, name: str, start_ns: int, end_ns: int, **kwargs) -> Optional[Dict[str, Any]]:
+        """记录一个已知起止时间的 span（例如根据上下游时间推算出的 LLM 跳转）"""
+        span = self.start(name, start_ns=start_ns, **kwargs)
+        self.end(span, end_ns=end_ns)
+        return span
+
+    @contextlib.contextmanager
+    def span(self, name: str, **kwargs):
+        """上下文管理器形式，期间该 span 是当前 span；异常会记录到 error 属性后继续抛出"""
+        span = self.start(name, **kwargs)
+        token = _current_span.set(span) if span is not None else None
+        try:
+            yield span
+        except BaseException as e:
+            if span is not None:
+                span['attributes']['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if token is not None:
+                _current_span.reset(token)
+            self.end(span)
+
+    def current(self) -> Optional[Dict[str, Any]]:
+        return _current_span.get()
+
+    # ---- 上下文传递 ----
+
+    def inject(self, payload: Dict[str, Any], span: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """返回带 trace 上下文的 payload 副本；sent_at_ns 供接收方计算排队等待"""
+        span = span or _current_span.get()
+        if span is None:
+            return payload
+        payload = dict(payload)
+        payload[TRACE_KEY] = {'trace_id': span['trace_id'], 'span_id': span['span_id'],
+                              'service': span['service'], 'sent_at_ns': time.time_ns()}
+        return payload
+
+    def extract(self, payload: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        context = (payload or {}).get(TRACE_KEY)
+        if isinstance(context, dict) and context.get('trace_id') and context.get('span_id'):
+            return context
+        return None
+
+    # ---- 读取 ----
+
+    def load(self, project_id: str) -> List[Dict[str, Any]]:
+        path = self._path(trace_id_for(project_id))
+        if not path.exists():
+            return []
+        spans = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    logger.warning(f"Skipping unreadable span in {path.name}")
+        return sorted(spans, key=lambda span: span['start_ns'])
+
+    def _write(self, span: Dict[str, Any]):
+        line = (json.dumps(span, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        try:
+            with self._lock:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self._path(span['trace_id']), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+        except OSError as e:
+            # 追踪失败不能影响业务处理
+            logger.warning(f"Failed to write span {span['name']}: {e}")
+
+    def _path(self, trace_id: str) -> Path:
+        return self.directory / f'{trace_id}.jsonl'
+
+# 全局追踪实例
+tracer = Tracer()
+
+
+def traced(name: Optional[str] = None, kind: str = 'tool'):
+    """
+    工具函数装饰器: 在当前 span 下记录一个工具 span，同步函数和协程函数都适用
+
+    没有当前 span 时（例如 LLM agent 直接调用工具），按参数或 options 中的 project_id 挂到项目 trace 上；
+    两者都没有则不记录。
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        def project_of(kwargs):
+            options = kwargs.get('options') if isinstance(kwargs.get('options'), dict) else {}
+            return kwargs.get('project_id') or options.get('project_id')
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                project_id = None
+                if _current_span.get() is None:
+                    project_id = project_of(kwargs)
+                    if not project_id:
+                        return await func(*args, **kwargs)
+                with tracer.span(span_name, project_id=project_id, kind=kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            project_id = None
+            if _current_span.get() is None:
+                project_id = project_of(kwargs)
+                if not project_id:
+                    return func(*args, **kwargs)
+            with tracer.span(span_name, project_id=project_id, kind=kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ProgressSpans:
+    """
+    把 progress.update 转成 span
+
+    LLM agent（coordinator、user-intent 等）不携带 trace 上下文，但都会发送进度更新；
+    同一 agent 在同一项目中从第一条非终止状态到 completed / failed 之间记为一个 span。
+    """
+
+    TERMINAL = {'completed', 'failed', 'error'}
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._open: Dict[tuple, int] = {}
+
+    def observe(self, project_id: Optional[str], agent_id: str, status: str, message: str = ''):
+        if not project_id or not self.tracer.enabled:
+            return
+        key = (project_id, agent_id)
+        now = time.time_ns()
+        status = str(status or '').lower()
+        if status not in self.TERMINAL:
+            self._open.setdefault(key, now)
+            return
+        started = self._open.pop(key, None)
+        self.tracer.record(agent_id, started or now, now, project_id=project_id, parent={},
+                           service=agent_id, kind='progress', status=status, message=message[:200])
+
+
+def to_otlp(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """转换为 OTLP/JSON（ExportTraceServiceRequest），可直接导入 Jaeger、Tempo 等"""
+    def attribute(key, value):
+        if isinstance(value, bool):
+            return {'key': key, 'value': {'boolValue': value}}
+        if isinstance(value, int):
+            return {'key': key, 'value': {'intValue': str(value)}}
+        if isinstance(value, float):
+            return {'key': key, 'value': {'doubleValue': value}}
+        return {'key': key, 'value': {'stringValue': str(value)}}
+
+    by_service: Dict[str, List[Dict[str, Any]]] = {}
+    for span in spans:
+        attributes = dict(span['attributes'], **{'tripmind.kind': span['kind'], 'tripmind.project_id': span['project_id']})
+        otlp_span = {
+            'traceId': span['trace_id'],
+            'spanId': span['span_id'],
+            'name': span['name'],
+            'kind': 3 if span['kind'] == 'send' else 1,
+            'startTimeUnixNano': str(span['start_ns']),
+            'endTimeUnixNano': str(span['end_ns']),
+            'attributes': [attribute(key, value) for key, value in attributes.items() if value is not None],
+        }
+        if span.get('parent_span_id'):
+            otlp_span['parentSpanId'] = span['parent_span_id']
+        by_service.setdefault(span['service'], []).append(otlp_span)
+    return {'resourceSpans': [
+        {'resource': {'attributes': [attribute('service.name', service)]},
+         'scopeSpans': [{'scope': {'name': 'tripmind'}, 'spans': service_spans}]}
+        for service, service_spans in by_service.items()
+    ]}
+
+
+def waterfall(spans: List[Dict[str, Any]], width: int = 50) -> str:
+    """
+    终端瀑布图: 每行一个 span，按开始时间排序、按父子关系缩进
+
+    LLM 跳转的 span 额外显示工具时间和扣除工具后的 LLM 时间。
+    """
+    if not spans:
+        return '(no spans)'
+    origin = min(span['start_ns'] for span in spans)
+    total = max(max(span['end_ns'] for span in spans) - origin, 1)
+    known = {span['span_id'] for span in spans}
+    depth: Dict[str, int] = {}
+    for span in sorted(spans, key=lambda span: span['start_ns']):
+        parent = span.get('parent_span_id')
+        depth[span['span_id']] = depth.get(parent, 0) + 1 if parent in known else 0
+
+    lines = [f"trace {spans[0]['trace_id']}  project {spans[0]['project_id']}  total {total / 1e6:.1f} ms"]
+    for span in sorted(spans, key=lambda span: span['start_ns']):
+        start = span['start_ns'] - origin
+        duration = span['end_ns'] - span['start_ns']
+        offset = int(start / total * width)
+        bar = ' ' * offset + '█' * max(int(duration / total * width), 1)
+        label = '  ' * depth[span['span_id']] + f"{span['service']}: {span['name']}"
+        details = [f"{duration / 1e6:.1f} ms"]
+        if 'queue_wait_ms' in span['attributes']:
+            details.append(f"queue {span['attributes']['queue_wait_ms']:.1f} ms")
+        if span['kind'] == 'llm':
+            tool_ns = sum(other['end_ns'] - other['start_ns'] for other in spans
+                          if other['kind'] == 'tool' and other['service'] in (span['service'], 'tools')
+                          and span['start_ns'] <= other['start_ns'] and other['end_ns'] <= span['end_ns'])
+            details.append(f"llm {(duration - tool_ns) / 1e6:.1f} ms, tools {tool_ns / 1e6:.1f} ms")
+        lines.append(f"{label[:48]:<48} |{bar:<{width}}| {', '.join(details)}")
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Show or export a TripMind project trace")
+    parser.add_argument('project_id', nargs='?', help="Project to show; omitted runs a demo trace")
+    parser.add_argument('--otlp', help="Write the trace as OTLP/JSON to this file")
+    args = parser.parse_args()
+
+    if args.project_id:
+        project_spans = tracer.load(args.project_id)
+    else:
+        import tempfile
+        tracer = Tracer(tempfile.mkdtemp())
+        with tracer.span('intent.parsed', project_id='demo', service='orchestrator', kind='hop') as hop:
+            sent = tracer.inject({'project_id': 'demo'}, hop)
+        time.sleep(0.02)
+        scraping = tracer.extract(sent)
+        llm = tracer.record('route-planning-agent', scraping['sent_at_ns'], time.time_ns(), parent=scraping,
+                            service='route-planning-agent', kind='llm')
+        with tracer.span('info.scraping.requested', parent=llm, service='web-scraper-agent', kind='hop', queue_wait_ms=0.4):
+            traced('scrape_travel_info')(time.sleep)(0.01)
+        project_spans = tracer.load('demo')
+    print(waterfall(project_spans))
+    if args.otlp:
+        with open(args.otlp, 'w', encoding='utf-8') as f:
+            json.dump(to_otlp(project_spans), f, ensure_ascii=False, indent=2)
+        print(f"Wrote {len(project_spans)} spans to {args.otlp}")
@@ -5,7 +5,9 @@ TripMind Web Scraper Tool
 网络抓取工具 - 从各种网站抓取旅行相关信息
 """
 
+import asyncio
 import json
+import os
 import time
 import random
 import logging
@@ -24,10 +26,22 @@ except ImportError:
             return lambda f: f
         return func
 
+try:
+    from tools.poi_catalog import poi_catalog, CATALOG_TYPES, OFFLINE as POI_CATALOG_OFFLINE
+    from tools.tool_executor import tool_executor
+    from tools.tracing import traced
+except ImportError:
+    from poi_catalog import poi_catalog, CATALOG_TYPES, OFFLINE as POI_CATALOG_OFFLINE
+    from tool_executor import tool_executor
+    from tracing import traced
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 异步抓取的默认超时（秒），包括在线程池中排队的时间
+SCRAPE_TIMEOUT_SECONDS = float(os.getenv('SCRAPE_TIMEOUT_SECONDS', '90'))
+
 class TravelInfoScraper:
     """旅行信息抓取器主类"""
     
@@ -64,6 +78,7 @@ class TravelInfoScraper:
             ]
         }
     
+    @traced('scrape_travel_info')
     def scrape_travel_info(self, info_type: str, query: Dict[str, Any]) -> Dict[str, Any]:
         """
         主要抓取接口
@@ -86,10 +101,13 @@ class TravelInfoScraper:
             if info_type not in self.scrapers:
                 return self._create_error_result(f"不支持的信息类型: {info_type}")
             
-            # 执行抓取
+            # 执行抓取；景点、酒店、餐厅优先从本地 POI 目录读取
             start_time = time.time()
             scraper_func = self.scrapers[info_type]
-            raw_data = scraper_func(query)
+            if info_type in CATALOG_TYPES:
+                raw_data, from_catalog = self._scrape_via_catalog(info_type, query, scraper_func)
+            else:
+                raw_data, from_catalog = scraper_func(query), False
             duration = time.time() - start_time
             
             # 构建结果
@@ -99,7 +117,8 @@ class TravelInfoScraper:
                 'raw_data': raw_data,
                 'metadata': {
                     'total_items': len(raw_data),
-                    'sources_used': [source['name'] for source in self.data_sources.get(info_type, [])],
+                    'sources_used': (['poi_catalog'] if from_catalog else
+                                     [source['name'] for source in self.data_sources.get(info_type, [])]),
                     'scraping_duration': round(duration, 2),
                     'success_rate': 1.0 if raw_data else 0.0,
                     'scraped_at': datetime.now().isoformat()
@@ -113,6 +132,23 @@ class TravelInfoScraper:
             logger.error(f"抓取过程中发生错误: {str(e)}")
             return self._create_error_result(f"抓取失败: {str(e)}")
     
+    def _scrape_via_catalog(self, info_type: str, query: Dict[str, Any], scraper_func) -> tuple:
+        """
+        地点未抓取过或已过期时不带过滤条件抓取全部 POI 写入目录，再由目录按原抓取函数的条件过滤
+
+        Returns:
+            (数据列表, 是否直接来自目录)
+        """
+        location = query['location']
+        from_catalog = POI_CATALOG_OFFLINE or poi_catalog.is_fresh(info_type, location)
+        if not from_catalog:
+            items = scraper_func({'location': location, 'keywords': [], 'budget_range': [0, float('inf')]})
+            poi_catalog.upsert(info_type, location, items)
+        # 沿用各抓取函数原有的过滤：景点按关键词，酒店按预算（默认 0-1000），餐厅不过滤
+        keywords = query.get('keywords') if info_type == 'attractions' else None
+        budget_range = query.get('budget_range', [0, 1000]) if info_type == 'hotels' else None
+        return poi_catalog.search(info_type, location, keywords, budget_range), from_catalog
+    
     def _validate_query(self, info_type: str, query: Dict[str, Any]) -> bool:
         """验证查询参数"""
         required_fields = ['location']
@@ -326,6 +362,19 @@ class TravelInfoScraper:
             }
         }
     
+    async def scrape_travel_info_async(self, info_type: str, query: Dict[str, Any],
+                                       timeout: Optional[float] = SCRAPE_TIMEOUT_SECONDS) -> Dict[str, Any]:
+        """
+        在有界线程池中抓取，不阻塞调用方的事件循环
+
+        超时返回错误结果；调用方取消时抛出 CancelledError，尚未开始的抓取被撤销
+        """
+        try:
+            return await tool_executor.run_blocking(self.scrape_travel_info, info_type, query, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Scraping {info_type} timed out after {timeout}s")
+            return self._create_error_result(f"Scraping timed out after {timeout}s")
+    
     def _add_delay(self, min_delay: float = 1.0, max_delay: float = 3.0):
         """添加随机延时避免过度请求"""
         delay = random.uniform(min_delay, max_delay)
@@ -352,6 +401,15 @@ def scrape_travel_info(info_type: str, query: Dict[str, Any]) -> str:
     result = scraper.scrape_travel_info(info_type, query)
     return json.dumps(result, ensure_ascii=False, indent=2)
 
+@tool(
+    name="scrape_travel_info_async",
+    description="scrape_travel_info 的异步版本，在线程池中运行，支持超时（timeout_seconds）"
+)
+async def scrape_travel_info_async(info_type: str, query: Dict[str, Any],
+                                   timeout_seconds: float = SCRAPE_TIMEOUT_SECONDS) -> str:
+    result = await scraper.scrape_travel_info_async(info_type, query, timeout=timeout_seconds)
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
 if __name__ == "__main__":
     # 测试代码
     test_query = {